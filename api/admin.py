@@ -1,7 +1,7 @@
 from django.contrib import admin
 from .models import (
     Usuario, TipoUsuario, NivelAcceso, Sucursal,
-    Estado, Maquina, Solicitud, Informe, Task
+    Estado, Maquina, Solicitud, Informe, TareaPDF, CorreoSaliente, EventoNotificacion, Task
 )
 
 
@@ -66,13 +66,36 @@ class SolicitudAdmin(admin.ModelAdmin):
 @admin.register(Informe)
 class InformeAdmin(admin.ModelAdmin):
     list_display = [
-        'codigo_solicitud', 'codigo_maquinaria', 'id_usuario', 'fecha_informe'
+        'codigo_solicitud', 'codigo_maquinaria', 'id_usuario', 'fecha_informe', 'estado_pdf'
     ]
-    list_filter = ['fecha_informe']
+    list_filter = ['fecha_informe', 'estado_pdf']
     search_fields = ['descripcion', 'codigo_maquinaria__marca']
     date_hierarchy = 'fecha_informe'
     readonly_fields = ['fecha_informe']
 
 
+@admin.register(TareaPDF)
+class TareaPDFAdmin(admin.ModelAdmin):
+    list_display = ['id', 'informe', 'estado', 'intentos', 'disponible_desde', 'fecha_actualizacion']
+    list_filter = ['estado']
+    readonly_fields = ['fecha_creacion', 'fecha_actualizacion']
+
+
+@admin.register(CorreoSaliente)
+class CorreoSalienteAdmin(admin.ModelAdmin):
+    list_display = ['id', 'asunto', 'estado', 'intentos', 'disponible_desde', 'enviado_en']
+    list_filter = ['estado']
+    search_fields = ['asunto']
+    readonly_fields = ['fecha_creacion', 'fecha_actualizacion', 'enviado_en']
+
+
+@admin.register(EventoNotificacion)
+class EventoNotificacionAdmin(admin.ModelAdmin):
+    list_display = ['id', 'tipo', 'destinatario', 'solicitud', 'fecha_creacion', 'agrupado_en']
+    list_filter = ['tipo', 'agrupado_en']
+    search_fields = ['destinatario']
+    readonly_fields = ['fecha_creacion']
+
+
 # Legacy
 admin.site.register(Task)
@@ -0,0 +1,153 @@
+"""
+Utilidades compartidas por los comandos benchmark_*
+
+Los datos sintéticos llevan BENCH_PREFIJO (descripción/modelo) o el prefijo
+`bench_` (usuarios) para poder borrarlos con `limpiar_datos_bench`.
+"""
+import random
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Estado, Maquina, Solicitud, Sucursal, Usuario
+
+BENCH_PREFIJO = '[bench]'
+
+
+@contextmanager
+def sin_auto_now(modelo, *campos):
+    """Permite asignar fechas de creación/actualización arbitrarias en bulk_create"""
+    originales = {}
+    for nombre in campos:
+        campo = modelo._meta.get_field(nombre)
+        originales[nombre] = (campo.auto_now, campo.auto_now_add)
+        campo.auto_now = campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for nombre, (auto_now, auto_now_add) in originales.items():
+            campo = modelo._meta.get_field(nombre)
+            campo.auto_now, campo.auto_now_add = auto_now, auto_now_add
+
+
+def medir_ms(funcion, repeticiones=5):
+    """
+    Ejecuta `funcion` y retorna (mediana, mínimo) en milisegundos
+
+    La primera vuelta calienta cachés (páginas de la base, conexiones) y no se cuenta.
+    """
+    tiempos = []
+    for _ in range(repeticiones + 1):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos = tiempos[1:]
+    return statistics.median(tiempos), min(tiempos)
+
+
+def limpiar_datos_bench():
+    """Borra todos los datos sintéticos. Retorna las solicitudes eliminadas"""
+    borradas = Solicitud.objects.filter(descripcion__startswith=BENCH_PREFIJO).delete()[1].get('api.Solicitud', 0)
+    Usuario.objects.filter(username__startswith='bench_').delete()
+    Maquina.objects.filter(modelo__startswith=BENCH_PREFIJO).delete()
+    return borradas
+
+
+def escribir(salida, texto, ending='\n'):
+    """`salida` es el OutputWrapper de un comando (self.stdout) o None para sys.stdout"""
+    if salida is None:
+        sys.stdout.write(texto + ending)
+    else:
+        salida.write(texto, ending=ending)
+
+
+def sembrar_solicitudes(total, chunk=5000, rng=None, salida=None):
+    """
+    Completa hasta `total` solicitudes sintéticas (idempotente)
+
+    Usa bulk_create por lotes con fechas repartidas en dos años; como
+    bulk_create no dispara señales, asigna codigo_sucursal a mano.
+    """
+    rng = rng or random.Random(42)
+    existentes = Solicitud.objects.filter(descripcion__startswith=BENCH_PREFIJO).count()
+    faltantes = total - existentes
+    if faltantes <= 0:
+        return
+
+    for codigo, nombre in [(1, 'Pendiente'), (2, 'En Proceso'), (3, 'Completado'), (4, 'Cancelado')]:
+        Estado.objects.get_or_create(codigo_estado=codigo, defaults={'nombre_estado': nombre})
+
+    sucursales = list(Sucursal.objects.all()[:10])
+    while len(sucursales) < 10:
+        sucursales.append(Sucursal.objects.create(nombre_sucursal=f'Sucursal {len(sucursales) + 1}'))
+
+    maquinas = dict(Maquina.objects.filter(modelo__startswith=BENCH_PREFIJO).values_list('pk', 'codigo_sucursal'))
+    if not maquinas:
+        Maquina.objects.bulk_create([
+            Maquina(
+                codigo_sucursal=sucursales[n % len(sucursales)],
+                modelo=f'{BENCH_PREFIJO} Modelo {n}',
+                marca='Bench',
+                fecha_compra=date(2020, 1, 1),
+                fecha_instalacion=date(2020, 2, 1),
+            )
+            for n in range(500)
+        ])
+        maquinas = dict(
+            Maquina.objects.filter(modelo__startswith=BENCH_PREFIJO).values_list('pk', 'codigo_sucursal')
+        )
+    ids_maquinas = list(maquinas)
+
+    ingenieros = usuarios_bench(tipo=1, cantidad=50)
+    encargados = usuarios_bench(tipo=2, cantidad=20)
+    creadores = ingenieros[:10] + encargados
+
+    escribir(salida, f'Sembrando {faltantes} solicitudes...')
+    ahora = timezone.now()
+    inicio = time.perf_counter()
+    with sin_auto_now(Solicitud, 'fecha_creacion', 'fecha_actualizacion'):
+        for desde in range(0, faltantes, chunk):
+            filas = []
+            for _ in range(min(chunk, faltantes - desde)):
+                creada = ahora - timedelta(seconds=rng.randint(0, 730 * 86400))
+                maquina = rng.choice(ids_maquinas)
+                filas.append(Solicitud(
+                    codigo_maquinaria_id=maquina,
+                    codigo_sucursal_id=maquinas[maquina],  # bulk_create no dispara señales
+                    id_usuario_id=rng.choice(creadores),
+                    ingeniero_asignado_id=rng.choice(ingenieros) if rng.random() < 0.8 else None,
+                    codigo_estado_id=rng.choices([1, 2, 3, 4], weights=[15, 10, 70, 5])[0],
+                    descripcion=f'{BENCH_PREFIJO} solicitud sintética',
+                    fecha_creacion=creada,
+                    fecha_actualizacion=creada,
+                ))
+            with transaction.atomic():
+                Solicitud.objects.bulk_create(filas, batch_size=chunk)
+            escribir(salida, f'  {desde + len(filas)}/{faltantes}', ending='\r')
+    escribir(salida, f'\nSiembra terminada en {time.perf_counter() - inicio:.1f} s')
+
+
+def usuarios_bench(tipo, cantidad):
+    """Ids de `cantidad` usuarios sintéticos del tipo indicado (los crea si faltan)"""
+    prefijo = f'bench_{tipo}_'
+    existentes = list(Usuario.objects.filter(username__startswith=prefijo).values_list('pk', flat=True))
+    if len(existentes) >= cantidad:
+        return existentes
+    Usuario.objects.bulk_create([
+        Usuario(
+            username=f'{prefijo}{n}',
+            correo_electronico=f'{prefijo}{n}@bench.local',
+            apellido_paterno='Bench',
+            apellido_materno='Bench',
+            codigo_tipo_usuario=tipo,
+            codigo_nivel_acceso=2,
+            password='!',
+        )
+        for n in range(len(existentes), cantidad)
+    ])
+    return list(Usuario.objects.filter(username__startswith=prefijo).values_list('pk', flat=True))
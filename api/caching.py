@@ -0,0 +1,72 @@
+"""
+Caché de resultados con invalidación por versión
+
+Cada grupo (p. ej. 'solicitudes') tiene una versión en el caché y las claves
+la incluyen. Invalidar es reemplazarla por otra nueva: las entradas viejas
+dejan de leerse y expiran solas por TTL, sin tener que conocer ni borrar cada
+clave. La versión es un token aleatorio (como la marca de api.catalogos) y no
+un contador: si el caché la desaloja, la que se crea de nuevo no coincide con
+ninguna anterior y no revive entradas viejas.
+
+Con el caché local por defecto (LocMemCache) la invalidación solo alcanza al
+proceso que escribió; con varios workers conviene un caché compartido.
+"""
+import logging
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def _clave_version(grupo):
+    return f'version:{grupo}'
+
+
+def version(grupo):
+    return cache.get_or_set(_clave_version(grupo), uuid.uuid4().hex, timeout=None)
+
+
+def invalidar(grupo):
+    """Renueva la versión del grupo al confirmar la transacción en curso"""
+    transaction.on_commit(lambda: _renovar_version(grupo))
+
+
+def _renovar_version(grupo):
+    cache.set(_clave_version(grupo), uuid.uuid4().hex, timeout=None)
+
+
+def llave_versionada(grupos, clave):
+    """Llave de `clave` que deja de leerse cuando cambia la versión de cualquiera de `grupos`"""
+    versiones = '.'.join(f'{grupo}:v{version(grupo)}' for grupo in grupos)
+    return f'{versiones}:{clave}'
+
+
+def cacheado(grupo, clave, calcular, timeout):
+    """Valor de `calcular()` cacheado bajo (grupo, versión, clave) por `timeout` segundos"""
+    llave = f'{grupo}:v{version(grupo)}:{clave}'
+    valor = cache.get(llave)
+    if valor is None:
+        valor = calcular()
+        cache.set(llave, valor, timeout)
+    return valor
+
+
+def advertir_cache_por_proceso():
+    """
+    Avisa si producción (DEBUG=False) usa un caché por proceso
+
+    Con LocMemCache cada worker de gunicorn tiene su propio caché: las
+    invalidaciones, las marcas de catálogos y las respuestas cacheadas no se
+    ven entre workers y los demás siguen sirviendo datos viejos.
+    """
+    backend = settings.CACHES['default']['BACKEND']
+    if settings.DEBUG or not backend.endswith('LocMemCache'):
+        return False
+    logger.warning(
+        'CACHES usa LocMemCache con DEBUG=False: cada proceso tiene su propio caché y las '
+        'invalidaciones no llegan a los demás workers. Configura CACHE_BACKEND=redis (o file).'
+    )
+    return True
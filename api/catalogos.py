@@ -0,0 +1,107 @@
+"""
+Caché en proceso de los catálogos (Estado, TipoUsuario, NivelAcceso, Sucursal)
+
+Son tablas chicas que casi nunca cambian: cada proceso guarda {pk: instancia}
+y la relee solo cuando cambia la marca del catálogo, que vive en el caché de
+Django (CACHES) y se revisa a lo más cada CATALOG_CACHE_REFRESH segundos (así
+serializar mil filas no son mil lecturas del caché compartido). Las señales
+de api/signals.py descartan la copia local al escribir y, al confirmar la
+transacción, borran la marca; con un caché compartido (Redis, Memcached,
+archivo) eso alcanza a todos los workers. Con el LocMemCache por defecto cada
+proceso solo ve sus propias escrituras.
+
+La marca también sirve de ETag para los endpoints de catálogos.
+"""
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Estado, NivelAcceso, Sucursal, TipoUsuario
+
+MODELOS = {
+    'estado': Estado,
+    'tipo_usuario': TipoUsuario,
+    'nivel_acceso': NivelAcceso,
+    'sucursal': Sucursal,
+}
+
+# nombre -> (marca, {pk: instancia}, momento de la última revisión de la marca)
+_locales = {}
+
+
+def _clave(nombre):
+    return f'catalogo:{nombre}:marca'
+
+
+def marca(nombre):
+    """Identificador de la versión vigente del catálogo (uno nuevo si el caché no lo tenía)"""
+    return cache.get_or_set(_clave(nombre), uuid.uuid4().hex, timeout=None)
+
+
+def filas(nombre):
+    """{pk: instancia} del catálogo; consulta la base solo si cambió la marca"""
+    ahora = time.monotonic()
+    guardado = _locales.get(nombre)
+    if guardado is not None and ahora - guardado[2] < settings.CATALOG_CACHE_REFRESH:
+        return guardado[1]
+    actual = marca(nombre)
+    if guardado is not None and guardado[0] == actual:
+        _locales[nombre] = (actual, guardado[1], ahora)
+        return guardado[1]
+    instancias = {instancia.pk: instancia for instancia in MODELOS[nombre].objects.all()}
+    _locales[nombre] = (actual, instancias, ahora)
+    return instancias
+
+
+def precargar():
+    """Carga todos los catálogos (p. ej. al iniciar un worker o antes de medir consultas)"""
+    for nombre in MODELOS:
+        filas(nombre)
+
+
+def obtener(nombre, pk):
+    """Instancia del catálogo con ese pk, o None"""
+    try:
+        return filas(nombre).get(int(pk))
+    except (TypeError, ValueError):
+        return None
+
+
+def obtener_o_consultar(nombre, pk):
+    """
+    Como `obtener`, pero si el caché no tiene ese pk lo busca en la base (None si no existe)
+
+    Con un caché por proceso otro worker puede haber agregado la fila sin que la
+    marca local cambie; en ese caso se descarta la copia local para releerla.
+    """
+    instancia = obtener(nombre, pk)
+    if instancia is not None:
+        return instancia
+    try:
+        instancia = MODELOS[nombre].objects.filter(pk=int(pk)).first()
+    except (TypeError, ValueError):
+        return None
+    if instancia is not None:
+        _locales.pop(nombre, None)
+    return instancia
+
+
+def invalidar(nombre):
+    """Descarta la copia local ya y la marca compartida al confirmar la transacción"""
+    _locales.pop(nombre, None)
+
+    def al_confirmar():
+        _locales.pop(nombre, None)
+        cache.delete(_clave(nombre))
+
+    transaction.on_commit(al_confirmar)
+
+
+def nombre_de_modelo(modelo):
+    for nombre, candidato in MODELOS.items():
+        if candidato is modelo:
+            return nombre
+    return None
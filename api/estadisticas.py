@@ -0,0 +1,86 @@
+"""
+Estadísticas del panel de administración
+
+Cada función es una sola consulta agregada en la base (COUNT con FILTER
+condicional y GROUP BY); ninguna recorre solicitudes en Python.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Maquina, Solicitud, Sucursal, Usuario
+
+PENDIENTE, EN_PROCESO, COMPLETADO, CANCELADO = 1, 2, 3, 4
+
+
+def _conteos_por_estado():
+    return {
+        'total': Count('pk'),
+        'pendientes': Count('pk', filter=Q(codigo_estado=PENDIENTE)),
+        'en_proceso': Count('pk', filter=Q(codigo_estado=EN_PROCESO)),
+        'completadas': Count('pk', filter=Q(codigo_estado=COMPLETADO)),
+        'canceladas': Count('pk', filter=Q(codigo_estado=CANCELADO)),
+    }
+
+
+def resumen_general():
+    """Totales del sistema; los de solicitudes salen de una sola agregación condicional"""
+    solicitudes = Solicitud.objects.aggregate(**_conteos_por_estado())
+    return {
+        'total_usuarios': Usuario.objects.count(),
+        'total_solicitudes': solicitudes['total'],
+        'total_maquinas': Maquina.objects.count(),
+        'total_sucursales': Sucursal.objects.count(),
+        'solicitudes_pendientes': solicitudes['pendientes'],
+        'solicitudes_en_proceso': solicitudes['en_proceso'],
+        'solicitudes_completadas': solicitudes['completadas'],
+        'solicitudes_canceladas': solicitudes['canceladas'],
+    }
+
+
+def solicitudes_por_sucursal():
+    """Solicitudes por estado en cada sucursal (columna denormalizada, sin join a máquina)"""
+    filas = (
+        Solicitud.objects.values('codigo_sucursal', nombre_sucursal=F('codigo_sucursal__nombre_sucursal'))
+        .annotate(**_conteos_por_estado())
+        .order_by('codigo_sucursal')
+    )
+    return list(filas)
+
+
+def solicitudes_por_ingeniero():
+    """Carga de cada ingeniero: asignadas por estado, de mayor a menor"""
+    filas = (
+        Solicitud.objects.exclude(ingeniero_asignado=None)
+        .values('ingeniero_asignado', username=F('ingeniero_asignado__username'))
+        .annotate(**_conteos_por_estado())
+        .order_by('-total', 'ingeniero_asignado')
+    )
+    return list(filas)
+
+
+def solicitudes_por_dia(dias):
+    """
+    Solicitudes creadas por día en los últimos `dias` (y cuántas ya están completadas)
+
+    Los días sin solicitudes vienen en cero para que la serie no tenga huecos.
+    """
+    hoy = timezone.localdate()
+    desde = hoy - timedelta(days=dias - 1)
+    filas = (
+        # Rango sobre la columna (no __date) para que use el índice de fecha_creacion
+        Solicitud.objects.filter(fecha_creacion__gte=timezone.make_aware(datetime.combine(desde, time.min)))
+        .annotate(dia=TruncDate('fecha_creacion'))
+        .values('dia')
+        .annotate(creadas=Count('pk'), completadas=Count('pk', filter=Q(codigo_estado=COMPLETADO)))
+        .order_by('dia')
+    )
+    por_fecha = {fila['dia']: fila for fila in filas}
+    serie = []
+    for n in range(dias):
+        dia = desde + timedelta(days=n)
+        fila = por_fecha.get(dia, {'creadas': 0, 'completadas': 0})
+        serie.append({'dia': dia, 'creadas': fila['creadas'], 'completadas': fila['completadas']})
+    return serie
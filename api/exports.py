@@ -0,0 +1,113 @@
+"""
+Exportación masiva de informes en un ZIP transmitido por partes
+"""
+import logging
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .utils import calcular_hash_informe, guardar_pdf_informe, pdf_en_cache, renderizar_pdf_informe
+
+logger = logging.getLogger(__name__)
+
+TAMANO_BLOQUE = 64 * 1024
+
+
+class _BufferZip:
+    """
+    Destino de escritura para ZipFile que se vacía tras cada bloque
+
+    No implementa seek/tell, así que zipfile escribe en modo streaming
+    (descriptores de datos después de cada archivo).
+    """
+
+    def __init__(self):
+        self._partes = []
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        """Produce lo escrito desde la última llamada (nada si está vacío)"""
+        if self._partes:
+            datos = b''.join(self._partes)
+            self._partes = []
+            yield datos
+
+
+def zip_informes(informes, max_workers):
+    """
+    Generador de bytes de un ZIP con el PDF de cada informe
+
+    `informes` debe venir con select_related de todo lo que usa el PDF
+    (solicitud, estado, máquina, sucursal, autor): los PDFs que faltan se
+    renderizan en un pool de hilos acotado que no toca la base de datos.
+    En memoria hay a lo sumo `2 * max_workers` PDFs a la vez.
+    """
+    buffer = _BufferZip()
+    errores = []
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_STORED) as archivo_zip:
+            for informe, contenido in _pdfs_en_orden(informes, pool, ventana=2 * max(1, max_workers)):
+                nombre = f'informe_{informe.codigo_solicitud_id}.pdf'
+                if contenido is None:
+                    errores.append(nombre)
+                    continue
+
+                with archivo_zip.open(nombre, mode='w') as destino:
+                    if isinstance(contenido, bytes):
+                        destino.write(contenido)
+                        yield from buffer.vaciar()
+                    else:
+                        # PDF ya guardado: copiar por bloques sin cargarlo entero
+                        with contenido.open('rb') as origen:
+                            for bloque in iter(lambda: origen.read(TAMANO_BLOQUE), b''):
+                                destino.write(bloque)
+                                yield from buffer.vaciar()
+                yield from buffer.vaciar()
+
+            if errores:
+                archivo_zip.writestr(
+                    'errores.txt',
+                    'No se pudo generar el PDF de:\n' + '\n'.join(errores) + '\n'
+                )
+    yield from buffer.vaciar()
+
+
+def _pdfs_en_orden(informes, pool, ventana):
+    """Produce (informe, bytes | FieldFile | None) respetando el orden del queryset"""
+    pendientes = deque()
+    for informe in informes:
+        hash_contenido = calcular_hash_informe(informe)
+        if pdf_en_cache(informe, hash_contenido):
+            pendientes.append((informe, hash_contenido, None))
+        else:
+            pendientes.append((informe, hash_contenido, pool.submit(renderizar_pdf_informe, informe)))
+
+        while len(pendientes) > ventana:
+            yield _resolver(*pendientes.popleft())
+
+    while pendientes:
+        yield _resolver(*pendientes.popleft())
+
+
+def _resolver(informe, hash_contenido, futuro):
+    if futuro is None:
+        return informe, informe.archivo_pdf
+    try:
+        contenido = futuro.result()
+    except Exception:
+        logger.exception(f"Error generando PDF de informe #{informe.codigo_solicitud_id} para exportación")
+        return informe, None
+
+    # Guardar en el hilo principal para que la próxima descarga sea un acierto de caché
+    try:
+        guardar_pdf_informe(informe, contenido, hash_contenido)
+    except Exception:
+        logger.exception(f"No se pudo guardar el PDF de informe #{informe.codigo_solicitud_id}")
+    return informe, contenido
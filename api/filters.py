@@ -0,0 +1,21 @@
+"""
+FilterSets de la API
+"""
+import django_filters
+
+from .models import Solicitud
+
+
+class SolicitudFilter(django_filters.FilterSet):
+    """
+    Filtros de solicitudes
+
+    `codigo_maquinaria__codigo_sucursal` se mantiene por compatibilidad con el
+    frontend, pero filtra sobre la columna denormalizada `codigo_sucursal`.
+    """
+    codigo_sucursal = django_filters.NumberFilter(field_name='codigo_sucursal')
+    codigo_maquinaria__codigo_sucursal = django_filters.NumberFilter(field_name='codigo_sucursal')
+
+    class Meta:
+        model = Solicitud
+        fields = ['codigo_estado', 'codigo_maquinaria', 'id_usuario']
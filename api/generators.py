@@ -0,0 +1,334 @@
+"""
+Generadores de datos sintéticos para pruebas de carga
+
+Producen sucursales, máquinas, usuarios, solicitudes e informes con
+distribuciones parecidas a las de producción:
+
+- pocas sucursales y máquinas concentran la mayoría de las solicitudes (Zipf),
+- pocos ingenieros atienden la mayoría de los trabajos,
+- las solicitudes se acumulan hacia el presente y las recientes siguen abiertas,
+- casi todas las completadas tienen informe,
+- cada solicitud trae su historial de estados (TransicionEstado).
+
+Todo sale de un `random.Random(seed)`, así que la misma semilla genera los
+mismos datos (las fechas son relativas al día de ejecución). Los pk se asignan explícitamente (desde el máximo actual), lo que
+permite volcar cada lote a fixtures JSONL reutilizables con `loaddata` y no
+depende de que el motor devuelva los ids en bulk_create (MySQL no lo hace).
+Al terminar se reinician las secuencias de ids (PostgreSQL no las avanza con
+pk explícitos), para que los `create()` posteriores no choquen con ellos.
+"""
+import os
+import random
+import time
+from datetime import date, datetime, time as hora, timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core import serializers
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .benchmarks import escribir, sin_auto_now
+from .models import Estado, Informe, Maquina, Solicitud, Sucursal, TransicionEstado, Usuario
+
+ESTADOS = [(1, 'Pendiente'), (2, 'En Proceso'), (3, 'Completado'), (4, 'Cancelado')]
+# Mezcla de estados según la antigüedad: lo reciente sigue abierto, lo antiguo está cerrado
+MEZCLA_RECIENTE = {1: 40, 2: 35, 3: 22, 4: 3}
+MEZCLA_ANTIGUA = {1: 2, 2: 2, 3: 89, 4: 7}
+DIAS_RECIENTE = 14
+
+CIUDADES = ['Santiago', 'Valparaíso', 'Concepción', 'Antofagasta', 'Temuco', 'La Serena', 'Rancagua', 'Talca']
+EQUIPOS = [
+    ('Atlas Copco', 'Compresor GA'), ('Siemens', 'Motor 1LE'), ('Haas', 'Torno CNC ST'),
+    ('Lincoln Electric', 'Soldadora MIG'), ('Schuler', 'Prensa Hidráulica'), ('Caterpillar', 'Generador C'),
+    ('Grundfos', 'Bomba CR'), ('Jungheinrich', 'Montacargas EFG'), ('ABB', 'Variador ACS'),
+]
+FALLAS = [
+    'Ruido anormal y vibración durante la operación.',
+    'No alcanza la presión de trabajo requerida.',
+    'Fuga de aceite en el circuito hidráulico.',
+    'Error intermitente en el panel de control.',
+    'Sobrecalentamiento después de una hora de uso.',
+    'Mantenimiento preventivo programado.',
+]
+TRABAJOS = [
+    'Se reemplazó el sello defectuoso y se probó a presión nominal.',
+    'Se recalibró el sensor y se actualizó el firmware del controlador.',
+    'Se cambiaron rodamientos y se alineó el eje.',
+    'Se limpió el sistema de refrigeración y se cambió el filtro.',
+]
+NOMBRES = ['Juan', 'María', 'Carlos', 'Ana', 'Pedro', 'Camila', 'Diego', 'Valentina', 'José', 'Francisca']
+APELLIDOS = ['González', 'Muñoz', 'Rojas', 'Díaz', 'Pérez', 'Soto', 'Contreras', 'Silva', 'Martínez', 'Sepúlveda']
+
+# Orden en que `loaddata` debe cargar los fixtures (respeta las claves foráneas)
+ORDEN_FIXTURES = ['sucursal', 'usuario', 'maquina', 'solicitud', 'informe', 'transicionestado']
+
+
+def pesos_zipf(cantidad, exponente=1.0):
+    """Pesos acumulados de 1/rango^s (para `cum_weights`): el primero es el más frecuente"""
+    return list(accumulate(1 / (rango ** exponente) for rango in range(1, cantidad + 1)))
+
+
+def siguiente_pk(modelo):
+    return (modelo.objects.aggregate(maximo=Max('pk'))['maximo'] or 0) + 1
+
+
+def reiniciar_secuencias(modelos):
+    """Lleva las secuencias de ids de `modelos` al máximo pk actual (no hace nada en SQLite/MySQL)"""
+    sentencias = connection.ops.sequence_reset_sql(no_style(), modelos)
+    if sentencias:
+        with connection.cursor() as cursor:
+            for sentencia in sentencias:
+                cursor.execute(sentencia)
+
+
+class Lotes:
+    """
+    Inserta instancias con bulk_create por lotes y, opcionalmente, las vuelca a
+    un fixture JSONL (uno por modelo) en `directorio`
+    """
+
+    def __init__(self, chunk, directorio=None):
+        self.chunk = chunk
+        self.directorio = directorio
+        self.archivos = {}
+
+    def guardar(self, modelo, filas):
+        if not filas:
+            return 0
+        with transaction.atomic():
+            modelo.objects.bulk_create(filas, batch_size=self.chunk)
+        if self.directorio:
+            serializers.serialize('jsonl', filas, stream=self._archivo(modelo))
+        return len(filas)
+
+    def _archivo(self, modelo):
+        nombre = modelo._meta.model_name
+        if nombre not in self.archivos:
+            ruta = os.path.join(self.directorio, f'{nombre}.jsonl')
+            self.archivos[nombre] = open(ruta, 'w', encoding='utf-8')
+        return self.archivos[nombre]
+
+    def cerrar(self):
+        for archivo in self.archivos.values():
+            archivo.close()
+        self.archivos = {}
+
+
+def generar_sucursales(cantidad, lotes):
+    inicio = siguiente_pk(Sucursal)
+    filas = [
+        Sucursal(codigo_sucursal=pk, nombre_sucursal=f'Sucursal {CIUDADES[n % len(CIUDADES)]} {pk}')
+        for n, pk in enumerate(range(inicio, inicio + cantidad))
+    ]
+    lotes.guardar(Sucursal, filas)
+    return [fila.pk for fila in filas]
+
+
+def generar_usuarios(cantidad, sucursales, rng, lotes, proporcion_ingenieros=0.3, password=None):
+    """Retorna (ingenieros, encargados) como listas de (pk, sucursal)"""
+    clave = make_password(password) if password else '!'  # un solo hash para todos
+    inicio = siguiente_pk(Usuario)
+    filas = []
+    for n, pk in enumerate(range(inicio, inicio + cantidad)):
+        # Al menos un ingeniero y un encargado, el resto según la proporción
+        es_ingeniero = n == 0 or (n != 1 and rng.random() < proporcion_ingenieros)
+        filas.append(Usuario(
+            id_usuario=pk,
+            username=f'gen_{pk}',
+            password=clave,
+            first_name=rng.choice(NOMBRES),
+            apellido_paterno=rng.choice(APELLIDOS),
+            apellido_materno=rng.choice(APELLIDOS),
+            correo_electronico=f'gen_{pk}@carga.mantentask.local',
+            codigo_sucursal_id=rng.choice(sucursales),
+            codigo_tipo_usuario=1 if es_ingeniero else 2,
+            codigo_nivel_acceso=rng.choice([1, 2]) if es_ingeniero else rng.choice([2, 3]),
+        ))
+    for desde in range(0, len(filas), lotes.chunk):
+        lotes.guardar(Usuario, filas[desde:desde + lotes.chunk])
+    ingenieros = [(u.pk, u.codigo_sucursal_id) for u in filas if u.codigo_tipo_usuario == 1]
+    encargados = [(u.pk, u.codigo_sucursal_id) for u in filas if u.codigo_tipo_usuario == 2]
+    return ingenieros, encargados
+
+
+def generar_maquinas(cantidad, sucursales, rng, lotes):
+    """Retorna lista de (pk, sucursal); las primeras sucursales reciben más máquinas"""
+    hoy = date.today()
+    pesos = pesos_zipf(len(sucursales), 0.8)
+    inicio = siguiente_pk(Maquina)
+    filas = []
+    for pk in range(inicio, inicio + cantidad):
+        marca, modelo = rng.choice(EQUIPOS)
+        compra = hoy - timedelta(days=rng.randint(30, 3650))
+        filas.append(Maquina(
+            codigo_maquinaria=pk,
+            codigo_sucursal_id=rng.choices(sucursales, cum_weights=pesos)[0],
+            marca=marca,
+            modelo=f'{modelo} {rng.randint(100, 999)}',
+            numero_serie=f'GEN-{pk:08d}',
+            fecha_compra=compra,
+            fecha_instalacion=compra + timedelta(days=rng.randint(1, 30)),
+        ))
+    for desde in range(0, len(filas), lotes.chunk):
+        lotes.guardar(Maquina, filas[desde:desde + lotes.chunk])
+    return [(m.pk, m.codigo_sucursal_id) for m in filas]
+
+
+def _por_sucursal(usuarios):
+    agrupados = {}
+    for pk, sucursal in usuarios:
+        agrupados.setdefault(sucursal, []).append(pk)
+    return agrupados
+
+
+def _historial(solicitud, pk):
+    """
+    Transiciones de una solicitud generada: nace pendiente y llega a su estado
+    en fecha_actualizacion; las completadas pasan antes por En Proceso
+    """
+    creada, actualizada, estado = solicitud.fecha_creacion, solicitud.fecha_actualizacion, solicitud.codigo_estado_id
+    ingeniero = solicitud.ingeniero_asignado_id
+    pasos = [(None, 1, creada, solicitud.id_usuario_id)]
+    if estado == 3:
+        pasos.append((1, 2, creada + (actualizada - creada) / 4, ingeniero))
+        pasos.append((2, 3, actualizada, ingeniero))
+    elif estado in (2, 4):
+        pasos.append((1, estado, actualizada, ingeniero if estado == 2 else solicitud.id_usuario_id))
+    return [
+        TransicionEstado(
+            id=pk + n, solicitud_id=solicitud.pk, estado_anterior_id=anterior, estado_nuevo_id=nuevo,
+            codigo_sucursal_id=solicitud.codigo_sucursal_id, ingeniero_asignado_id=ingeniero,
+            usuario_id=usuario, fecha=fecha,
+        )
+        for n, (anterior, nuevo, fecha, usuario) in enumerate(pasos)
+    ]
+
+
+def generar_solicitudes(total, maquinas, ingenieros, encargados, rng, lotes,
+                        dias=730, proporcion_informes=0.9, salida=None):
+    """
+    Genera `total` solicitudes (y los informes de las completadas) por lotes
+
+    Retorna (solicitudes, informes, transiciones) creados.
+    """
+    if not maquinas or not ingenieros or not encargados:
+        raise ValueError('Se necesitan máquinas, ingenieros y encargados para generar solicitudes')
+
+    pesos_maquinas = pesos_zipf(len(maquinas), 0.7)
+    ingenieros_por_sucursal = _por_sucursal(ingenieros)
+    encargados_por_sucursal = _por_sucursal(encargados)
+    todos_ingenieros = [pk for pk, _ in ingenieros]
+    todos_encargados = [pk for pk, _ in encargados]
+    pesos_ingenieros = {s: pesos_zipf(len(pks), 1.2) for s, pks in ingenieros_por_sucursal.items()}
+    pesos_ingenieros[None] = pesos_zipf(len(todos_ingenieros), 1.2)
+
+    ahora = timezone.now()
+    hoy = timezone.localdate()
+    siguiente = siguiente_pk(Solicitud)
+    siguiente_transicion = siguiente_pk(TransicionEstado)
+    creadas = informes = transiciones = 0
+    inicio = time.perf_counter()
+
+    with sin_auto_now(Solicitud, 'fecha_creacion', 'fecha_actualizacion'), sin_auto_now(Informe, 'fecha_informe'):
+        for desde in range(0, total, lotes.chunk):
+            solicitudes, informes_lote, historial = [], [], []
+            for _ in range(min(lotes.chunk, total - desde)):
+                maquina, sucursal = rng.choices(maquinas, cum_weights=pesos_maquinas)[0]
+                # Más densidad hacia el presente (crecimiento del uso) y en horario laboral
+                antiguedad = int(dias * rng.random() ** 1.6)
+                dia = hoy - timedelta(days=antiguedad)
+                momento = hora(min(max(int(rng.gauss(11, 3)), 0), 23), rng.randint(0, 59), rng.randint(0, 59))
+                creada = timezone.make_aware(datetime.combine(dia, momento))
+                if creada > ahora:
+                    creada -= timedelta(days=1)
+
+                mezcla = MEZCLA_RECIENTE if antiguedad < DIAS_RECIENTE else MEZCLA_ANTIGUA
+                estado = rng.choices(list(mezcla), weights=list(mezcla.values()))[0]
+
+                ingeniero = None
+                if estado != 1 or rng.random() < 0.4:
+                    candidatos = ingenieros_por_sucursal.get(sucursal)
+                    clave = sucursal if candidatos else None
+                    ingeniero = rng.choices(
+                        candidatos or todos_ingenieros, cum_weights=pesos_ingenieros[clave]
+                    )[0]
+
+                actualizada = creada
+                if estado in (2, 3, 4):
+                    actualizada = min(creada + timedelta(hours=rng.lognormvariate(3, 1)), ahora)
+
+                solicitud = Solicitud(
+                    codigo_solicitud=siguiente,
+                    codigo_maquinaria_id=maquina,
+                    codigo_sucursal_id=sucursal,  # bulk_create no dispara señales
+                    id_usuario_id=rng.choice(encargados_por_sucursal.get(sucursal) or todos_encargados),
+                    ingeniero_asignado_id=ingeniero,
+                    codigo_estado_id=estado,
+                    descripcion=rng.choice(FALLAS),
+                    fecha_programada=dia + timedelta(days=rng.randint(0, 14)) if rng.random() < 0.3 else None,
+                    fecha_creacion=creada,
+                    fecha_actualizacion=actualizada,
+                )
+                solicitudes.append(solicitud)
+                siguiente += 1
+                historial.extend(_historial(solicitud, siguiente_transicion + len(historial)))
+
+                if estado == 3 and ingeniero and rng.random() < proporcion_informes:
+                    informes_lote.append(Informe(
+                        codigo_solicitud_id=solicitud.pk,
+                        codigo_maquinaria_id=maquina,
+                        id_usuario_id=ingeniero,
+                        descripcion=rng.choice(TRABAJOS),
+                        fecha_informe=actualizada,
+                    ))
+
+            creadas += lotes.guardar(Solicitud, solicitudes)
+            informes += lotes.guardar(Informe, informes_lote)
+            transiciones += lotes.guardar(TransicionEstado, historial)
+            siguiente_transicion += len(historial)
+            escribir(salida, f'  {creadas}/{total} solicitudes, {informes} informes', ending='\r')
+
+    escribir(salida, f'\nGeneradas en {time.perf_counter() - inicio:.1f} s')
+    return creadas, informes, transiciones
+
+
+def generar_datos(sucursales=10, maquinas=500, usuarios=200, solicitudes=100_000, seed=42, chunk=5000,
+                  dias=730, proporcion_informes=0.9, proporcion_ingenieros=0.3, password=None,
+                  directorio_fixtures=None, salida=None):
+    """Genera un set completo y retorna un resumen con las cantidades creadas"""
+    rng = random.Random(seed)
+    for codigo, nombre in ESTADOS:
+        Estado.objects.get_or_create(codigo_estado=codigo, defaults={'nombre_estado': nombre})
+
+    if directorio_fixtures:
+        os.makedirs(directorio_fixtures, exist_ok=True)
+    lotes = Lotes(chunk, directorio_fixtures)
+    try:
+        ids_sucursales = generar_sucursales(sucursales, lotes)
+        ingenieros, encargados = generar_usuarios(
+            usuarios, ids_sucursales, rng, lotes, proporcion_ingenieros, password
+        )
+        ids_maquinas = generar_maquinas(maquinas, ids_sucursales, rng, lotes)
+        escribir(salida, f'{sucursales} sucursales, {len(ids_maquinas)} máquinas, '
+                          f'{len(ingenieros)} ingenieros y {len(encargados)} encargados')
+        creadas, informes, transiciones = generar_solicitudes(
+            solicitudes, ids_maquinas, ingenieros, encargados, rng, lotes,
+            dias=dias, proporcion_informes=proporcion_informes, salida=salida,
+        )
+    finally:
+        lotes.cerrar()
+        reiniciar_secuencias([Estado, Sucursal, Usuario, Maquina, Solicitud, Informe, TransicionEstado])
+
+    return {
+        'sucursales': len(ids_sucursales),
+        'usuarios': len(ingenieros) + len(encargados),
+        'ingenieros': len(ingenieros),
+        'encargados': len(encargados),
+        'maquinas': len(ids_maquinas),
+        'solicitudes': creadas,
+        'informes': informes,
+        'transiciones': transiciones,
+    }
@@ -0,0 +1,113 @@
+"""
+Cola de trabajos en segundo plano para la generación de PDFs de informes
+
+El endpoint de creación solo encola la tarea; el worker
+`manage.py process_pdf_jobs` la reclama y genera el PDF fuera del request.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Informe, TareaPDF
+from .utils import generar_pdf_informe
+
+logger = logging.getLogger(__name__)
+
+
+def encolar_pdf_informe(informe):
+    """Marca el PDF del informe como pendiente y crea la tarea (si no hay una en cola)"""
+    if informe.estado_pdf != Informe.PDF_PENDIENTE:
+        informe.estado_pdf = Informe.PDF_PENDIENTE
+        Informe.objects.filter(pk=informe.pk).update(estado_pdf=Informe.PDF_PENDIENTE)
+
+    tarea = TareaPDF.objects.filter(informe=informe, estado=TareaPDF.PENDIENTE).first()
+    if tarea is None:
+        tarea = TareaPDF.objects.create(
+            informe=informe,
+            max_intentos=settings.PDF_JOB_MAX_RETRIES,
+        )
+    return tarea
+
+
+def reclamar_tareas(limite):
+    """
+    Reclama hasta `limite` tareas disponibles y retorna sus ids
+
+    Cada tarea se toma con un UPDATE condicional sobre el estado, de modo que
+    si varios workers compiten por la misma fila solo uno la obtiene.
+    """
+    ahora = timezone.now()
+    _recuperar_tareas_colgadas(ahora)
+
+    candidatas = list(
+        TareaPDF.objects.filter(estado=TareaPDF.PENDIENTE, disponible_desde__lte=ahora)
+        .order_by('disponible_desde')
+        .values_list('pk', flat=True)[:limite]
+    )
+
+    reclamadas = []
+    for tarea_id in candidatas:
+        tomada = TareaPDF.objects.filter(pk=tarea_id, estado=TareaPDF.PENDIENTE).update(
+            estado=TareaPDF.EN_PROCESO,
+            iniciada_en=ahora,
+            intentos=F('intentos') + 1,
+            fecha_actualizacion=ahora,
+        )
+        if tomada:
+            reclamadas.append(tarea_id)
+    return reclamadas
+
+
+def ejecutar_tarea(tarea_id):
+    """Genera el PDF de una tarea reclamada. Retorna True si terminó bien"""
+    tarea = TareaPDF.objects.select_related(
+        'informe',
+        'informe__codigo_solicitud',
+        'informe__codigo_solicitud__codigo_estado',
+        'informe__codigo_maquinaria',
+        'informe__codigo_maquinaria__codigo_sucursal',
+        'informe__id_usuario',
+    ).get(pk=tarea_id)
+
+    try:
+        generar_pdf_informe(tarea.informe)
+    except Exception as e:
+        logger.exception(f"Error generando PDF de informe #{tarea.informe_id} (intento {tarea.intentos})")
+        _registrar_fallo(tarea, e)
+        return False
+
+    tarea.estado = TareaPDF.COMPLETADA
+    tarea.ultimo_error = ''
+    tarea.save(update_fields=['estado', 'ultimo_error', 'fecha_actualizacion'])
+    logger.info(f"PDF de informe #{tarea.informe_id} generado (tarea #{tarea.pk})")
+    return True
+
+
+def _registrar_fallo(tarea, error):
+    """Reprograma la tarea con espera exponencial o la marca como fallida"""
+    tarea.ultimo_error = str(error)
+    if tarea.intentos >= tarea.max_intentos:
+        tarea.estado = TareaPDF.FALLIDA
+        Informe.objects.filter(pk=tarea.informe_id).update(estado_pdf=Informe.PDF_FALLIDO)
+    else:
+        espera = settings.PDF_JOB_RETRY_DELAY * 2 ** (tarea.intentos - 1)
+        tarea.estado = TareaPDF.PENDIENTE
+        tarea.disponible_desde = timezone.now() + timedelta(seconds=espera)
+    tarea.save(update_fields=['estado', 'ultimo_error', 'disponible_desde', 'fecha_actualizacion'])
+
+
+def _recuperar_tareas_colgadas(ahora):
+    """Devuelve a la cola las tareas cuyo worker murió a mitad de camino"""
+    limite = ahora - timedelta(seconds=settings.PDF_JOB_TIMEOUT)
+    colgadas = TareaPDF.objects.filter(estado=TareaPDF.EN_PROCESO, iniciada_en__lt=limite)
+
+    agotadas = colgadas.filter(intentos__gte=F('max_intentos'))
+    Informe.objects.filter(tareas_pdf__in=agotadas).update(estado_pdf=Informe.PDF_FALLIDO)
+    agotadas.update(estado=TareaPDF.FALLIDA, ultimo_error='Tiempo de procesamiento agotado')
+
+    recuperadas = colgadas.update(estado=TareaPDF.PENDIENTE, disponible_desde=ahora)
+    if recuperadas:
+        logger.warning(f"{recuperadas} tareas PDF colgadas devueltas a la cola")
@@ -0,0 +1,135 @@
+"""
+Lectura ligera de solicitudes para listados (?fields= / ?expand=)
+
+SolicitudSerializer arma cada fila a partir de instancias de modelo y cuatro
+serializers anidados; en listados grandes ese trabajo por campo domina la CPU.
+`LecturaSolicitud` pide a la base solo las columnas de los campos elegidos con
+`.values()` (sin instanciar modelos) y arma cada dict con funciones
+precalculadas. Los valores salen con el mismo formato que SolicitudSerializer:
+las fechas pasan por sus mismos campos DRF.
+
+- `?fields=a,b` limita el resultado a esos campos de SolicitudSerializer.
+- `?expand=maquina,usuario,ingeniero,estado` agrega esos objetos anidados; sin
+  `fields`, el resultado son todos los campos planos más los expandidos.
+
+Sin ninguno de los dos parámetros el listado usa SolicitudSerializer completo.
+"""
+from functools import lru_cache
+from operator import itemgetter
+
+from .serializers import MaquinaSimpleSerializer, SolicitudSerializer
+
+ANIDADOS = ('maquina', 'usuario', 'ingeniero', 'estado')
+CAMPOS = tuple(SolicitudSerializer.Meta.fields)
+PLANOS = tuple(campo for campo in CAMPOS if campo not in ANIDADOS)
+
+
+def _lista(valor):
+    return [parte.strip() for parte in (valor or '').split(',') if parte.strip()]
+
+
+def campos_solicitados(query_params):
+    """
+    Campos pedidos con ?fields= / ?expand=, en el orden de SolicitudSerializer
+
+    None si no vino ninguno de los dos; ValueError si alguno no existe.
+    """
+    fields, expand = _lista(query_params.get('fields')), _lista(query_params.get('expand'))
+    if not fields and not expand:
+        return None
+    desconocidos = [campo for campo in fields if campo not in CAMPOS]
+    if desconocidos:
+        raise ValueError(f'Campos no válidos: {", ".join(desconocidos)}')
+    desconocidos = [campo for campo in expand if campo not in ANIDADOS]
+    if desconocidos:
+        raise ValueError(f'No se puede expandir: {", ".join(desconocidos)} (opciones: {", ".join(ANIDADOS)})')
+    elegidos = set(fields or PLANOS) | set(expand)
+    return [campo for campo in CAMPOS if campo in elegidos]
+
+
+def _nombre_completo(fila, prefijo):
+    # Igual que Usuario.get_full_name
+    return f"{fila[f'{prefijo}__first_name']} {fila[f'{prefijo}__apellido_paterno']} {fila[f'{prefijo}__apellido_materno']}"
+
+
+def _persona(fk):
+    """UsuarioSimpleSerializer de la FK `fk` (None si está vacía)"""
+    columnas = (fk,) + tuple(
+        f'{fk}__{campo}' for campo in
+        ('username', 'first_name', 'apellido_paterno', 'apellido_materno', 'correo_electronico')
+    )
+
+    def armar(fila):
+        if fila[fk] is None:
+            return None
+        return {
+            'id_usuario': fila[fk],
+            'username': fila[f'{fk}__username'],
+            'nombre_completo': _nombre_completo(fila, fk),
+            'correo_electronico': fila[f'{fk}__correo_electronico'],
+        }
+    return columnas, armar
+
+
+def _nombre(fk):
+    columnas = (fk,) + tuple(f'{fk}__{campo}' for campo in ('first_name', 'apellido_paterno', 'apellido_materno'))
+    return columnas, lambda fila: None if fila[fk] is None else _nombre_completo(fila, fk)
+
+
+def _maquina():
+    campos = MaquinaSimpleSerializer.Meta.fields
+    columnas = ('codigo_maquinaria',) + tuple(f'codigo_maquinaria__{campo}' for campo in campos[1:])
+
+    def armar(fila):
+        return dict(zip(campos, (fila[columna] for columna in columnas)))
+    return columnas, armar
+
+
+def _con_formato(nombre, formato):
+    return (nombre,), lambda fila: None if fila[nombre] is None else formato(fila[nombre])
+
+
+@lru_cache(maxsize=None)
+def _constructores():
+    """{campo: (columnas de .values(), función fila -> valor)} para cada campo de SolicitudSerializer"""
+    campos = SolicitudSerializer().fields
+    constructores = {campo: ((campo,), itemgetter(campo)) for campo in PLANOS}
+    constructores.update({
+        'fecha_creacion': _con_formato('fecha_creacion', campos['fecha_creacion'].to_representation),
+        'fecha_actualizacion': _con_formato('fecha_actualizacion', campos['fecha_actualizacion'].to_representation),
+        'fecha_programada': _con_formato('fecha_programada', campos['fecha_programada'].to_representation),
+        'fecha_solicitud': (
+            ('fecha_creacion',),
+            lambda fila: fila['fecha_creacion'].date().isoformat() if fila['fecha_creacion'] else None,
+        ),
+        'nombre_usuario': _nombre('id_usuario'),
+        'nombre_ingeniero': _nombre('ingeniero_asignado'),
+        'maquina': _maquina(),
+        'usuario': _persona('id_usuario'),
+        'ingeniero': _persona('ingeniero_asignado'),
+        'estado': _con_formato('codigo_estado', campos['estado'].to_representation),
+    })
+    return constructores
+
+
+class LecturaSolicitud:
+    """
+    Listado de solicitudes con .values() en vez de SolicitudSerializer
+
+    `columnas_extra` se piden siempre (la paginación por cursor necesita el pk
+    y el campo de orden aunque el cliente no los haya pedido).
+    """
+
+    def __init__(self, campos, columnas_extra=()):
+        constructores = _constructores()
+        self.armadores = [(campo, constructores[campo][1]) for campo in campos]
+        self.columnas = list(dict.fromkeys(
+            [*columnas_extra, *(columna for campo in campos for columna in constructores[campo][0])]
+        ))
+
+    def queryset(self, queryset):
+        return queryset.values(*self.columnas)
+
+    def representar(self, filas):
+        armadores = self.armadores
+        return [{campo: armar(fila) for campo, armar in armadores} for fila in filas]
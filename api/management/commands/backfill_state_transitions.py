@@ -0,0 +1,20 @@
+"""
+Crea el historial de estados inferido de las solicitudes que no tienen ninguno
+"""
+from django.core.management.base import BaseCommand
+
+from api.transiciones import reconstruir_historial
+
+
+class Command(BaseCommand):
+    help = (
+        'Agrega a TransicionEstado la creación (Pendiente) y el paso al estado actual en '
+        'fecha_actualizacion de las solicitudes sin historial (datos previos o cargados con bulk_create)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Solicitudes por lote')
+
+    def handle(self, *args, **options):
+        creadas = reconstruir_historial(options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'{creadas} transiciones inferidas'))
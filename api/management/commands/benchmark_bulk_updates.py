@@ -0,0 +1,77 @@
+"""
+Compara N llamadas individuales (asignar_ingeniero / cambiar_estado) con una masiva
+"""
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.benchmarks import BENCH_PREFIJO, sembrar_solicitudes, usuarios_bench
+from api.models import Solicitud, Usuario
+
+
+class Command(BaseCommand):
+    help = 'Mide N solicitudes reasignadas (o cambiadas de estado) con N llamadas individuales vs una masiva'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=500, help='Solicitudes por operación')
+        parser.add_argument('--rows', type=int, default=20_000, help='Solicitudes sintéticas a sembrar')
+        parser.add_argument('--operacion', choices=['asignar', 'estado', 'ambas'], default='ambas')
+        parser.add_argument('--seed', type=int, default=42, help='Semilla del generador aleatorio')
+
+    def handle(self, *args, **options):
+        sembrar_solicitudes(options['rows'], rng=random.Random(options['seed']), salida=self.stdout)
+        ids = list(
+            Solicitud.objects.filter(descripcion__startswith=BENCH_PREFIJO, codigo_estado=1)
+            .order_by('pk').values_list('pk', flat=True)[:options['tickets']]
+        )
+        if len(ids) < options['tickets']:
+            raise CommandError(f'Solo hay {len(ids)} solicitudes pendientes de benchmark; aumentar --rows')
+
+        encargado = Usuario.objects.get(pk=usuarios_bench(tipo=2, cantidad=20)[0])
+        ingeniero = usuarios_bench(tipo=1, cantidad=50)[0]
+        cliente = APIClient()
+        cliente.force_authenticate(user=encargado)
+
+        operaciones = []
+        if options['operacion'] in ('asignar', 'ambas'):
+            operaciones.append((
+                'Asignar ingeniero',
+                lambda pk: (reverse('solicitud-asignar-ingeniero', args=[pk]), {'id_ingeniero': ingeniero}),
+                (reverse('solicitud-asignar-ingeniero-masivo'), {'ids': ids, 'id_ingeniero': ingeniero}),
+            ))
+        if options['operacion'] in ('estado', 'ambas'):
+            operaciones.append((
+                'Cambiar estado',
+                lambda pk: (reverse('solicitud-cambiar-estado', args=[pk]), {'codigo_estado': 2}),
+                (reverse('solicitud-cambiar-estado-masivo'), {'ids': ids, 'codigo_estado': 2}),
+            ))
+
+        self.stdout.write(f'\nMotor: {connection.vendor}, {len(ids)} solicitudes por operación\n')
+        self.stdout.write(f'{"Operación":<20}{"Modo":<14}{"ms":>12}{"consultas":>12}')
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            for nombre, individual, masiva in operaciones:
+                uno_a_uno = self._medir(cliente, [individual(pk) for pk in ids])
+                en_bloque = self._medir(cliente, [masiva])
+                self.stdout.write(f'{nombre:<20}{"individual":<14}{uno_a_uno[0]:>12.1f}{uno_a_uno[1]:>12}')
+                self.stdout.write(f'{"":<20}{"masiva":<14}{en_bloque[0]:>12.1f}{en_bloque[1]:>12}')
+                if en_bloque[0]:
+                    self.stdout.write(self.style.SUCCESS(f'{"":<20}Mejora: x{uno_a_uno[0] / en_bloque[0]:.1f}'))
+
+    def _medir(self, cliente, llamadas):
+        """Ejecuta las llamadas y deshace los cambios; retorna (ms, consultas)"""
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as consultas:
+                inicio = time.perf_counter()
+                for url, datos in llamadas:
+                    response = cliente.post(url, datos, format='json')
+                    if response.status_code != 200:
+                        raise CommandError(f'{url} respondió {response.status_code}: {response.data}')
+                total_ms = (time.perf_counter() - inicio) * 1000
+            transaction.set_rollback(True)
+        return total_ms, len(consultas)
@@ -0,0 +1,75 @@
+"""
+Bytes transferidos y CPU de comprimir los listados grandes del panel con cada algoritmo y nivel
+"""
+import random
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.benchmarks import medir_ms, sembrar_solicitudes
+from api.models import Usuario
+from api.views import AdminDashboardViewSet
+from mantentask_project import middleware
+
+NIVELES = {
+    'gzip': (middleware.Gzip, (1, 6, 9)),
+    'br': (middleware.Brotli, (1, 4, 6, 11)),
+    'zstd': (middleware.Zstd, (1, 3, 9, 19)),
+}
+MODULOS = {'gzip': middleware.gzip, 'br': middleware.brotli, 'zstd': middleware.zstandard}
+
+
+class Command(BaseCommand):
+    help = 'Mide tamaño comprimido y tiempo de CPU de solicitudes_dashboard / usuarios_dashboard por algoritmo y nivel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000, help='Solicitudes sintéticas a sembrar')
+        parser.add_argument('--repeat', type=int, default=5, help='Repeticiones (se reporta la mediana)')
+        parser.add_argument('--chunk', type=int, default=500, help='Filas por bloque en la variante transmitida')
+        parser.add_argument('--seed', type=int, default=42, help='Semilla del generador aleatorio')
+
+    def handle(self, *args, **options):
+        sembrar_solicitudes(options['rows'], rng=random.Random(options['seed']), salida=self.stdout)
+        faltantes = [nombre for nombre, modulo in MODULOS.items() if modulo is None]
+        if faltantes:
+            self.stdout.write(f'Sin biblioteca instalada (se omiten): {", ".join(faltantes)}')
+
+        for accion in ('solicitudes_dashboard', 'usuarios_dashboard'):
+            cuerpo = self._respuesta(accion)
+            self.stdout.write(f'\n{accion}: {len(cuerpo) / 1024:.0f} KiB sin comprimir')
+            self.stdout.write(f'{"Algoritmo":<12}{"Nivel":>6}{"KiB":>10}{"% del original":>16}{"ms":>10}{"MB/s":>10}')
+            for nombre, (clase, niveles) in NIVELES.items():
+                if MODULOS[nombre] is None:
+                    continue
+                for nivel in niveles:
+                    codec = clase(nivel)
+                    comprimido = codec.comprimir(cuerpo)
+                    mediana, _ = medir_ms(lambda: codec.comprimir(cuerpo), options['repeat'])
+                    self.stdout.write(
+                        f'{nombre:<12}{nivel:>6}{len(comprimido) / 1024:>10.1f}'
+                        f'{100 * len(comprimido) / len(cuerpo):>15.1f}%{mediana:>10.2f}'
+                        f'{len(cuerpo) / 1e6 / (mediana / 1000) if mediana else 0:>10.0f}'
+                    )
+            self._transmitido(cuerpo, options['chunk'])
+
+    def _respuesta(self, accion):
+        """Cuerpo JSON de la acción del panel, renderizado como lo haría la API"""
+        admin = Usuario(username='bench_admin', codigo_tipo_usuario=2, codigo_nivel_acceso=4)
+        request = APIRequestFactory().get(f'/api/admin-dashboard/{accion}/')
+        force_authenticate(request, user=admin)
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            response = AdminDashboardViewSet.as_view({'get': accion})(request)
+            response.render()
+        return response.content
+
+    def _transmitido(self, cuerpo, filas_por_bloque):
+        """Costo de comprimir bloque a bloque (como ?stream=1) frente a comprimir todo junto"""
+        filas = cuerpo[1:-1].split(b'},{')
+        bloques = [b'},{'.join(filas[i:i + filas_por_bloque]) for i in range(0, len(filas), filas_por_bloque)]
+        codec = middleware.Gzip(6)
+        transmitido = b''.join(codec.flujo(iter(bloques)))
+        self.stdout.write(
+            f'gzip 6 transmitido en {len(bloques)} bloques: {len(transmitido) / 1024:.1f} KiB '
+            f'(vs {len(codec.comprimir(cuerpo)) / 1024:.1f} KiB de una vez)'
+        )
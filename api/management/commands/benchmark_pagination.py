@@ -0,0 +1,65 @@
+"""
+Compara la latencia de una página profunda: OFFSET vs cursor (keyset)
+"""
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api.benchmarks import medir_ms, sembrar_solicitudes
+from api.models import Solicitud
+from api.pagination import filtro_keyset
+
+
+class Command(BaseCommand):
+    help = 'Mide la página N de /api/solicitudes/ con PageNumberPagination (COUNT + OFFSET) y con cursor'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200_000, help='Solicitudes sintéticas a sembrar')
+        parser.add_argument('--page', type=int, default=1000, help='Página a medir')
+        parser.add_argument('--page-size', type=int, default=10, help='Filas por página')
+        parser.add_argument('--repeat', type=int, default=5, help='Repeticiones (se reporta la mediana)')
+        parser.add_argument('--seed', type=int, default=42, help='Semilla del generador aleatorio')
+
+    def handle(self, *args, **options):
+        sembrar_solicitudes(options['rows'], rng=random.Random(options['seed']), salida=self.stdout)
+
+        tamano = options['page_size']
+        desplazamiento = (options['page'] - 1) * tamano
+        base = Solicitud.objects.select_related(
+            'id_usuario', 'ingeniero_asignado', 'codigo_maquinaria',
+            'codigo_maquinaria__codigo_sucursal', 'codigo_estado',
+        ).order_by('-fecha_creacion', '-codigo_solicitud')
+
+        # El cliente en modo cursor trae (fecha, pk) de la última fila de la página anterior
+        anterior = base.values_list('fecha_creacion', 'codigo_solicitud')[desplazamiento - 1:desplazamiento]
+        if desplazamiento and not anterior:
+            self.stderr.write(f'No hay suficientes filas para la página {options["page"]}')
+            return
+        fecha, pk = anterior[0] if desplazamiento else (None, None)
+
+        def con_offset():
+            base.all().count()
+            return list(base.all()[desplazamiento:desplazamiento + tamano])
+
+        def con_cursor():
+            qs = base.all()
+            if fecha is not None:
+                qs = qs.filter(filtro_keyset('fecha_creacion', True, fecha, pk, 'codigo_solicitud'))
+            return list(qs[:tamano + 1])[:tamano]
+
+        if [s.pk for s in con_offset()] != [s.pk for s in con_cursor()]:
+            self.stderr.write('Las dos paginaciones no devolvieron las mismas filas')
+            return
+
+        offset_ms, _ = medir_ms(con_offset, options['repeat'])
+        cursor_ms, _ = medir_ms(con_cursor, options['repeat'])
+
+        self.stdout.write(
+            f'Motor: {connection.vendor}, solicitudes: {Solicitud.objects.count()}, '
+            f'página {options["page"]} de {tamano} filas\n'
+        )
+        self.stdout.write(f'  COUNT + OFFSET: {offset_ms:9.2f} ms')
+        self.stdout.write(f'  Cursor:         {cursor_ms:9.2f} ms')
+        if cursor_ms:
+            self.stdout.write(self.style.SUCCESS(f'  Mejora:         x{offset_ms / cursor_ms:.1f}'))
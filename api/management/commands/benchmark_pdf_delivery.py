@@ -0,0 +1,76 @@
+"""
+Benchmark del tiempo de worker por MB servido en cada modo de entrega de PDFs
+"""
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from api.models import Informe
+from api.protected_media import MODO_DJANGO, MODO_NGINX, MODO_SENDFILE, servir_archivo_protegido
+
+
+class Command(BaseCommand):
+    help = 'Mide segundos de worker por MB servido con FileResponse, os.sendfile, X-Sendfile y X-Accel-Redirect'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size-mb', type=int, default=5, help='Tamaño del archivo de prueba en MB')
+        parser.add_argument('--requests', type=int, default=20, help='Descargas simuladas por modo')
+
+    def handle(self, *args, **options):
+        tamano = options['size_mb'] * 1024 * 1024
+        descargas = options['requests']
+        media_root = tempfile.mkdtemp()
+        try:
+            os.makedirs(os.path.join(media_root, 'informes'))
+            with open(os.path.join(media_root, 'informes', 'benchmark.pdf'), 'wb') as f:
+                f.write(os.urandom(tamano))
+
+            with override_settings(MEDIA_ROOT=media_root):
+                informe = Informe(archivo_pdf='informes/benchmark.pdf')
+                megabytes = tamano * descargas / (1024 * 1024)
+
+                self.stdout.write(f'{descargas} descargas de {options["size_mb"]} MB por modo\n')
+                self.stdout.write(f'{"Modo":<38}{"CPU s/MB":>12}{"Reloj s/MB":>12}')
+                resultados = [
+                    ('django (FileResponse iterado)', self._medir(self._iterar_respuesta, informe, MODO_DJANGO, descargas)),
+                    ('django (wsgi.file_wrapper/sendfile)', self._medir(self._sendfile, informe, MODO_DJANGO, descargas)),
+                    ('sendfile (X-Sendfile)', self._medir(self._iterar_respuesta, informe, MODO_SENDFILE, descargas)),
+                    ('nginx (X-Accel-Redirect)', self._medir(self._iterar_respuesta, informe, MODO_NGINX, descargas)),
+                ]
+                for nombre, (cpu, reloj) in resultados:
+                    self.stdout.write(f'{nombre:<38}{cpu / megabytes:>12.6f}{reloj / megabytes:>12.6f}')
+        finally:
+            shutil.rmtree(media_root, ignore_errors=True)
+
+    def _medir(self, consumir, informe, modo, descargas):
+        cpu_inicio, reloj_inicio = time.process_time(), time.perf_counter()
+        for _ in range(descargas):
+            response = servir_archivo_protegido(None, informe.archivo_pdf, 'benchmark.pdf', modo=modo)
+            consumir(response)
+            response.close()
+        return time.process_time() - cpu_inicio, time.perf_counter() - reloj_inicio
+
+    def _iterar_respuesta(self, response):
+        """Lo que hace el servidor WSGI sin file_wrapper: copiar cada bloque en Python"""
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        else:
+            response.content
+
+    def _sendfile(self, response):
+        """Lo que hace gunicorn con wsgi.file_wrapper: os.sendfile desde el descriptor"""
+        origen = response.file_to_stream
+        with open(os.devnull, 'wb') as destino:
+            restante = os.fstat(origen.fileno()).st_size
+            offset = 0
+            while restante:
+                enviados = os.sendfile(destino.fileno(), origen.fileno(), offset, restante)
+                if not enviados:
+                    break
+                offset += enviados
+                restante -= enviados
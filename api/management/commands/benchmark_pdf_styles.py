@@ -0,0 +1,88 @@
+"""
+Micro-benchmark del costo de preparar estilos de ReportLab por informe
+"""
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import Estado, Informe, Maquina, Solicitud, Sucursal, Usuario
+from api.utils import EstilosPDF, registro_estilos_pdf, renderizar_pdf_informe
+
+
+def informe_sintetico(numero):
+    """Informe en memoria (sin base de datos) con todas sus relaciones"""
+    sucursal = Sucursal(codigo_sucursal=numero % 5 + 1, nombre_sucursal=f'Sucursal {numero % 5 + 1}')
+    maquina = Maquina(
+        codigo_maquinaria=numero,
+        codigo_sucursal=sucursal,
+        modelo=f'Modelo {numero}',
+        marca='Atlas Copco',
+        fecha_compra=date(2023, 1, 1),
+        fecha_instalacion=date(2023, 1, 15),
+    )
+    usuario = Usuario(first_name='Juan', apellido_paterno='Pérez', apellido_materno='García')
+    solicitud = Solicitud(
+        codigo_solicitud=numero,
+        codigo_maquinaria=maquina,
+        id_usuario=usuario,
+        codigo_estado=Estado(codigo_estado=3, nombre_estado='Completado'),
+        descripcion=f'Falla reportada en la máquina {numero}.',
+    )
+    return Informe(
+        codigo_solicitud=solicitud,
+        codigo_maquinaria=maquina,
+        id_usuario=usuario,
+        descripcion=f'Trabajo realizado en la solicitud {numero}.',
+        fecha_informe=timezone.now(),
+    )
+
+
+class Command(BaseCommand):
+    help = 'Compara el costo de estilos por informe: construirlos cada vez vs el registro compartido'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=1000, help='Cantidad de informes sintéticos')
+        parser.add_argument('--render', action='store_true', help='Medir también el render completo del PDF')
+
+    def handle(self, *args, **options):
+        cantidad = options['count']
+        informes = [informe_sintetico(n) for n in range(1, cantidad + 1)]
+
+        self.stdout.write(f'Benchmark de estilos PDF sobre {cantidad} informes sintéticos\n')
+
+        # Antes: cada informe construía su hoja de estilos y sus TableStyle
+        antes = self._medir(lambda: EstilosPDF(), cantidad)
+        # Después: registro perezoso compartido
+        registro_estilos_pdf.reiniciar()
+        despues = self._medir(registro_estilos_pdf.obtener, cantidad)
+        self._reportar('Preparación de estilos', antes, despues, cantidad)
+
+        if options['render']:
+            def render_sin_registro(informe):
+                registro_estilos_pdf.reiniciar()
+                return renderizar_pdf_informe(informe)
+
+            antes = self._medir_render(render_sin_registro, informes)
+            despues = self._medir_render(renderizar_pdf_informe, informes)
+            self._reportar('Render completo', antes, despues, cantidad)
+
+    def _medir(self, funcion, cantidad):
+        inicio = time.perf_counter()
+        for _ in range(cantidad):
+            funcion()
+        return time.perf_counter() - inicio
+
+    def _medir_render(self, funcion, informes):
+        inicio = time.perf_counter()
+        for informe in informes:
+            funcion(informe)
+        return time.perf_counter() - inicio
+
+    def _reportar(self, titulo, antes, despues, cantidad):
+        self.stdout.write(self.style.SUCCESS(titulo))
+        self.stdout.write(f'  Antes:   {antes * 1000:10.2f} ms total  ({antes / cantidad * 1e6:9.1f} µs/informe)')
+        self.stdout.write(f'  Después: {despues * 1000:10.2f} ms total  ({despues / cantidad * 1e6:9.1f} µs/informe)')
+        if despues:
+            self.stdout.write(f'  Mejora:  x{antes / despues:.1f}\n')
@@ -0,0 +1,70 @@
+"""
+Compara JSONRenderer/JSONParser de DRF con los de orjson (api/renderers.py)
+"""
+import io
+import json
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api import catalogos
+from api.benchmarks import BENCH_PREFIJO, medir_ms, sembrar_solicitudes
+from api.models import Usuario
+from api.renderers import ORJSONParser, ORJSONRenderer, orjson
+from api.serializers import SolicitudSerializer, UsuarioSerializer
+from api.views import SolicitudViewSet
+
+
+class Command(BaseCommand):
+    help = 'Mide el tiempo de render y parseo JSON de listados grandes de solicitudes y usuarios'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000, help='Filas por listado')
+        parser.add_argument('--repeat', type=int, default=5, help='Repeticiones (se reporta la mediana)')
+        parser.add_argument('--seed', type=int, default=42, help='Semilla del generador aleatorio')
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError('orjson no está instalado: ORJSONRenderer usaría el JSONRenderer de DRF')
+        filas = options['rows']
+        sembrar_solicitudes(filas, rng=random.Random(options['seed']), salida=self.stdout)
+        catalogos.precargar()
+
+        solicitudes = SolicitudViewSet().get_queryset().filter(descripcion__startswith=BENCH_PREFIJO)
+        listados = [('Solicitudes', SolicitudSerializer(solicitudes.order_by('-fecha_creacion')[:filas], many=True).data)]
+        # Los usuarios sintéticos se crean dentro de una transacción que se deshace
+        with transaction.atomic():
+            Usuario.objects.bulk_create([
+                Usuario(
+                    username=f'bench_render_{n}', correo_electronico=f'bench_render_{n}@bench.local',
+                    first_name='Bench', apellido_paterno='Render', apellido_materno=str(n),
+                    codigo_tipo_usuario=1, codigo_nivel_acceso=1, password='!',
+                )
+                for n in range(filas)
+            ], batch_size=2000)
+            usuarios = Usuario.objects.filter(username__startswith='bench_render_')
+            listados.append(('Usuarios', UsuarioSerializer(usuarios, many=True).data))
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'\n{"Listado":<14}{"Operación":<12}{"DRF ms":>10}{"orjson ms":>12}{"Mejora":>10}')
+        for nombre, datos in listados:
+            drf, rapido = JSONRenderer().render(datos), ORJSONRenderer().render(datos)
+            if drf != rapido:
+                raise CommandError(f'{nombre}: ORJSONRenderer no produce los mismos bytes que JSONRenderer')
+            if json.loads(drf) != ORJSONParser().parse(io.BytesIO(drf)):
+                raise CommandError(f'{nombre}: ORJSONParser no produce los mismos datos que JSONParser')
+
+            mediciones = [
+                ('render', lambda: JSONRenderer().render(datos), lambda: ORJSONRenderer().render(datos)),
+                ('parse', lambda: JSONParser().parse(io.BytesIO(drf)), lambda: ORJSONParser().parse(io.BytesIO(drf))),
+            ]
+            for operacion, con_drf, con_orjson in mediciones:
+                drf_ms, _ = medir_ms(con_drf, options['repeat'])
+                orjson_ms, _ = medir_ms(con_orjson, options['repeat'])
+                self.stdout.write(
+                    f'{nombre:<14}{operacion:<12}{drf_ms:>10.1f}{orjson_ms:>12.1f}{drf_ms / orjson_ms:>9.1f}x'
+                )
+            self.stdout.write(f'{"":<14}{len(datos)} filas, {len(drf) / 1024:.0f} KiB')
@@ -0,0 +1,61 @@
+"""
+Compara filas por segundo de SolicitudSerializer y la lectura ligera (.values())
+"""
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from api import catalogos
+from api.benchmarks import BENCH_PREFIJO, medir_ms, sembrar_solicitudes
+from api.lectura import CAMPOS, PLANOS, LecturaSolicitud
+from api.serializers import SolicitudSerializer
+from api.views import SolicitudViewSet
+
+# Lo que suele pedir una tabla del frontend
+CAMPOS_TABLA = ['codigo_solicitud', 'descripcion', 'estado', 'nombre_ingeniero', 'fecha_creacion']
+
+
+class Command(BaseCommand):
+    help = 'Mide filas/segundo al serializar N solicitudes con SolicitudSerializer y con ?fields= / ?expand='
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000, help='Solicitudes a serializar')
+        parser.add_argument('--repeat', type=int, default=3, help='Repeticiones (se reporta la mediana)')
+        parser.add_argument('--seed', type=int, default=42, help='Semilla del generador aleatorio')
+
+    def handle(self, *args, **options):
+        filas = options['rows']
+        sembrar_solicitudes(filas, rng=random.Random(options['seed']), salida=self.stdout)
+        catalogos.precargar()
+        base = SolicitudViewSet().get_queryset().filter(descripcion__startswith=BENCH_PREFIJO).order_by(
+            '-fecha_creacion', '-codigo_solicitud'
+        )[:filas]
+
+        def con_serializer():
+            return SolicitudSerializer(base, many=True).data
+
+        def con_lectura(campos):
+            lectura = LecturaSolicitud(campos)
+            return lambda: lectura.representar(lectura.queryset(base))
+
+        # Con todo expandido la lectura ligera debe dar exactamente lo mismo que el serializer
+        completa = con_lectura(list(CAMPOS))
+        render = JSONRenderer().render
+        if render(con_serializer()[:200]) != render(completa()[:200]):
+            raise CommandError('La lectura ligera no coincide con SolicitudSerializer')
+
+        variantes = [
+            ('SolicitudSerializer', con_serializer),
+            ('Todo expandido (?expand=)', completa),
+            ('Campos planos', con_lectura(list(PLANOS))),
+            (f'Tabla (?fields= {len(CAMPOS_TABLA)} campos)', con_lectura(CAMPOS_TABLA)),
+        ]
+        self.stdout.write(f'\n{filas} solicitudes (consulta + armado de las filas, sin render JSON)\n')
+        self.stdout.write(f'{"Variante":<32}{"ms":>10}{"filas/s":>12}')
+        referencia = None
+        for nombre, funcion in variantes:
+            mediana, _ = medir_ms(funcion, options['repeat'])
+            referencia = referencia or mediana
+            por_segundo = filas / (mediana / 1000) if mediana else 0
+            self.stdout.write(f'{nombre:<32}{mediana:>10.1f}{por_segundo:>12.0f}  x{referencia / mediana:.1f}')
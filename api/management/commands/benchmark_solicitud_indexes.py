@@ -0,0 +1,133 @@
+"""
+Benchmark de los índices compuestos de Solicitud
+
+Siembra solicitudes sintéticas (marcadas con BENCH_PREFIJO en la descripción),
+mide las consultas que hace SolicitudViewSet con y sin los índices de
+`Solicitud.Meta.indexes` y guarda planes (EXPLAIN) y latencias en JSON.
+
+Los índices se quitan y se vuelven a crear con el schema editor, así que
+conviene ejecutarlo contra una base de pruebas (SQLite o MySQL).
+"""
+import json
+import random
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api.benchmarks import BENCH_PREFIJO, limpiar_datos_bench, medir_ms, sembrar_solicitudes
+from api.models import Maquina, Solicitud, Usuario
+
+
+class Command(BaseCommand):
+    help = 'Mide planes y latencias de las consultas de solicitudes con y sin los índices compuestos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Solicitudes sintéticas a sembrar')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Filas por bulk_create')
+        parser.add_argument('--repeat', type=int, default=5, help='Repeticiones por consulta (se reporta la mediana)')
+        parser.add_argument('--seed', type=int, default=42, help='Semilla del generador aleatorio')
+        parser.add_argument('--output', default='benchmark_solicitud_indexes.json', help='Archivo JSON de resultados')
+        parser.add_argument('--cleanup', action='store_true', help='Borrar los datos sintéticos y terminar')
+
+    def handle(self, *args, **options):
+        if options['cleanup']:
+            borradas = limpiar_datos_bench()
+            self.stdout.write(self.style.SUCCESS(f'Datos sintéticos eliminados ({borradas} solicitudes)'))
+            return
+
+        sembrar_solicitudes(
+            options['rows'], options['chunk_size'], random.Random(options['seed']), salida=self.stdout
+        )
+        contexto = self._contexto_consultas()
+        consultas = self._consultas(contexto)
+
+        self.stdout.write(f'Motor: {connection.vendor}, solicitudes: {Solicitud.objects.count()}\n')
+
+        resultados = {nombre: {} for nombre in consultas}
+        with self._sin_indices():
+            self._medir('sin_indices', consultas, resultados, options['repeat'])
+        self._medir('con_indices', consultas, resultados, options['repeat'])
+
+        self._reportar(resultados)
+        with open(options['output'], 'w', encoding='utf-8') as salida:
+            json.dump({
+                'motor': connection.vendor,
+                'solicitudes': Solicitud.objects.count(),
+                'repeticiones': options['repeat'],
+                'consultas': resultados,
+            }, salida, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'\nResultados guardados en {options["output"]}'))
+
+    def _contexto_consultas(self):
+        """Valores concretos para los filtros (un ingeniero, un encargado y una sucursal con datos)"""
+        return {
+            'ingeniero': Usuario.objects.filter(username__startswith='bench_1_').values_list('pk', flat=True).first(),
+            'encargado': Usuario.objects.filter(username__startswith='bench_2_').values_list('pk', flat=True).first(),
+            'sucursal': Maquina.objects.filter(modelo__startswith=BENCH_PREFIJO)
+                        .values_list('codigo_sucursal', flat=True).first(),
+            'maquina': Maquina.objects.filter(modelo__startswith=BENCH_PREFIJO).values_list('pk', flat=True).first(),
+        }
+
+    def _consultas(self, ctx):
+        """Las mismas formas de consulta que SolicitudViewSet (página de 10 + conteo)"""
+        base = Solicitud.objects.select_related(
+            'id_usuario', 'ingeniero_asignado', 'codigo_maquinaria',
+            'codigo_maquinaria__codigo_sucursal', 'codigo_estado',
+        )
+        return {
+            'listado': base.all(),
+            'pendientes': base.filter(codigo_estado=1),
+            'en_curso_ingeniero': base.filter(ingeniero_asignado=ctx['ingeniero'], codigo_estado=2),
+            'por_usuario': base.filter(id_usuario=ctx['encargado']),
+            'por_maquina': base.filter(codigo_maquinaria=ctx['maquina']),
+            'por_encargados': base.filter(id_usuario__codigo_tipo_usuario=2),
+            'por_sucursal': base.filter(codigo_sucursal=ctx['sucursal']),
+        }
+
+    @contextmanager
+    def _sin_indices(self):
+        indices = [(Solicitud, indice) for indice in Solicitud._meta.indexes]
+        indices += [(Usuario, indice) for indice in Usuario._meta.indexes]
+        with connection.schema_editor() as editor:
+            for modelo, indice in indices:
+                editor.remove_index(modelo, indice)
+        self._analizar()
+        try:
+            yield
+        finally:
+            with connection.schema_editor() as editor:
+                for modelo, indice in indices:
+                    editor.add_index(modelo, indice)
+            self._analizar()
+
+    def _analizar(self):
+        """Actualiza las estadísticas del optimizador tras crear/borrar índices"""
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute('ANALYZE')
+            elif connection.vendor == 'mysql':
+                cursor.execute(f'ANALYZE TABLE {Solicitud._meta.db_table}, {Usuario._meta.db_table}')
+                cursor.fetchall()
+
+    def _medir(self, etiqueta, consultas, resultados, repeticiones):
+        for nombre, queryset in consultas.items():
+            # Querysets nuevos en cada vuelta: el caché de resultados de Django no debe intervenir
+            def pagina():
+                queryset.all().count()
+                list(queryset.all()[:10])
+
+            mediana, minimo = medir_ms(pagina, repeticiones)
+            resultados[nombre][etiqueta] = {
+                'ms_mediana': round(mediana, 3),
+                'ms_min': round(minimo, 3),
+                'plan': queryset[:10].explain(),
+            }
+
+    def _reportar(self, resultados):
+        self.stdout.write(f'{"Consulta":<22}{"Sin índices (ms)":>18}{"Con índices (ms)":>18}{"Mejora":>10}')
+        for nombre, medidas in resultados.items():
+            antes = medidas['sin_indices']['ms_mediana']
+            despues = medidas['con_indices']['ms_mediana']
+            mejora = f'x{antes / despues:.1f}' if despues else '-'
+            self.stdout.write(f'{nombre:<22}{antes:>18.2f}{despues:>18.2f}{mejora:>10}')
@@ -0,0 +1,53 @@
+"""
+Verifica que Solicitud.codigo_sucursal coincida con la sucursal de su máquina
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F, OuterRef, Q, Subquery
+
+from api.models import Maquina, Solicitud
+
+LOTE = 1000
+
+
+def solicitudes_inconsistentes():
+    """Solicitudes cuya sucursal denormalizada no es la de su máquina"""
+    return Solicitud.objects.filter(
+        Q(codigo_sucursal__isnull=True) | ~Q(codigo_sucursal=F('codigo_maquinaria__codigo_sucursal'))
+    )
+
+
+class Command(BaseCommand):
+    help = 'Detecta (y con --fix corrige) solicitudes cuya sucursal no coincide con la de su máquina'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Corregir las filas inconsistentes')
+        parser.add_argument('--show', type=int, default=10, help='Cantidad de ejemplos a listar')
+
+    def handle(self, *args, **options):
+        inconsistentes = solicitudes_inconsistentes()
+        total = inconsistentes.count()
+        if not total:
+            self.stdout.write(self.style.SUCCESS('Todas las solicitudes tienen la sucursal de su máquina'))
+            return
+
+        self.stdout.write(self.style.WARNING(f'{total} solicitudes con sucursal inconsistente'))
+        ejemplos = inconsistentes.values_list(
+            'codigo_solicitud', 'codigo_sucursal', 'codigo_maquinaria__codigo_sucursal'
+        )[:options['show']]
+        for codigo, actual, esperada in ejemplos:
+            self.stdout.write(f'  Solicitud #{codigo}: sucursal {actual}, máquina en sucursal {esperada}')
+
+        if not options['fix']:
+            raise CommandError('Ejecuta con --fix para corregirlas')
+
+        # ids materializados: MySQL no permite subconsultar la misma tabla que se actualiza
+        ids = list(inconsistentes.values_list('pk', flat=True))
+        sucursal_de_maquina = Subquery(
+            Maquina.objects.filter(pk=OuterRef('codigo_maquinaria')).values('codigo_sucursal')[:1]
+        )
+        corregidas = 0
+        for inicio in range(0, len(ids), LOTE):
+            corregidas += Solicitud.objects.filter(pk__in=ids[inicio:inicio + LOTE]).update(
+                codigo_sucursal=sucursal_de_maquina
+            )
+        self.stdout.write(self.style.SUCCESS(f'{corregidas} solicitudes corregidas'))
@@ -0,0 +1,42 @@
+"""
+Elimina los PDFs de informes que ya no referencia ningún informe
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from api.utils import estadisticas_cache_pdf, limpiar_pdfs_huerfanos
+
+
+class Command(BaseCommand):
+    help = 'Elimina de media/informes/ los PDFs huérfanos (sin informe que los referencie)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=10,
+            help='Antigüedad mínima en minutos para eliminar un archivo (default: 10)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo listar los archivos que se eliminarían',
+        )
+
+    def handle(self, *args, **options):
+        eliminados = limpiar_pdfs_huerfanos(
+            antiguedad_minima=timedelta(minutes=options['min_age']),
+            dry_run=options['dry_run'],
+        )
+
+        accion = 'Se eliminarían' if options['dry_run'] else 'Eliminados'
+        for nombre in eliminados:
+            self.stdout.write(f'  {nombre}')
+        self.stdout.write(self.style.SUCCESS(f'✓ {accion} {len(eliminados)} PDFs huérfanos'))
+
+        stats = estadisticas_cache_pdf()
+        self.stdout.write(
+            f"Caché de PDFs: {stats['hits']} hits / {stats['misses']} misses, "
+            f"~{stats['render_ms_ahorrado_estimado']} ms de render ahorrados"
+        )
@@ -0,0 +1,53 @@
+"""
+Genera datos sintéticos a escala para pruebas de carga (ver api/generators.py)
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from api.generators import ORDEN_FIXTURES, generar_datos
+
+
+class Command(BaseCommand):
+    help = 'Genera sucursales, máquinas, usuarios, solicitudes e informes sintéticos con bulk_create'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sucursales', type=int, default=10, help='Sucursales a crear')
+        parser.add_argument('--maquinas', type=int, default=500, help='Máquinas a crear')
+        parser.add_argument('--usuarios', type=int, default=200, help='Usuarios a crear (ingenieros + encargados)')
+        parser.add_argument('--solicitudes', type=int, default=100_000, help='Solicitudes a crear')
+        parser.add_argument('--dias', type=int, default=730, help='Antigüedad máxima de las solicitudes')
+        parser.add_argument('--ratio-ingenieros', type=float, default=0.3, help='Fracción de usuarios ingenieros')
+        parser.add_argument('--ratio-informes', type=float, default=0.9,
+                            help='Fracción de solicitudes completadas con informe')
+        parser.add_argument('--password', help='Contraseña de los usuarios (por defecto no pueden iniciar sesión)')
+        parser.add_argument('--seed', type=int, default=42, help='Semilla del generador aleatorio')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Filas por bulk_create')
+        parser.add_argument('--fixtures', metavar='DIR', help='Además, escribir fixtures JSONL en DIR')
+
+    def handle(self, *args, **options):
+        if min(options['sucursales'], options['maquinas']) < 1 or options['usuarios'] < 2:
+            raise CommandError('Se necesita al menos 1 sucursal, 1 máquina y 2 usuarios')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size debe ser mayor que 0')
+
+        resumen = generar_datos(
+            sucursales=options['sucursales'],
+            maquinas=options['maquinas'],
+            usuarios=options['usuarios'],
+            solicitudes=options['solicitudes'],
+            seed=options['seed'],
+            chunk=options['chunk_size'],
+            dias=options['dias'],
+            proporcion_informes=options['ratio_informes'],
+            proporcion_ingenieros=options['ratio_ingenieros'],
+            password=options['password'],
+            directorio_fixtures=options['fixtures'],
+            salida=self.stdout,
+        )
+
+        self.stdout.write(self.style.SUCCESS('Datos generados:'))
+        for nombre, cantidad in resumen.items():
+            self.stdout.write(f'  • {cantidad} {nombre}')
+        if options['fixtures']:
+            archivos = ' '.join(f'{options["fixtures"]}/{nombre}.jsonl' for nombre in ORDEN_FIXTURES)
+            self.stdout.write(f'\nFixtures en {options["fixtures"]}; para cargarlos en otra base:')
+            self.stdout.write(f'  python manage.py loaddata {archivos}')
@@ -0,0 +1,95 @@
+"""
+Worker que vacía la bandeja de salida de correos
+"""
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from api.notifications import agrupar_notificaciones
+from api.outbox import cupo_por_minuto, enviar_correos, reclamar_correos
+
+
+class Command(BaseCommand):
+    help = 'Envía los correos encolados reutilizando una conexión SMTP, por lotes y con límite por minuto'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.EMAIL_QUEUE_BATCH_SIZE,
+            help='Correos reclamados por lote',
+        )
+        parser.add_argument(
+            '--rate-limit',
+            type=int,
+            default=settings.EMAIL_RATE_LIMIT_PER_MINUTE,
+            help='Máximo de correos por minuto entre todos los workers (0 = sin límite)',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=settings.EMAIL_QUEUE_POLL_INTERVAL,
+            help='Segundos de espera cuando la cola está vacía o se alcanzó el límite',
+        )
+        parser.add_argument(
+            '--digest-window',
+            type=int,
+            default=settings.NOTIFICATION_DIGEST_WINDOW,
+            help='Segundos que se acumulan las notificaciones de cada destinatario antes de enviar el resumen',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Enviar lo disponible (dentro del límite) y terminar',
+        )
+
+    def handle(self, *args, **options):
+        lote = max(1, options['batch_size'])
+        limite = options['rate_limit']
+        espera = options['poll_interval']
+        ventana = options['digest_window']
+        enviados = fallidos = 0
+        eventos_agrupados = resumenes = 0
+
+        self.stdout.write(f'Procesando bandeja de salida (lote={lote}, límite/min={limite or "sin límite"})...')
+
+        # Una sola conexión para todo el worker; se cierra cuando la cola queda inactiva
+        connection = get_connection(fail_silently=False)
+        abierta = False
+        try:
+            while True:
+                eventos, correos = agrupar_notificaciones(ventana)
+                if eventos:
+                    eventos_agrupados += eventos
+                    resumenes += correos
+                    self.stdout.write(f'{eventos} notificaciones agrupadas en {correos} correos')
+
+                cupo = cupo_por_minuto(limite)
+                ids = reclamar_correos(lote if cupo is None else min(lote, cupo))
+
+                if not ids:
+                    if abierta:
+                        connection.close()
+                        abierta = False
+                    if options['once']:
+                        break
+                    time.sleep(espera)
+                    continue
+
+                abierta = True
+                ok, error = enviar_correos(ids, connection)
+                enviados += ok
+                fallidos += error
+                self.stdout.write(f'Lote de {len(ids)}: {ok} enviados, {error} con error')
+        except KeyboardInterrupt:
+            self.stdout.write('\nDeteniendo worker de correos...')
+        finally:
+            if abierta:
+                connection.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Correos enviados: {enviados}, con error: {fallidos} '
+            f'(notificaciones: {eventos_agrupados} eventos en {resumenes} correos)'
+        ))
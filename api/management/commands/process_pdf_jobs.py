@@ -0,0 +1,90 @@
+"""
+Worker que procesa la cola de generación de PDFs de informes
+"""
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Este módulo se importa en los procesos hijos antes de django.setup(),
+# por eso los modelos se importan dentro de las funciones.
+
+
+def _inicializar_proceso():
+    """Cada proceso del pool arranca su propio Django (contexto spawn)"""
+    import django
+    django.setup()
+
+
+def _procesar_tarea(tarea_id):
+    from api.jobs import ejecutar_tarea
+    return tarea_id, ejecutar_tarea(tarea_id)
+
+
+class Command(BaseCommand):
+    help = 'Procesa la cola de generación de PDFs de informes con un pool de procesos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=settings.PDF_WORKER_CONCURRENCY,
+            help='Cantidad máxima de PDFs generándose en paralelo',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=settings.PDF_WORKER_POLL_INTERVAL,
+            help='Segundos de espera cuando la cola está vacía',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Procesar las tareas disponibles y terminar',
+        )
+
+    def handle(self, *args, **options):
+        from api.jobs import reclamar_tareas
+
+        concurrencia = max(1, options['concurrency'])
+        espera = options['poll_interval']
+        completadas = fallidas = 0
+
+        self.stdout.write(f'Procesando tareas PDF (concurrencia={concurrencia})...')
+
+        # spawn: los procesos hijos no heredan las conexiones a la base del padre
+        contexto = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(
+            max_workers=concurrencia,
+            mp_context=contexto,
+            initializer=_inicializar_proceso,
+        ) as pool:
+            en_curso = set()
+            try:
+                while True:
+                    libres = concurrencia - len(en_curso)
+                    if libres > 0:
+                        for tarea_id in reclamar_tareas(libres):
+                            en_curso.add(pool.submit(_procesar_tarea, tarea_id))
+
+                    if not en_curso:
+                        if options['once']:
+                            break
+                        time.sleep(espera)
+                        continue
+
+                    hechas, en_curso = wait(en_curso, timeout=espera, return_when=FIRST_COMPLETED)
+                    for futuro in hechas:
+                        tarea_id, ok = futuro.result()
+                        if ok:
+                            completadas += 1
+                            self.stdout.write(self.style.SUCCESS(f'✓ Tarea #{tarea_id} completada'))
+                        else:
+                            fallidas += 1
+                            self.stdout.write(self.style.WARNING(f'✗ Tarea #{tarea_id} falló'))
+            except KeyboardInterrupt:
+                self.stdout.write('\nDeteniendo worker, esperando tareas en curso...')
+
+        self.stdout.write(f'Tareas completadas: {completadas}, fallidas: {fallidas}')
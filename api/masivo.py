@@ -0,0 +1,130 @@
+"""
+Cambios de estado y asignación de ingeniero sobre muchas solicitudes a la vez
+
+Aplican las mismas reglas que las acciones individuales de SolicitudViewSet,
+pero en una transacción: una lectura de las filas (bloqueadas con
+SELECT ... FOR UPDATE donde el motor lo soporta), un único
+UPDATE ... WHERE codigo_solicitud IN (...) y el historial, el resumen diario y
+la invalidación de cachés en bloque, porque `update()` no dispara señales.
+Cada id recibe su propio resultado: {'codigo_solicitud', 'ok', 'error'?}.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from .caching import invalidar
+from .models import Solicitud, TransicionEstado
+from .outbox import encolar_correos
+from .rollup import registrar_transiciones
+
+NO_ENCONTRADA = 'Solicitud no encontrada'
+
+
+def ids_validos(valor, maximo):
+    """Lista de ids enteros sin repetir, o ValueError con el motivo"""
+    if not isinstance(valor, list) or not valor:
+        raise ValueError('ids debe ser una lista no vacía de códigos de solicitud')
+    if len(valor) > maximo:
+        raise ValueError(f'Máximo {maximo} solicitudes por operación')
+    try:
+        return list(dict.fromkeys(int(pk) for pk in valor))
+    except (TypeError, ValueError):
+        raise ValueError('ids debe contener solo números enteros')
+
+
+def _resultado(pk, error=None):
+    if error:
+        return {'codigo_solicitud': pk, 'ok': False, 'error': error}
+    return {'codigo_solicitud': pk, 'ok': True}
+
+
+def cambiar_estado(ids, nuevo_estado, usuario, solo_asignadas=False):
+    """
+    Lleva las solicitudes `ids` a `nuevo_estado` (un Estado)
+
+    Con `solo_asignadas` (ingenieros) se rechazan las que no están asignadas a
+    `usuario` y los retrocesos de estado. Retorna (resultados, actualizadas).
+    """
+    with transaction.atomic():
+        filas = {
+            fila['codigo_solicitud']: fila
+            for fila in Solicitud.objects.select_for_update().filter(pk__in=ids).values(
+                'codigo_solicitud', 'codigo_estado', 'ingeniero_asignado', 'codigo_sucursal', 'fecha_creacion',
+            )
+        }
+        resultados, cambian = [], []
+        for pk in ids:
+            fila = filas.get(pk)
+            if fila is None:
+                resultados.append(_resultado(pk, NO_ENCONTRADA))
+            elif solo_asignadas and fila['ingeniero_asignado'] != usuario.pk:
+                resultados.append(_resultado(pk, 'Solo puedes cambiar el estado de solicitudes asignadas a ti'))
+            elif solo_asignadas and nuevo_estado.pk < fila['codigo_estado']:
+                resultados.append(_resultado(pk, 'No puedes retroceder el estado de una solicitud'))
+            else:
+                resultados.append(_resultado(pk))
+                if fila['codigo_estado'] != nuevo_estado.pk:
+                    cambian.append(fila)
+
+        if cambian:
+            ahora = timezone.now()
+            Solicitud.objects.filter(pk__in=[fila['codigo_solicitud'] for fila in cambian]).update(
+                codigo_estado=nuevo_estado, fecha_actualizacion=ahora,
+            )
+            transiciones = TransicionEstado.objects.bulk_create([
+                TransicionEstado(
+                    solicitud_id=fila['codigo_solicitud'],
+                    estado_anterior_id=fila['codigo_estado'],
+                    estado_nuevo_id=nuevo_estado.pk,
+                    codigo_sucursal_id=fila['codigo_sucursal'],
+                    ingeniero_asignado_id=fila['ingeniero_asignado'],
+                    usuario_id=usuario.pk,
+                    fecha=ahora,
+                )
+                for fila in cambian
+            ])
+            registrar_transiciones(
+                transiciones, {fila['codigo_solicitud']: fila['fecha_creacion'] for fila in cambian}
+            )
+            invalidar('solicitudes')
+            _notificar_creadores([fila['codigo_solicitud'] for fila in cambian], nuevo_estado, ahora)
+    return resultados, len(cambian)
+
+
+def asignar_ingeniero(ids, ingeniero):
+    """Asigna `ingeniero` a las solicitudes `ids`. Retorna (resultados, actualizadas)"""
+    with transaction.atomic():
+        asignados = dict(
+            Solicitud.objects.select_for_update().filter(pk__in=ids).values_list(
+                'codigo_solicitud', 'ingeniero_asignado'
+            )
+        )
+        resultados = [_resultado(pk) if pk in asignados else _resultado(pk, NO_ENCONTRADA) for pk in ids]
+        cambian = [pk for pk, actual in asignados.items() if actual != ingeniero.pk]
+        if cambian:
+            Solicitud.objects.filter(pk__in=cambian).update(
+                ingeniero_asignado=ingeniero, fecha_actualizacion=timezone.now(),
+            )
+            invalidar('solicitudes')
+    return resultados, len(cambian)
+
+
+def _notificar_creadores(ids, nuevo_estado, fecha):
+    """Un correo por creador con todas sus solicitudes que cambiaron de estado"""
+    por_creador = defaultdict(list)
+    solicitudes = Solicitud.objects.filter(pk__in=ids).values_list(
+        'codigo_solicitud', 'id_usuario__correo_electronico',
+        'codigo_maquinaria__marca', 'codigo_maquinaria__modelo',
+    ).order_by('codigo_solicitud')
+    for pk, correo, marca, modelo in solicitudes:
+        por_creador[correo].append(f'  #{pk} - {marca} {modelo}')
+    fecha = timezone.localtime(fecha).strftime('%d/%m/%Y %H:%M')
+    encolar_correos(
+        (
+            f'Cambio de Estado - {len(lineas)} solicitud(es)',
+            f'Las siguientes solicitudes pasaron a {nuevo_estado.nombre_estado} el {fecha}:\n\n' + '\n'.join(lineas),
+            [correo],
+        )
+        for correo, lineas in por_creador.items()
+    )
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.30 on 2026-10-18 00:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def marcar_pdfs_existentes(apps, schema_editor):
+    """Los informes que ya tienen archivo quedan como listos"""
+    Informe = apps.get_model('api', 'Informe')
+    Informe.objects.exclude(archivo_pdf='').exclude(archivo_pdf__isnull=True).update(estado_pdf='ready')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_solicitud_ingeniero_asignado_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='informe',
+            name='estado_pdf',
+            field=models.CharField(choices=[('pending', 'Pendiente'), ('ready', 'Listo'), ('failed', 'Fallido')], default='pending', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='TareaPDF',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(choices=[('pending', 'Pendiente'), ('running', 'En Proceso'), ('done', 'Completada'), ('failed', 'Fallida')], default='pending', max_length=10)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('max_intentos', models.PositiveSmallIntegerField(default=3)),
+                ('disponible_desde', models.DateTimeField(default=django.utils.timezone.now)),
+                ('iniciada_en', models.DateTimeField(blank=True, null=True)),
+                ('ultimo_error', models.TextField(blank=True, default='')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('informe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tareas_pdf', to='api.informe')),
+            ],
+            options={
+                'verbose_name': 'Tarea PDF',
+                'verbose_name_plural': 'Tareas PDF',
+                'db_table': 'tarea_pdf',
+                'ordering': ['disponible_desde'],
+                'indexes': [models.Index(fields=['estado', 'disponible_desde'], name='tarea_pdf_estado_idx')],
+            },
+        ),
+        migrations.RunPython(marcar_pdfs_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 00:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_informe_estado_pdf_tareapdf'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='informe',
+            name='pdf_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-18 00:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_informe_pdf_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CorreoSaliente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('asunto', models.CharField(max_length=255)),
+                ('cuerpo', models.TextField()),
+                ('remitente', models.CharField(blank=True, default='', max_length=254)),
+                ('destinatarios', models.JSONField(default=list)),
+                ('ruta_adjunto', models.CharField(blank=True, default='', max_length=500)),
+                ('estado', models.CharField(choices=[('pending', 'Pendiente'), ('sending', 'Enviando'), ('sent', 'Enviado'), ('failed', 'Fallido')], default='pending', max_length=10)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('max_intentos', models.PositiveSmallIntegerField(default=5)),
+                ('disponible_desde', models.DateTimeField(default=django.utils.timezone.now)),
+                ('iniciado_en', models.DateTimeField(blank=True, null=True)),
+                ('enviado_en', models.DateTimeField(blank=True, null=True)),
+                ('ultimo_error', models.TextField(blank=True, default='')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('informe', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='correos', to='api.informe')),
+            ],
+            options={
+                'verbose_name': 'Correo Saliente',
+                'verbose_name_plural': 'Correos Salientes',
+                'db_table': 'correo_saliente',
+                'ordering': ['disponible_desde'],
+                'indexes': [models.Index(fields=['estado', 'disponible_desde'], name='correo_estado_idx'), models.Index(fields=['estado', 'enviado_en'], name='correo_enviado_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-18 00:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_correosaliente'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoNotificacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('nueva_solicitud', 'Nueva solicitud')], default='nueva_solicitud', max_length=30)),
+                ('destinatario', models.CharField(max_length=254)),
+                ('agrupado_en', models.DateTimeField(blank=True, null=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('correo', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='eventos', to='api.correosaliente')),
+                ('solicitud', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eventos_notificacion', to='api.solicitud')),
+            ],
+            options={
+                'verbose_name': 'Evento de Notificación',
+                'verbose_name_plural': 'Eventos de Notificación',
+                'db_table': 'evento_notificacion',
+                'ordering': ['fecha_creacion'],
+                'indexes': [models.Index(fields=['agrupado_en', 'destinatario', 'fecha_creacion'], name='evento_pendiente_idx')],
+            },
+        ),
+    ]
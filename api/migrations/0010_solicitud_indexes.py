@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-18 00:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_eventonotificacion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=models.Index(fields=['-fecha_creacion'], name='solicitud_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=models.Index(fields=['codigo_estado', '-fecha_creacion'], name='solicitud_estado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=models.Index(fields=['ingeniero_asignado', 'codigo_estado', '-fecha_creacion'], name='solicitud_ing_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=models.Index(fields=['id_usuario', '-fecha_creacion'], name='solicitud_usuario_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=models.Index(fields=['codigo_maquinaria', '-fecha_creacion'], name='solicitud_maquina_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['codigo_tipo_usuario', 'is_active'], name='usuario_tipo_activo_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def copiar_sucursal_de_maquina(apps, schema_editor):
+    """Backfill: un solo UPDATE con subconsulta a maquina"""
+    Solicitud = apps.get_model('api', 'Solicitud')
+    Maquina = apps.get_model('api', 'Maquina')
+    Solicitud.objects.update(
+        codigo_sucursal=models.Subquery(
+            Maquina.objects.filter(pk=models.OuterRef('codigo_maquinaria')).values('codigo_sucursal')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_solicitud_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='solicitud',
+            name='codigo_sucursal',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='solicitudes', to='api.sucursal'),
+        ),
+        migrations.RunPython(copiar_sucursal_de_maquina, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=models.Index(fields=['codigo_sucursal', '-fecha_creacion'], name='solicitud_sucursal_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_solicitud_codigo_sucursal'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='informe',
+            index=models.Index(fields=['-fecha_informe'], name='informe_fecha_idx'),
+        ),
+    ]
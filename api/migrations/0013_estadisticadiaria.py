@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_informe_fecha_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('creadas', models.IntegerField(default=0)),
+                ('completadas', models.IntegerField(default=0)),
+                ('canceladas', models.IntegerField(default=0)),
+                ('segundos_resolucion', models.BigIntegerField(default=0)),
+                ('delta_pendientes', models.IntegerField(default=0)),
+                ('delta_en_proceso', models.IntegerField(default=0)),
+                ('codigo_sucursal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='estadisticas_diarias', to='api.sucursal')),
+            ],
+            options={
+                'verbose_name': 'Estadística Diaria',
+                'verbose_name_plural': 'Estadísticas Diarias',
+                'db_table': 'estadistica_diaria',
+                'indexes': [models.Index(fields=['fecha'], name='estadistica_fecha_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='estadisticadiaria',
+            constraint=models.UniqueConstraint(fields=('codigo_sucursal', 'fecha'), name='estadistica_sucursal_fecha_uniq'),
+        ),
+    ]
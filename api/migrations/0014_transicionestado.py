@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_estadisticadiaria'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransicionEstado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+                ('reconstruida', models.BooleanField(default=False)),
+                ('codigo_sucursal', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.sucursal')),
+                ('estado_anterior', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='api.estado')),
+                ('estado_nuevo', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='api.estado')),
+                ('ingeniero_asignado', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('solicitud', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transiciones', to='api.solicitud')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Transición de Estado',
+                'verbose_name_plural': 'Transiciones de Estado',
+                'db_table': 'transicion_estado',
+                'ordering': ['fecha', 'id'],
+                'indexes': [models.Index(fields=['solicitud', 'fecha'], name='transicion_solicitud_idx'), models.Index(fields=['fecha'], name='transicion_fecha_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_transicionestado'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transicionestado',
+            name='estado_anterior',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.estado'),
+        ),
+        migrations.AlterField(
+            model_name='transicionestado',
+            name='estado_nuevo',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.estado'),
+        ),
+    ]
@@ -0,0 +1,290 @@
+"""
+Mixins compartidos por los ViewSets
+"""
+import hashlib
+import re
+from itertools import islice
+
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from rest_framework.exceptions import ParseError
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer
+
+from . import catalogos
+from .caching import llave_versionada
+from .renderers import a_json
+
+
+class CamposDispersosMixin:
+    """
+    `?fields=a,b` en los GET: solo esos campos del serializer, y solo sus columnas de la base
+
+    El serializer descarta los demás campos y `filter_queryset` pasa la
+    selección al queryset: `.only()` con las columnas que usan los campos
+    pedidos y `select_related` solo de las relaciones que alguno recorre. Las
+    columnas salen del `source` de cada campo (campo del modelo, su `_id`, o
+    `get_<campo>_display`); los campos calculados las declaran en
+    `Meta.campos_modelo` del serializer ({campo: [campos del modelo]}). Si un
+    campo pedido no se puede mapear, el queryset se deja completo.
+    """
+    campos_param = 'fields'
+
+    def campos_pedidos(self):
+        """Campos pedidos con ?fields= (None: todos). ParseError si alguno no existe"""
+        if not hasattr(self, '_campos_pedidos'):
+            self._campos_pedidos = self._leer_campos_pedidos()
+        return self._campos_pedidos
+
+    def _leer_campos_pedidos(self):
+        valor = self.request.query_params.get(self.campos_param) if self.request.method in ('GET', 'HEAD') else None
+        pedidos = [campo.strip() for campo in (valor or '').split(',') if campo.strip()]
+        if not pedidos:
+            return None
+        disponibles = self.get_serializer_class()().fields
+        desconocidos = [campo for campo in pedidos if campo not in disponibles]
+        if desconocidos:
+            raise ParseError({'error': f'Campos no válidos: {", ".join(desconocidos)}'})
+        return set(pedidos)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        pedidos = self.campos_pedidos()
+        if pedidos is not None:
+            destino = getattr(serializer, 'child', serializer)
+            for nombre in [nombre for nombre in destino.fields if nombre not in pedidos]:
+                destino.fields.pop(nombre)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        pedidos = self.campos_pedidos()
+        if pedidos is None:
+            return queryset
+        seleccion = self._seleccion_modelo(queryset.model, pedidos)
+        if seleccion is None:
+            return queryset
+        return podar_queryset(queryset, *seleccion)
+
+    def _seleccion_modelo(self, modelo, pedidos):
+        """(columnas, relaciones recorridas) que usan los campos pedidos, o None si alguno no se puede mapear"""
+        serializer = self.get_serializer_class()()
+        declaradas = getattr(getattr(serializer, 'Meta', None), 'campos_modelo', {})
+        columnas, relaciones = set(), set()
+        for nombre in pedidos:
+            if nombre in declaradas:
+                columnas.update(declaradas[nombre])
+                continue
+            campo = serializer.fields[nombre]
+            if not campo.source_attrs:
+                return None
+            columna = _campo_concreto(modelo, campo.source_attrs[0])
+            if columna is None:
+                return None
+            columnas.add(columna.name)
+            # Un PrimaryKeyRelatedField o el `_id` solo necesitan la columna; un anidado o `rel.x`, el join
+            if columna.is_relation and (len(campo.source_attrs) > 1 or isinstance(campo, BaseSerializer)):
+                relaciones.add(columna.name)
+        return columnas, relaciones
+
+
+def _campo_concreto(modelo, nombre):
+    """Campo concreto detrás de `nombre` (campo, attname o get_<campo>_display), o None"""
+    display = re.fullmatch(r'get_(\w+)_display', nombre)
+    if display:
+        nombre = display.group(1)
+    for campo in modelo._meta.concrete_fields:
+        if nombre in (campo.name, campo.attname):
+            return campo
+    return None
+
+
+def _rutas(arbol, prefijo=''):
+    """Rutas 'a__b' de las hojas del árbol de query.select_related"""
+    for nombre, hijos in arbol.items():
+        ruta = f'{prefijo}{nombre}'
+        if hijos:
+            yield from _rutas(hijos, f'{ruta}__')
+        else:
+            yield ruta
+
+
+def podar_queryset(queryset, columnas, relaciones=()):
+    """
+    `.only()` de `columnas` (más el pk) y `select_related` solo de las rutas que empiezan en `relaciones`
+
+    Las relaciones que se mantienen se siguen trayendo completas con su join.
+    """
+    columnas = set(columnas) | {queryset.model._meta.pk.name}
+    seleccionadas = queryset.query.select_related
+    if isinstance(seleccionadas, dict):
+        rutas = [ruta for ruta in _rutas(seleccionadas) if ruta.split('__')[0] in relaciones]
+        queryset = queryset.select_related(None)
+        if rutas:
+            queryset = queryset.select_related(*rutas)
+    return queryset.only(*columnas)
+
+
+class ListadoMixin:
+    """
+    Camino único para los listados de un ViewSet (list y acciones de colección)
+
+    Aplica filter_queryset y la paginación configurada. Con `?stream=1` la
+    respuesta es un arreglo JSON que se codifica a medida que las filas salen
+    de `.iterator(chunk_size=LIST_STREAM_CHUNK_SIZE)`, sin paginar y sin
+    armar la lista completa en memoria (pensado para exportaciones).
+
+    Una vista puede ofrecer un camino de lectura propio con `get_lectura()`:
+    un objeto con `queryset(qs)` (p. ej. `.values()`) y `representar(filas)`
+    que reemplaza al serializer en páginas y lotes.
+    """
+    stream_param = 'stream'
+
+    def list(self, request, *args, **kwargs):
+        return self.listar(self.get_queryset())
+
+    def listar(self, queryset):
+        queryset = self.filter_queryset(queryset)
+        self.lectura = self.get_lectura()
+        if self.lectura is not None:
+            queryset = self.lectura.queryset(queryset)
+
+        if self.quiere_stream():
+            return self.respuesta_stream(queryset)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.serializar(page))
+
+        return Response(self.serializar(queryset))
+
+    def get_lectura(self):
+        """Camino de lectura alternativo para este listado (None: el serializer de la vista)"""
+        return None
+
+    def serializar(self, filas):
+        if getattr(self, 'lectura', None) is not None:
+            return self.lectura.representar(filas)
+        return self.get_serializer(filas, many=True).data
+
+    def quiere_stream(self):
+        return self.request.query_params.get(self.stream_param, '').lower() in ('1', 'true', 'yes')
+
+    def respuesta_stream(self, queryset):
+        response = StreamingHttpResponse(self._json_por_lotes(queryset), content_type='application/json')
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    def _json_por_lotes(self, queryset):
+        tamano = settings.LIST_STREAM_CHUNK_SIZE
+        filas = queryset.iterator(chunk_size=tamano)
+        separador = b''
+        yield b'['
+        while True:
+            lote = list(islice(filas, tamano))
+            if not lote:
+                break
+            # El lote completo en un solo dumps, sin los corchetes
+            yield separador + a_json(self.serializar(lote))[1:-1]
+            separador = b','
+        yield b']'
+
+
+class RespuestaCacheadaMixin:
+    """
+    Cachea (en CACHES) la respuesta de los GET de las acciones declaradas
+
+    `respuestas_cacheadas = {'list': ('maquinas', 'catalogo:sucursal'), ...}`:
+    cada acción con los grupos de api/caching.py de los que depende; las señales
+    los invalidan al escribir en esos modelos. La llave varía con el rol del
+    usuario (tipo y nivel, o anónimo) y la URL absoluta con sus parámetros
+    ordenados, así que solo deben declararse acciones cuya respuesta dependa
+    únicamente de eso. Se guarda `response.data`, no los bytes: el formato
+    se sigue negociando en cada petición. Un acierto con ETag responde 304 a
+    If-None-Match como la respuesta original.
+
+    El GET se envuelve en `initial()`, después de autenticación y permisos.
+    """
+    respuestas_cacheadas = {}
+    respuestas_cacheadas_timeout = None
+    CABECERAS_CACHEADAS = ('ETag', 'Cache-Control', 'Last-Modified')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        grupos = self.respuestas_cacheadas.get(self.action)
+        if grupos and request.method == 'GET':
+            self.get = self._con_cache_de_respuesta(self.get, grupos)
+
+    def _con_cache_de_respuesta(self, vista, grupos):
+        def envoltura(request, *args, **kwargs):
+            llave = llave_versionada(grupos, self._llave_respuesta(request))
+            guardada = cache.get(llave)
+            if guardada is not None:
+                estado, datos, cabeceras = guardada
+                no_modificado = get_conditional_response(request, etag=cabeceras.get('ETag'))
+                if no_modificado is None:
+                    return Response(datos, status=estado, headers=cabeceras)
+                for nombre, valor in cabeceras.items():
+                    no_modificado[nombre] = valor
+                return no_modificado
+            response = vista(request, *args, **kwargs)
+            if response.status_code == 200 and isinstance(response, Response):
+                cabeceras = {
+                    nombre: response[nombre] for nombre in self.CABECERAS_CACHEADAS if response.has_header(nombre)
+                }
+                timeout = self.respuestas_cacheadas_timeout or settings.RESPONSE_CACHE_TIMEOUT
+                cache.set(llave, (response.status_code, response.data, cabeceras), timeout)
+            return response
+        return envoltura
+
+    def _llave_respuesta(self, request):
+        usuario = request.user
+        if usuario is not None and usuario.is_authenticated:
+            rol = f't{usuario.codigo_tipo_usuario}n{usuario.codigo_nivel_acceso}'
+        else:
+            rol = 'anonimo'
+        parametros = urlencode(sorted(request.query_params.lists()), doseq=True)
+        url = request.build_absolute_uri(request.path)
+        firma = hashlib.sha256(f'{url}?{parametros}'.encode('utf-8')).hexdigest()[:32]
+        return f'respuesta:{self.basename}:{self.action}:{rol}:{firma}'
+
+
+class CatalogoCacheMixin:
+    """
+    ETag y Cache-Control largos para list/retrieve de un catálogo
+
+    El ETag sale de la marca del catálogo (`catalogo`, ver api/catalogos.py),
+    la URL completa y el formato de la respuesta, así que If-None-Match se
+    responde con 304 sin consultar la tabla. Al escribir en el catálogo la
+    marca cambia y los clientes reciben la versión nueva al revalidar.
+    """
+    catalogo = None
+
+    def list(self, request, *args, **kwargs):
+        return self._con_cache(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._con_cache(request, super().retrieve, *args, **kwargs)
+
+    def _con_cache(self, request, vista, *args, **kwargs):
+        etag = self._etag_catalogo(request)
+        no_modificado = get_conditional_response(request, etag=etag)
+        if no_modificado is None:
+            response = vista(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        else:
+            response = no_modificado
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=settings.CATALOG_CACHE_MAX_AGE)
+        return response
+
+    def _etag_catalogo(self, request):
+        firma = hashlib.sha256(
+            f'{catalogos.marca(self.catalogo)}:{request.get_full_path()}:{request.accepted_media_type}'.encode('utf-8')
+        ).hexdigest()
+        return f'"{firma[:32]}"'
@@ -1,6 +1,7 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import EmailValidator
+from django.utils import timezone
 
 
 class Usuario(AbstractUser):
@@ -34,6 +35,10 @@ class Usuario(AbstractUser):
         db_table = 'usuario'
         verbose_name = 'Usuario'
         verbose_name_plural = 'Usuarios'
+        indexes = [
+            # Filtro por rol (id_usuario__codigo_tipo_usuario, listados de ingenieros activos)
+            models.Index(fields=['codigo_tipo_usuario', 'is_active'], name='usuario_tipo_activo_idx'),
+        ]
     
     def __str__(self):
         return f"{self.username} - {self.get_full_name()}"
@@ -142,6 +147,16 @@ class Solicitud(models.Model):
     # Fecha opcional indicada por el usuario (por ejemplo, fecha solicitada/programada)
     fecha_programada = models.DateField(null=True, blank=True)
     codigo_estado = models.ForeignKey(Estado, on_delete=models.SET_DEFAULT, default=1, related_name='solicitudes')
+    # Copia de codigo_maquinaria.codigo_sucursal para filtrar por sucursal sin joins.
+    # La mantienen las señales de api/signals.py; verificar con `manage.py check_solicitud_sucursal`
+    codigo_sucursal = models.ForeignKey(
+        Sucursal,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='solicitudes',
+    )
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_actualizacion = models.DateTimeField(auto_now=True)
     
@@ -150,13 +165,53 @@ class Solicitud(models.Model):
         verbose_name = 'Solicitud'
         verbose_name_plural = 'Solicitudes'
         ordering = ['-fecha_creacion']
+        # Coinciden con los filtros de SolicitudViewSet, siempre ordenados por -fecha_creacion
+        # (ver `manage.py benchmark_solicitud_indexes`)
+        indexes = [
+            models.Index(fields=['-fecha_creacion'], name='solicitud_fecha_idx'),
+            models.Index(fields=['codigo_estado', '-fecha_creacion'], name='solicitud_estado_fecha_idx'),
+            models.Index(
+                fields=['ingeniero_asignado', 'codigo_estado', '-fecha_creacion'],
+                name='solicitud_ing_estado_idx',
+            ),
+            models.Index(fields=['id_usuario', '-fecha_creacion'], name='solicitud_usuario_fecha_idx'),
+            models.Index(fields=['codigo_maquinaria', '-fecha_creacion'], name='solicitud_maquina_fecha_idx'),
+            models.Index(fields=['codigo_sucursal', '-fecha_creacion'], name='solicitud_sucursal_fecha_idx'),
+        ]
     
     def __str__(self):
         return f"Solicitud #{self.codigo_solicitud} - {self.codigo_maquinaria}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Estado con que se leyó, para que las señales detecten transiciones sin releer la fila
+        instancia._estado_cargado = instancia.__dict__.get('codigo_estado_id')
+        return instancia
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        if fields is None or {'codigo_estado', 'codigo_estado_id'} & set(fields):
+            self._estado_cargado = self.codigo_estado_id
+
+    def save(self, *args, **kwargs):
+        # Las señales post_save escriben la transición de estado y el resumen diario:
+        # quedan en la misma transacción que la fila
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
 
 class Informe(models.Model):
     """Informes generados a partir de solicitudes"""
+    PDF_PENDIENTE = 'pending'
+    PDF_LISTO = 'ready'
+    PDF_FALLIDO = 'failed'
+    ESTADO_PDF_CHOICES = [
+        (PDF_PENDIENTE, 'Pendiente'),
+        (PDF_LISTO, 'Listo'),
+        (PDF_FALLIDO, 'Fallido'),
+    ]
+    
     codigo_solicitud = models.OneToOneField(Solicitud, on_delete=models.CASCADE, primary_key=True, related_name='informe')
     codigo_maquinaria = models.ForeignKey(Maquina, on_delete=models.CASCADE, related_name='informes')
     id_usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='informes')
@@ -166,16 +221,234 @@ class Informe(models.Model):
     recomendaciones = models.TextField(null=True, blank=True)
     fecha_informe = models.DateTimeField(auto_now_add=True)
     archivo_pdf = models.FileField(upload_to='informes/', null=True, blank=True)
+    # El PDF se genera en segundo plano (ver TareaPDF y `manage.py process_pdf_jobs`)
+    estado_pdf = models.CharField(max_length=10, choices=ESTADO_PDF_CHOICES, default=PDF_PENDIENTE)
+    # Hash del contenido con el que se generó archivo_pdf (ver utils.calcular_hash_informe)
+    pdf_hash = models.CharField(max_length=64, blank=True, default='')
     
     class Meta:
         db_table = 'informe'
         verbose_name = 'Informe'
         verbose_name_plural = 'Informes'
+        indexes = [
+            # Paginación por cursor sobre (fecha_informe, codigo_solicitud)
+            models.Index(fields=['-fecha_informe'], name='informe_fecha_idx'),
+        ]
     
     def __str__(self):
         return f"Informe - Solicitud #{self.codigo_solicitud.codigo_solicitud}"
 
 
+class TareaPDF(models.Model):
+    """
+    Cola de generación de PDFs de informes
+    
+    Las tareas se crean al registrar un informe y las procesa el worker
+    `manage.py process_pdf_jobs`, con reintentos y espera exponencial.
+    """
+    PENDIENTE = 'pending'
+    EN_PROCESO = 'running'
+    COMPLETADA = 'done'
+    FALLIDA = 'failed'
+    ESTADO_CHOICES = [
+        (PENDIENTE, 'Pendiente'),
+        (EN_PROCESO, 'En Proceso'),
+        (COMPLETADA, 'Completada'),
+        (FALLIDA, 'Fallida'),
+    ]
+    
+    informe = models.ForeignKey(Informe, on_delete=models.CASCADE, related_name='tareas_pdf')
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default=PENDIENTE)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    max_intentos = models.PositiveSmallIntegerField(default=3)
+    disponible_desde = models.DateTimeField(default=timezone.now)
+    iniciada_en = models.DateTimeField(null=True, blank=True)
+    ultimo_error = models.TextField(blank=True, default='')
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'tarea_pdf'
+        verbose_name = 'Tarea PDF'
+        verbose_name_plural = 'Tareas PDF'
+        ordering = ['disponible_desde']
+        indexes = [
+            models.Index(fields=['estado', 'disponible_desde'], name='tarea_pdf_estado_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Tarea PDF #{self.pk} - Informe #{self.informe_id} ({self.estado})"
+
+
+class CorreoSaliente(models.Model):
+    """
+    Bandeja de salida de correos
+
+    Los requests solo encolan; el worker `manage.py process_email_queue`
+    los envía reutilizando la conexión SMTP, por lotes y con límite por minuto.
+    """
+    PENDIENTE = 'pending'
+    ENVIANDO = 'sending'
+    ENVIADO = 'sent'
+    FALLIDO = 'failed'
+    ESTADO_CHOICES = [
+        (PENDIENTE, 'Pendiente'),
+        (ENVIANDO, 'Enviando'),
+        (ENVIADO, 'Enviado'),
+        (FALLIDO, 'Fallido'),
+    ]
+
+    asunto = models.CharField(max_length=255)
+    cuerpo = models.TextField()
+    remitente = models.CharField(max_length=254, blank=True, default='')
+    destinatarios = models.JSONField(default=list)
+    # El PDF del informe se adjunta al enviar (el archivo vigente en ese momento)
+    informe = models.ForeignKey(
+        Informe, on_delete=models.SET_NULL, null=True, blank=True, related_name='correos'
+    )
+    ruta_adjunto = models.CharField(max_length=500, blank=True, default='')
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default=PENDIENTE)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    max_intentos = models.PositiveSmallIntegerField(default=5)
+    disponible_desde = models.DateTimeField(default=timezone.now)
+    iniciado_en = models.DateTimeField(null=True, blank=True)
+    enviado_en = models.DateTimeField(null=True, blank=True)
+    ultimo_error = models.TextField(blank=True, default='')
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'correo_saliente'
+        verbose_name = 'Correo Saliente'
+        verbose_name_plural = 'Correos Salientes'
+        ordering = ['disponible_desde']
+        indexes = [
+            models.Index(fields=['estado', 'disponible_desde'], name='correo_estado_idx'),
+            models.Index(fields=['estado', 'enviado_en'], name='correo_enviado_idx'),
+        ]
+
+    def __str__(self):
+        return f"Correo #{self.pk} - {self.asunto} ({self.estado})"
+
+
+class EventoNotificacion(models.Model):
+    """
+    Evento a notificar a un destinatario, pendiente de agruparse en un resumen
+
+    Cada evento se replica por destinatario; el worker de correos junta los
+    eventos de una misma persona durante NOTIFICATION_DIGEST_WINDOW y encola
+    un único correo con todos ellos.
+    """
+    NUEVA_SOLICITUD = 'nueva_solicitud'
+    TIPO_CHOICES = [
+        (NUEVA_SOLICITUD, 'Nueva solicitud'),
+    ]
+
+    tipo = models.CharField(max_length=30, choices=TIPO_CHOICES, default=NUEVA_SOLICITUD)
+    destinatario = models.CharField(max_length=254)
+    solicitud = models.ForeignKey(Solicitud, on_delete=models.CASCADE, related_name='eventos_notificacion')
+    # Correo resumen en el que se incluyó; null mientras está pendiente
+    correo = models.ForeignKey(
+        CorreoSaliente, on_delete=models.SET_NULL, null=True, blank=True, related_name='eventos'
+    )
+    agrupado_en = models.DateTimeField(null=True, blank=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'evento_notificacion'
+        verbose_name = 'Evento de Notificación'
+        verbose_name_plural = 'Eventos de Notificación'
+        ordering = ['fecha_creacion']
+        indexes = [
+            models.Index(fields=['agrupado_en', 'destinatario', 'fecha_creacion'], name='evento_pendiente_idx'),
+        ]
+
+    def __str__(self):
+        return f"Evento {self.tipo} #{self.solicitud_id} → {self.destinatario}"
+
+
+class EstadisticaDiaria(models.Model):
+    """
+    Resumen diario de solicitudes por sucursal
+
+    Lo mantienen las señales de api/signals.py al guardar/borrar solicitudes y
+    se recalcula por rango con `manage.py rebuild_daily_stats`. Los delta_*
+    son el cambio neto del día en solicitudes pendientes/en proceso: el backlog
+    de un día se obtiene restando al conteo actual los deltas posteriores.
+    """
+    fecha = models.DateField()
+    codigo_sucursal = models.ForeignKey(Sucursal, on_delete=models.CASCADE, related_name='estadisticas_diarias')
+    creadas = models.IntegerField(default=0)
+    completadas = models.IntegerField(default=0)
+    canceladas = models.IntegerField(default=0)
+    # Suma de (completada - creada) de las completadas ese día
+    segundos_resolucion = models.BigIntegerField(default=0)
+    delta_pendientes = models.IntegerField(default=0)
+    delta_en_proceso = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'estadistica_diaria'
+        verbose_name = 'Estadística Diaria'
+        verbose_name_plural = 'Estadísticas Diarias'
+        constraints = [
+            models.UniqueConstraint(fields=['codigo_sucursal', 'fecha'], name='estadistica_sucursal_fecha_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['fecha'], name='estadistica_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} - Sucursal {self.codigo_sucursal_id}"
+
+
+class TransicionEstado(models.Model):
+    """
+    Historial de cambios de estado de las solicitudes (solo se agregan filas)
+
+    Lo escribe la señal post_save de Solicitud en la misma transacción que el
+    cambio; la fila con estado_anterior nulo es la creación (o un estado que
+    después se borró del catálogo, igual que un estado_nuevo nulo). La sucursal y el
+    ingeniero se copian al momento del cambio para agrupar sin joins. Las filas
+    `reconstruida` las infiere `manage.py backfill_state_transitions` para
+    solicitudes anteriores al historial.
+    """
+    solicitud = models.ForeignKey(Solicitud, on_delete=models.CASCADE, related_name='transiciones')
+    # SET_NULL: borrar un estado del catálogo no debe quedar bloqueado por el historial
+    estado_anterior = models.ForeignKey(
+        Estado, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    estado_nuevo = models.ForeignKey(Estado, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    codigo_sucursal = models.ForeignKey(
+        Sucursal, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    ingeniero_asignado = models.ForeignKey(
+        Usuario, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    # Quién hizo el cambio (null si no se conoce, p. ej. desde el shell)
+    usuario = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    fecha = models.DateTimeField(default=timezone.now)
+    reconstruida = models.BooleanField(default=False)
+
+    class Meta:
+        db_table = 'transicion_estado'
+        verbose_name = 'Transición de Estado'
+        verbose_name_plural = 'Transiciones de Estado'
+        ordering = ['fecha', 'id']
+        indexes = [
+            # Historial de una solicitud (y el LEAD de tiempos_en_estado, particionado por solicitud)
+            models.Index(fields=['solicitud', 'fecha'], name='transicion_solicitud_idx'),
+            models.Index(fields=['fecha'], name='transicion_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"Solicitud #{self.solicitud_id}: {self.estado_anterior_id} → {self.estado_nuevo_id}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Las transiciones de estado no se modifican')
+        super().save(*args, **kwargs)
+
+
 # Modelo legacy para compatibilidad
 class Task(models.Model):
     title = models.CharField(max_length=200)
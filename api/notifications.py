@@ -0,0 +1,117 @@
+"""
+Notificaciones de nuevas solicitudes: fan-out por destinatario y resúmenes
+
+Crear una solicitud solo registra un EventoNotificacion por ingeniero activo.
+El worker de correos llama a `agrupar_notificaciones`, que junta los eventos
+de cada destinatario cuando el más antiguo cumple la ventana configurada y
+encola un único correo por persona en la bandeja de salida.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import EventoNotificacion, Usuario
+from .outbox import encolar_correo
+
+logger = logging.getLogger(__name__)
+
+
+def registrar_nueva_solicitud(solicitud):
+    """Crea un evento por cada ingeniero activo con correo. Retorna cuántos"""
+    destinatarios = list(
+        Usuario.objects.filter(codigo_tipo_usuario=1, is_active=True)  # Ingenieros
+        .exclude(correo_electronico='')
+        .values_list('correo_electronico', flat=True)
+        .distinct()
+    )
+    EventoNotificacion.objects.bulk_create([
+        EventoNotificacion(
+            tipo=EventoNotificacion.NUEVA_SOLICITUD,
+            destinatario=destinatario,
+            solicitud=solicitud,
+        )
+        for destinatario in destinatarios
+    ])
+    return len(destinatarios)
+
+
+def agrupar_notificaciones(ventana=None, ahora=None):
+    """
+    Encola un correo resumen por destinatario cuya ventana ya cerró
+
+    La ventana empieza con el evento pendiente más antiguo de cada
+    destinatario; con `ventana` = 0 se agrupa todo lo pendiente.
+    Retorna (eventos agrupados, correos encolados).
+    """
+    ventana = settings.NOTIFICATION_DIGEST_WINDOW if ventana is None else ventana
+    ahora = ahora or timezone.now()
+    pendientes = EventoNotificacion.objects.filter(agrupado_en__isnull=True)
+
+    listos = list(
+        pendientes.values('destinatario')
+        .annotate(primero=Min('fecha_creacion'))
+        .filter(primero__lte=ahora - timedelta(seconds=ventana))
+        .values_list('destinatario', flat=True)
+    )
+
+    total_eventos = total_correos = 0
+    for destinatario in listos:
+        with transaction.atomic():
+            # skip_locked: si otro worker está agrupando al mismo destinatario, se lo deja
+            eventos = list(
+                pendientes.select_for_update(skip_locked=True, of=('self',))
+                .filter(destinatario=destinatario)
+                .select_related(
+                    'solicitud',
+                    'solicitud__codigo_maquinaria',
+                    'solicitud__id_usuario',
+                    'solicitud__codigo_estado',
+                )
+                .order_by('fecha_creacion')
+            )
+            if not eventos:
+                continue
+
+            asunto, cuerpo = _componer_resumen([evento.solicitud for evento in eventos])
+            correo = encolar_correo(asunto, cuerpo, [destinatario])
+            EventoNotificacion.objects.filter(pk__in=[evento.pk for evento in eventos]).update(
+                correo=correo, agrupado_en=ahora
+            )
+        total_eventos += len(eventos)
+        total_correos += 1
+
+    if total_eventos:
+        logger.info(f"Notificaciones: {total_eventos} eventos agrupados en {total_correos} correos")
+    return total_eventos, total_correos
+
+
+def _componer_resumen(solicitudes):
+    """(asunto, cuerpo) del correo para una o varias solicitudes nuevas"""
+    if len(solicitudes) == 1:
+        solicitud = solicitudes[0]
+        asunto = f'Nueva Solicitud #{solicitud.codigo_solicitud}'
+        cuerpo = f"Se ha creado una nueva solicitud de mantenimiento.\n\n{_detalle_solicitud(solicitud)}\n"
+        return asunto, cuerpo
+
+    asunto = f'{len(solicitudes)} nuevas solicitudes de mantenimiento'
+    detalles = '\n\n'.join(_detalle_solicitud(solicitud) for solicitud in solicitudes)
+    cuerpo = f"""Se han creado {len(solicitudes)} nuevas solicitudes de mantenimiento.
+
+{detalles}
+"""
+    return asunto, cuerpo
+
+
+def _detalle_solicitud(solicitud):
+    return (
+        f"Solicitud: #{solicitud.codigo_solicitud}\n"
+        f"Máquina: {solicitud.codigo_maquinaria.marca} {solicitud.codigo_maquinaria.modelo}\n"
+        f"Usuario: {solicitud.id_usuario.get_full_name()}\n"
+        f"Descripción: {solicitud.descripcion}\n"
+        f"Estado: {solicitud.codigo_estado.nombre_estado}\n"
+        f"Fecha: {solicitud.fecha_creacion.strftime('%d/%m/%Y %H:%M')}"
+    )
@@ -0,0 +1,197 @@
+"""
+Bandeja de salida de correos
+
+Las vistas solo encolan (`encolar_correo`); el worker
+`manage.py process_email_queue` reclama lotes y los envía por una única
+conexión SMTP reutilizada, respetando un límite de correos por minuto.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import CorreoSaliente
+from .utils import generar_pdf_informe
+
+logger = logging.getLogger(__name__)
+
+
+def encolar_correo(asunto, cuerpo, destinatarios, informe=None, ruta_adjunto='', remitente=None):
+    """
+    Guarda el correo en la bandeja de salida y lo retorna
+
+    Retorna None si no queda ningún destinatario válido.
+    """
+    destinatarios = [d for d in dict.fromkeys(destinatarios) if d]
+    if not destinatarios:
+        return None
+    return CorreoSaliente.objects.create(
+        asunto=asunto,
+        cuerpo=cuerpo,
+        remitente=remitente or settings.DEFAULT_FROM_EMAIL,
+        destinatarios=destinatarios,
+        informe=informe,
+        ruta_adjunto=ruta_adjunto or '',
+        max_intentos=settings.EMAIL_QUEUE_MAX_RETRIES,
+    )
+
+
+def encolar_correos(mensajes):
+    """
+    Encola varios correos (asunto, cuerpo, destinatarios) con un solo INSERT
+
+    Para operaciones masivas; retorna los CorreoSaliente creados.
+    """
+    correos = []
+    for asunto, cuerpo, destinatarios in mensajes:
+        destinatarios = [d for d in dict.fromkeys(destinatarios) if d]
+        if destinatarios:
+            correos.append(CorreoSaliente(
+                asunto=asunto,
+                cuerpo=cuerpo,
+                remitente=settings.DEFAULT_FROM_EMAIL,
+                destinatarios=destinatarios,
+                max_intentos=settings.EMAIL_QUEUE_MAX_RETRIES,
+            ))
+    return CorreoSaliente.objects.bulk_create(correos)
+
+
+def cupo_por_minuto(limite, ahora=None):
+    """
+    Correos que aún se pueden enviar en la ventana del último minuto
+
+    Se cuenta en la base de datos, así el límite vale para todos los workers.
+    `limite` <= 0 desactiva la restricción.
+    """
+    if limite <= 0:
+        return None
+    ahora = ahora or timezone.now()
+    usados = CorreoSaliente.objects.filter(
+        Q(estado=CorreoSaliente.ENVIADO, enviado_en__gte=ahora - timedelta(minutes=1))
+        | Q(estado=CorreoSaliente.ENVIANDO)
+    ).count()
+    return max(0, limite - usados)
+
+
+def reclamar_correos(limite):
+    """Reclama hasta `limite` correos disponibles (UPDATE condicional) y retorna sus ids"""
+    if limite <= 0:
+        return []
+    ahora = timezone.now()
+    _recuperar_correos_colgados(ahora)
+
+    candidatos = list(
+        CorreoSaliente.objects.filter(estado=CorreoSaliente.PENDIENTE, disponible_desde__lte=ahora)
+        .order_by('disponible_desde')
+        .values_list('pk', flat=True)[:limite]
+    )
+
+    reclamados = []
+    for correo_id in candidatos:
+        tomado = CorreoSaliente.objects.filter(pk=correo_id, estado=CorreoSaliente.PENDIENTE).update(
+            estado=CorreoSaliente.ENVIANDO,
+            iniciado_en=ahora,
+            intentos=F('intentos') + 1,
+            fecha_actualizacion=ahora,
+        )
+        if tomado:
+            reclamados.append(correo_id)
+    return reclamados
+
+
+def enviar_correos(ids, connection):
+    """
+    Envía los correos reclamados por una conexión ya creada
+
+    La conexión se abre una sola vez y se reutiliza para todo el lote; si el
+    servidor corta a mitad de camino, se reabre para el siguiente correo.
+    Retorna (enviados, fallidos).
+    """
+    correos = CorreoSaliente.objects.select_related(
+        'informe',
+        'informe__codigo_solicitud',
+        'informe__codigo_solicitud__codigo_estado',
+        'informe__codigo_maquinaria',
+        'informe__codigo_maquinaria__codigo_sucursal',
+        'informe__id_usuario',
+    ).filter(pk__in=ids).order_by('disponible_desde')
+
+    enviados = fallidos = 0
+    for correo in correos:
+        try:
+            connection.open()
+            mensaje = construir_mensaje(correo, connection)
+            if connection.send_messages([mensaje]) != 1:
+                raise RuntimeError('El backend de correo no aceptó el mensaje')
+        except Exception as e:
+            logger.warning(f"Error enviando correo #{correo.pk} (intento {correo.intentos}): {e}")
+            _registrar_fallo(correo, e)
+            _cerrar(connection)
+            fallidos += 1
+            continue
+
+        correo.estado = CorreoSaliente.ENVIADO
+        correo.enviado_en = timezone.now()
+        correo.ultimo_error = ''
+        correo.save(update_fields=['estado', 'enviado_en', 'ultimo_error', 'fecha_actualizacion'])
+        enviados += 1
+
+    if enviados or fallidos:
+        logger.info(f"Bandeja de salida: {enviados} enviados, {fallidos} con error")
+    return enviados, fallidos
+
+
+def construir_mensaje(correo, connection=None):
+    """EmailMessage con el adjunto que corresponda al correo encolado"""
+    mensaje = EmailMessage(
+        subject=correo.asunto,
+        body=correo.cuerpo,
+        from_email=correo.remitente or settings.DEFAULT_FROM_EMAIL,
+        to=correo.destinatarios,
+        connection=connection,
+    )
+    if correo.informe is not None:
+        # Asegura un PDF al día; si no cambió es un acierto de caché
+        generar_pdf_informe(correo.informe)
+        archivo = correo.informe.archivo_pdf
+        with archivo.open('rb') as origen:
+            mensaje.attach(archivo.name.rsplit('/', 1)[-1], origen.read(), 'application/pdf')
+    if correo.ruta_adjunto:
+        mensaje.attach_file(correo.ruta_adjunto)
+    return mensaje
+
+
+def _registrar_fallo(correo, error):
+    """Reprograma el correo con espera exponencial o lo marca como fallido"""
+    correo.ultimo_error = str(error)
+    if correo.intentos >= correo.max_intentos:
+        correo.estado = CorreoSaliente.FALLIDO
+        logger.error(f"Correo #{correo.pk} descartado tras {correo.intentos} intentos: {error}")
+    else:
+        espera = settings.EMAIL_QUEUE_RETRY_DELAY * 2 ** (correo.intentos - 1)
+        correo.estado = CorreoSaliente.PENDIENTE
+        correo.disponible_desde = timezone.now() + timedelta(seconds=espera)
+    correo.save(update_fields=['estado', 'ultimo_error', 'disponible_desde', 'fecha_actualizacion'])
+
+
+def _cerrar(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+def _recuperar_correos_colgados(ahora):
+    """Devuelve a la cola los correos cuyo worker murió a mitad del envío"""
+    limite = ahora - timedelta(seconds=settings.EMAIL_QUEUE_TIMEOUT)
+    colgados = CorreoSaliente.objects.filter(estado=CorreoSaliente.ENVIANDO, iniciado_en__lt=limite)
+
+    colgados.filter(intentos__gte=F('max_intentos')).update(
+        estado=CorreoSaliente.FALLIDO, ultimo_error='Tiempo de envío agotado'
+    )
+    recuperados = colgados.update(estado=CorreoSaliente.PENDIENTE, disponible_desde=ahora)
+    if recuperados:
+        logger.warning(f"{recuperados} correos colgados devueltos a la cola")
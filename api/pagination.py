@@ -0,0 +1,189 @@
+"""
+Paginación de la API
+
+`PaginacionSeleccionable` conserva PageNumberPagination (count + OFFSET) por
+defecto y pasa a paginación por cursor (keyset) cuando el cliente lo pide con
+`?paginacion=cursor` o envía un `?cursor=`. El keyset ordena por
+(campo de orden, pk) y filtra con `(campo, pk) < (valor, pk)`, así que el
+costo de una página no depende de qué tan profundo esté.
+"""
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def codificar_cursor(datos):
+    texto = json.dumps(datos, separators=(',', ':'))
+    return base64.urlsafe_b64encode(texto.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno).decode('utf-8'))
+    except (ValueError, TypeError):
+        raise NotFound('Cursor inválido')
+    if not isinstance(datos, dict) or not {'o', 'v', 'pk', 'r'} <= datos.keys() or not isinstance(datos['pk'], int):
+        raise NotFound('Cursor inválido')
+    return datos
+
+
+def filtro_keyset(campo, descendente, valor, pk, nombre_pk='pk'):
+    """Q de las filas que van después de (valor, pk) en el orden (campo, pk)"""
+    operador = 'lt' if descendente else 'gt'
+    return Q(**{f'{campo}__{operador}': valor}) | Q(**{campo: valor, f'{nombre_pk}__{operador}': pk})
+
+
+class PaginacionKeyset(BasePagination):
+    """
+    Paginación por cursor sobre (campo_orden, pk)
+
+    El orden sale del parámetro `ordering` (si es uno de los ordering_fields
+    de la vista) o de `campo_orden` descendente. El cursor es opaco (base64
+    de JSON) y recuerda el orden con que se generó.
+    """
+    campo_orden = None
+    page_size = None
+    cursor_query_param = 'cursor'
+
+    def __init__(self, campo_orden=None, page_size=None):
+        self.campo_orden = campo_orden or self.campo_orden
+        self.page_size = page_size or self.page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.orden = self._orden(request, queryset, view)
+        campo, descendente = self.orden.lstrip('-'), self.orden.startswith('-')
+        nombre_pk = self.nombre_pk = queryset.model._meta.pk.name
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        reversa = False
+        if cursor:
+            datos = decodificar_cursor(cursor)
+            if datos['o'] != self.orden:
+                raise NotFound('El cursor no corresponde al orden solicitado')
+            reversa = bool(datos['r'])
+            valor = self._parsear_valor(queryset, campo, datos['v'])
+            # Hacia atrás se recorre el orden invertido y luego se da vuelta la página
+            queryset = queryset.filter(filtro_keyset(campo, descendente != reversa, valor, datos['pk'], nombre_pk))
+
+        if descendente != reversa:
+            queryset = queryset.order_by(f'-{campo}', f'-{nombre_pk}')
+        else:
+            queryset = queryset.order_by(campo, nombre_pk)
+
+        filas = list(queryset[:self.page_size + 1])
+        hay_mas = len(filas) > self.page_size
+        filas = filas[:self.page_size]
+        if reversa:
+            filas.reverse()
+
+        self.filas = filas
+        self.hay_siguiente = hay_mas if not reversa else bool(cursor)
+        self.hay_anterior = bool(cursor) if not reversa else hay_mas
+        return filas
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.hay_siguiente or not self.filas:
+            return None
+        return self._enlace(self.filas[-1], reversa=False)
+
+    def get_previous_link(self):
+        if not self.hay_anterior or not self.filas:
+            return None
+        return self._enlace(self.filas[0], reversa=True)
+
+    def _enlace(self, fila, reversa):
+        campo = self.orden.lstrip('-')
+        # Las filas pueden ser instancias o dicts de .values() (lectura ligera)
+        if isinstance(fila, dict):
+            valor, pk = fila[campo], fila[self.nombre_pk]
+        else:
+            valor, pk = getattr(fila, campo), fila.pk
+        cursor = codificar_cursor({
+            'o': self.orden,
+            'v': valor.isoformat() if hasattr(valor, 'isoformat') else valor,
+            'pk': pk,
+            'r': 1 if reversa else 0,
+        })
+        url = remove_query_param(self.base_url, 'page')
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def _orden(self, request, queryset, view):
+        permitidos = set(getattr(view, 'ordering_fields', None) or []) | {self.campo_orden}
+        solicitado = OrderingFilter().get_ordering(request, queryset, view) if view is not None else None
+        if solicitado:
+            primero = solicitado[0]
+            if primero.lstrip('-') in permitidos:
+                return primero
+        return f'-{self.campo_orden}'
+
+    def _parsear_valor(self, queryset, campo, valor):
+        tipo = queryset.model._meta.get_field(campo).get_internal_type()
+        if tipo == 'DateTimeField':
+            valor = parse_datetime(valor) if isinstance(valor, str) else None
+            if valor is None:
+                raise NotFound('Cursor inválido')
+        return valor
+
+
+class PaginacionSeleccionable(PageNumberPagination):
+    """
+    PageNumberPagination por defecto; keyset con ?paginacion=cursor o ?cursor=
+
+    Las subclases indican `campo_orden` (el campo temporal del modelo).
+    """
+    campo_orden = None
+    modo_query_param = 'paginacion'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if request.query_params.get(self.modo_query_param) == 'cursor' or 'cursor' in request.query_params:
+            self.keyset = PaginacionKeyset(self.campo_orden, self.get_page_size(request) or self.page_size)
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        # El navegador de la API no tiene controles para el modo cursor
+        if getattr(self, 'keyset', None) is not None:
+            return ''
+        return super().to_html()
+
+
+class SolicitudPagination(PaginacionSeleccionable):
+    campo_orden = 'fecha_creacion'
+
+
+class InformePagination(PaginacionSeleccionable):
+    campo_orden = 'fecha_informe'
@@ -0,0 +1,198 @@
+"""
+Entrega de archivos protegidos (PDFs de informes)
+
+Según PROTECTED_MEDIA_MODE la descarga la transfiere:
+- 'nginx': nginx, vía X-Accel-Redirect hacia una location `internal`
+- 'sendfile': Apache/lighttpd, vía X-Sendfile con la ruta absoluta
+- 'django': el propio worker, con FileResponse (fallback para desarrollo)
+
+En los modos de proxy, Range y las peticiones condicionales las resuelve el
+proxy sobre el archivo. En modo 'django' se resuelven aquí: ETag fuerte,
+Last-Modified, 304 y respuestas parciales 206.
+"""
+import hashlib
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+MODO_DJANGO = 'django'
+MODO_NGINX = 'nginx'
+MODO_SENDFILE = 'sendfile'
+
+RANGO_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangoInsatisfacible(Exception):
+    pass
+
+
+def servir_archivo_protegido(request, archivo, filename, content_type='application/pdf', as_attachment=True, modo=None):
+    """Respuesta de descarga para un FieldFile ya validado por la vista"""
+    modo = modo or settings.PROTECTED_MEDIA_MODE
+
+    if modo == MODO_NGINX:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.PROTECTED_MEDIA_INTERNAL_URL + quote(archivo.name)
+    elif modo == MODO_SENDFILE and _ruta_local(archivo):
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = _ruta_local(archivo)
+    else:
+        return _respuesta_django(request, archivo, filename, content_type, as_attachment)
+
+    response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    return response
+
+
+def _respuesta_django(request, archivo, filename, content_type, as_attachment):
+    tamano, modificado = _metadatos(archivo)
+    etag = _etag(archivo.name, tamano, modificado)
+    cabeceras = {
+        'ETag': etag,
+        'Last-Modified': http_date(int(modificado)),
+        'Accept-Ranges': 'bytes',
+        # Los informes no son públicos: el navegador puede guardarlos pero debe revalidar
+        'Cache-Control': 'private, no-cache',
+    }
+
+    if request is not None:
+        no_modificado = get_conditional_response(request, etag=etag, last_modified=int(modificado))
+        if no_modificado is not None:
+            for cabecera, valor in cabeceras.items():
+                no_modificado[cabecera] = valor
+            return no_modificado
+
+        rango_header = request.META.get('HTTP_RANGE')
+        if rango_header and request.method in ('GET', 'HEAD') and _if_range_valido(request, etag, modificado):
+            try:
+                rango = _parsear_rango(rango_header, tamano)
+            except RangoInsatisfacible:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{tamano}'
+                response['Accept-Ranges'] = 'bytes'
+                return response
+            if rango is not None:
+                return _respuesta_parcial(archivo, rango, tamano, filename, content_type, as_attachment, cabeceras)
+
+    response = _file_response(archivo, filename, content_type, as_attachment)
+    for cabecera, valor in cabeceras.items():
+        response[cabecera] = valor
+    return response
+
+
+def _respuesta_parcial(archivo, rango, tamano, filename, content_type, as_attachment, cabeceras):
+    inicio, fin = rango
+    response = StreamingHttpResponse(
+        _leer_rango(archivo, inicio, fin),
+        status=206,
+        content_type=content_type,
+    )
+    response['Content-Length'] = str(fin - inicio + 1)
+    response['Content-Range'] = f'bytes {inicio}-{fin}/{tamano}'
+    response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    for cabecera, valor in cabeceras.items():
+        response[cabecera] = valor
+    return response
+
+
+def _leer_rango(archivo, inicio, fin):
+    ruta = _ruta_local(archivo)
+    bloque = settings.PROTECTED_MEDIA_BLOCK_SIZE
+    with (open(ruta, 'rb') if ruta else archivo.open('rb')) as origen:
+        origen.seek(inicio)
+        restante = fin - inicio + 1
+        while restante > 0:
+            datos = origen.read(min(bloque, restante))
+            if not datos:
+                break
+            restante -= len(datos)
+            yield datos
+
+
+def _parsear_rango(valor, tamano):
+    """
+    Retorna (inicio, fin) inclusivos para un único rango de bytes
+
+    None si la cabecera no es válida o pide varios rangos (se responde el
+    archivo completo, como permite RFC 9110); RangoInsatisfacible si el
+    rango cae fuera del archivo.
+    """
+    coincidencia = RANGO_RE.match(valor.strip())
+    if not coincidencia:
+        return None
+    inicio, fin = coincidencia.groups()
+    if not inicio and not fin:
+        return None
+
+    if not inicio:
+        # Sufijo: los últimos N bytes
+        sufijo = int(fin)
+        if sufijo == 0 or tamano == 0:
+            raise RangoInsatisfacible()
+        return max(0, tamano - sufijo), tamano - 1
+
+    inicio = int(inicio)
+    if fin and int(fin) < inicio:
+        return None
+    if inicio >= tamano:
+        raise RangoInsatisfacible()
+    fin = int(fin) if fin else tamano - 1
+    return inicio, min(fin, tamano - 1)
+
+
+def _if_range_valido(request, etag, modificado):
+    """El rango solo aplica si If-Range (cuando viene) coincide con la versión actual"""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    fecha = parse_http_date_safe(if_range)
+    return fecha is not None and fecha == int(modificado)
+
+
+def _etag(nombre, tamano, modificado):
+    """ETag fuerte derivado del archivo almacenado (nombre, tamaño y fecha de modificación)"""
+    firma = hashlib.sha256(f'{nombre}:{tamano}:{modificado}'.encode('utf-8')).hexdigest()
+    return f'"{firma[:32]}"'
+
+
+def _metadatos(archivo):
+    """(tamaño en bytes, timestamp de modificación) del archivo"""
+    ruta = _ruta_local(archivo)
+    if ruta:
+        stat = os.stat(ruta)
+        return stat.st_size, stat.st_mtime
+    storage = archivo.storage
+    return storage.size(archivo.name), storage.get_modified_time(archivo.name).timestamp()
+
+
+def _file_response(archivo, filename, content_type, as_attachment):
+    """
+    FileResponse sobre un archivo real del sistema de archivos
+
+    Con un objeto de archivo nativo (con fileno) el servidor WSGI puede usar
+    wsgi.file_wrapper, que en gunicorn transfiere con os.sendfile.
+    """
+    ruta = _ruta_local(archivo)
+    origen = open(ruta, 'rb') if ruta else archivo.open('rb')
+    response = FileResponse(
+        origen,
+        content_type=content_type,
+        as_attachment=as_attachment,
+        filename=filename,
+    )
+    response.block_size = settings.PROTECTED_MEDIA_BLOCK_SIZE
+    return response
+
+
+def _ruta_local(archivo):
+    """Ruta absoluta del archivo, o None si el storage no es local"""
+    try:
+        return archivo.path
+    except NotImplementedError:
+        return None
@@ -0,0 +1,66 @@
+"""
+Renderer y parser JSON sobre orjson
+
+orjson codifica y decodifica varias veces más rápido que el módulo json de
+la biblioteca estándar. Los tipos que orjson no conoce (o que DRF representa
+distinto: datetime/date/time, Decimal, textos traducibles, QuerySets, etc.)
+pasan por `JSONEncoder.default` de DRF, así que la salida es la misma que la
+de JSONRenderer. Si orjson no está instalado, ambas clases se comportan como
+las de DRF.
+"""
+import codecs
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
+
+if orjson is not None:
+    # Las fechas van a JSONEncoder (DRF recorta a milisegundos y usa 'Z' para UTC)
+    OPCIONES = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+_por_defecto = JSONEncoder().default
+
+
+def a_json(datos):
+    """`datos` como JSON compacto en bytes UTF-8 (con orjson si está disponible)"""
+    if orjson is None:
+        return JSONRenderer().render(datos)
+    contenido = orjson.dumps(datos, default=_por_defecto, option=OPCIONES)
+    # Igual que JSONRenderer: U+2028/U+2029 escapados para poder incrustar la respuesta en JS
+    if b'\xe2\x80\xa8' in contenido or b'\xe2\x80\xa9' in contenido:
+        contenido = contenido.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return contenido
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer con orjson; con indentación pedida (`; indent=`) usa el de DRF"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return a_json(data)
+
+
+class ORJSONParser(JSONParser):
+    """JSONParser con orjson (rechaza NaN/Infinity, como DRF con STRICT_JSON)"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        contenido = stream.read()
+        try:
+            if codecs.lookup(encoding).name != 'utf-8':
+                contenido = contenido.decode(encoding)
+            return orjson.loads(contenido)
+        except (ValueError, LookupError) as exc:
+            raise ParseError(f'JSON parse error - {exc}')
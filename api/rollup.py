@@ -0,0 +1,234 @@
+"""
+Resumen diario de solicitudes (EstadisticaDiaria)
+
+Las señales llaman a `registrar_guardado` / `registrar_borrado` y cada evento
+suma en la fila (hoy, sucursal) con UPDATE ... SET campo = campo + n, así que
+escrituras concurrentes no se pisan. `reconstruir` recalcula un rango de fechas
+desde el historial de estados (TransicionEstado) y `serie_diaria` arma la serie leyendo solo el
+resumen (más un conteo de las solicitudes abiertas para anclar el backlog).
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, DurationField, ExpressionWrapper, F, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import EstadisticaDiaria, Solicitud, TransicionEstado
+
+PENDIENTE, EN_PROCESO, COMPLETADO, CANCELADO = 1, 2, 3, 4
+CAMPO_DELTA = {PENDIENTE: 'delta_pendientes', EN_PROCESO: 'delta_en_proceso'}
+
+
+def _acumular(fecha, sucursal_id, **incrementos):
+    incrementos = {campo: valor for campo, valor in incrementos.items() if valor}
+    if not incrementos or sucursal_id is None:
+        return
+    filas = EstadisticaDiaria.objects.filter(fecha=fecha, codigo_sucursal_id=sucursal_id)
+    cambios = {campo: F(campo) + valor for campo, valor in incrementos.items()}
+    if filas.update(**cambios):
+        return
+    try:
+        with transaction.atomic():
+            EstadisticaDiaria.objects.create(fecha=fecha, codigo_sucursal_id=sucursal_id, **incrementos)
+    except IntegrityError:
+        # Otro proceso creó la fila del día entre el UPDATE y el INSERT
+        filas.update(**cambios)
+
+
+def _acumular_sucursales(fecha, por_sucursal):
+    """
+    Como `_acumular` para varias sucursales del mismo día ({sucursal: incrementos}):
+    crea las filas que falten (ignorando las existentes) y suma con un solo UPDATE ... CASE
+    """
+    por_sucursal = {
+        sucursal: incrementos for sucursal, incrementos in por_sucursal.items()
+        if sucursal is not None and any(incrementos.values())
+    }
+    if not por_sucursal:
+        return
+    EstadisticaDiaria.objects.bulk_create(
+        [EstadisticaDiaria(fecha=fecha, codigo_sucursal_id=sucursal) for sucursal in por_sucursal],
+        ignore_conflicts=True,
+    )
+    campos = {campo for incrementos in por_sucursal.values() for campo, valor in incrementos.items() if valor}
+    cambios = {
+        campo: F(campo) + Case(
+            *[
+                When(codigo_sucursal=sucursal, then=Value(incrementos[campo]))
+                for sucursal, incrementos in por_sucursal.items() if incrementos.get(campo)
+            ],
+            default=Value(0),
+            output_field=EstadisticaDiaria._meta.get_field(campo),
+        )
+        for campo in campos
+    }
+    EstadisticaDiaria.objects.filter(fecha=fecha, codigo_sucursal__in=list(por_sucursal)).update(**cambios)
+
+
+def _incrementos(anterior, nuevo, veces=1):
+    """Lo que suma al resumen una transición anterior → nuevo (anterior None: creación; nuevo None: borrado)"""
+    incrementos = defaultdict(int)
+    if anterior is None and nuevo is not None:
+        incrementos['creadas'] += veces
+    if anterior in CAMPO_DELTA:
+        incrementos[CAMPO_DELTA[anterior]] -= veces
+    if nuevo in CAMPO_DELTA:
+        incrementos[CAMPO_DELTA[nuevo]] += veces
+    if nuevo == COMPLETADO and anterior != COMPLETADO:
+        incrementos['completadas'] += veces
+    elif nuevo == CANCELADO and anterior != CANCELADO:
+        incrementos['canceladas'] += veces
+    return incrementos
+
+
+def registrar_guardado(solicitud, creada, estado_anterior):
+    """Suma al resumen de hoy la creación o el cambio de estado de `solicitud`"""
+    nuevo = solicitud.codigo_estado_id
+    if not creada and estado_anterior == nuevo:
+        return
+    incrementos = _incrementos(None if creada else estado_anterior, nuevo)
+    ahora = timezone.now()
+    if incrementos['completadas']:
+        incrementos['segundos_resolucion'] = int((ahora - solicitud.fecha_creacion).total_seconds())
+    _acumular(timezone.localdate(ahora), solicitud.codigo_sucursal_id, **incrementos)
+
+
+def registrar_transiciones(transiciones, fechas_creacion):
+    """
+    Suma al resumen varios cambios de estado hechos con un UPDATE masivo (sin señales)
+
+    `transiciones` son TransicionEstado; `fechas_creacion`, {pk de solicitud: fecha_creacion}
+    para el tiempo de resolución. Hace un INSERT y un UPDATE por día.
+    """
+    por_dia = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+    for transicion in transiciones:
+        acumulado = por_dia[timezone.localdate(transicion.fecha)][transicion.codigo_sucursal_id]
+        incrementos = _incrementos(transicion.estado_anterior_id, transicion.estado_nuevo_id)
+        if incrementos['completadas']:
+            resolucion = transicion.fecha - fechas_creacion[transicion.solicitud_id]
+            incrementos['segundos_resolucion'] = int(resolucion.total_seconds())
+        for campo, valor in incrementos.items():
+            acumulado[campo] += valor
+    for fecha, por_sucursal in por_dia.items():
+        _acumular_sucursales(fecha, por_sucursal)
+
+
+def registrar_traslado(grupos, destino_id):
+    """
+    Solicitudes que pasan a la sucursal `destino_id` porque su máquina cambió de sucursal
+
+    `grupos` son dicts {codigo_sucursal (origen), codigo_estado, total}. Las abiertas
+    salen del backlog de su sucursal de origen y entran en el de destino el día de hoy.
+    """
+    por_sucursal = defaultdict(lambda: defaultdict(int))
+    for grupo in grupos:
+        campo = CAMPO_DELTA.get(grupo['codigo_estado'])
+        if campo:
+            por_sucursal[grupo['codigo_sucursal']][campo] -= grupo['total']
+            por_sucursal[destino_id][campo] += grupo['total']
+    _acumular_sucursales(timezone.localdate(), por_sucursal)
+
+
+def registrar_borrado(solicitud):
+    """Una solicitud abierta que se borra sale del backlog"""
+    _acumular(timezone.localdate(), solicitud.codigo_sucursal_id, **_incrementos(solicitud.codigo_estado_id, None))
+
+
+def _inicio_del_dia(dia):
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+def reconstruir(desde, hasta):
+    """
+    Recalcula el resumen de [desde, hasta] desde el historial de estados
+
+    Las solicitudes sin historial no cuentan: correr antes
+    `manage.py backfill_state_transitions`. Los traslados de máquinas entre
+    sucursales (`registrar_traslado`) no quedan en el historial, así que
+    reconstruir un rango que los incluya descarta esos deltas. Retorna las filas escritas.
+    """
+    resolucion = ExpressionWrapper(F('fecha') - F('solicitud__fecha_creacion'), output_field=DurationField())
+    transiciones = (
+        TransicionEstado.objects.filter(
+            fecha__gte=_inicio_del_dia(desde), fecha__lt=_inicio_del_dia(hasta + timedelta(days=1))
+        )
+        .exclude(codigo_sucursal=None)
+        .exclude(estado_nuevo=None)  # estado borrado del catálogo
+        .annotate(dia=TruncDate('fecha'))
+        .values('dia', 'codigo_sucursal', 'estado_anterior', 'estado_nuevo')
+        .annotate(total=Count('pk'), resolucion=Sum(resolucion, filter=Q(estado_nuevo=COMPLETADO)))
+    )
+
+    filas = {}
+    for grupo in transiciones:
+        clave = (grupo['dia'], grupo['codigo_sucursal'])
+        resumen = filas.setdefault(clave, EstadisticaDiaria(fecha=clave[0], codigo_sucursal_id=clave[1]))
+        for campo, valor in _incrementos(grupo['estado_anterior'], grupo['estado_nuevo'], grupo['total']).items():
+            setattr(resumen, campo, getattr(resumen, campo) + valor)
+        if grupo['resolucion'] and grupo['estado_anterior'] != COMPLETADO:
+            resumen.segundos_resolucion += int(grupo['resolucion'].total_seconds())
+
+    with transaction.atomic():
+        EstadisticaDiaria.objects.filter(fecha__gte=desde, fecha__lte=hasta).delete()
+        EstadisticaDiaria.objects.bulk_create(filas.values(), batch_size=1000)
+    return len(filas)
+
+
+def serie_diaria(desde, hasta, sucursal_id=None):
+    """
+    Serie de [desde, hasta]: creadas, completadas, canceladas, tiempo medio de
+    resolución y backlog (pendientes / en proceso) al cierre de cada día
+
+    Lee una fila de resumen por día y sucursal del rango, más un solo agregado
+    de los deltas posteriores a `hasta` (si `hasta` ya pasó) para anclar el
+    backlog; el costo depende del rango y no de cuánta historia haya.
+    """
+    resumen = EstadisticaDiaria.objects.all()
+    abiertas = Solicitud.objects.filter(codigo_estado__in=list(CAMPO_DELTA))
+    if sucursal_id is not None:
+        resumen = resumen.filter(codigo_sucursal=sucursal_id)
+        abiertas = abiertas.filter(codigo_sucursal=sucursal_id)
+
+    por_dia = {
+        grupo['fecha']: grupo
+        for grupo in resumen.filter(fecha__gte=desde, fecha__lte=hasta).values('fecha').annotate(
+            creadas=Sum('creadas'), completadas=Sum('completadas'), canceladas=Sum('canceladas'),
+            segundos_resolucion=Sum('segundos_resolucion'),
+            delta_pendientes=Sum('delta_pendientes'), delta_en_proceso=Sum('delta_en_proceso'),
+        )
+    }
+
+    # Backlog actual menos los deltas posteriores a `hasta` (un solo agregado);
+    # desde ahí hacia atrás se deshacen los deltas de cada día
+    backlog = {PENDIENTE: 0, EN_PROCESO: 0}
+    for grupo in abiertas.values('codigo_estado').annotate(total=Count('pk')):
+        backlog[grupo['codigo_estado']] = grupo['total']
+    if hasta < timezone.localdate():
+        posteriores = resumen.filter(fecha__gt=hasta).aggregate(
+            pendientes=Sum('delta_pendientes'), en_proceso=Sum('delta_en_proceso'),
+        )
+        backlog[PENDIENTE] -= posteriores['pendientes'] or 0
+        backlog[EN_PROCESO] -= posteriores['en_proceso'] or 0
+
+    serie = []
+    dia = hasta
+    while dia >= desde:
+        grupo = por_dia.get(dia, {})
+        completadas = grupo.get('completadas', 0)
+        serie.append({
+            'fecha': dia,
+            'creadas': grupo.get('creadas', 0),
+            'completadas': completadas,
+            'canceladas': grupo.get('canceladas', 0),
+            'horas_medias_resolucion': (
+                round(grupo['segundos_resolucion'] / completadas / 3600, 2) if completadas else None
+            ),
+            'backlog': {'pendientes': backlog[PENDIENTE], 'en_proceso': backlog[EN_PROCESO]},
+        })
+        backlog[PENDIENTE] -= grupo.get('delta_pendientes', 0)
+        backlog[EN_PROCESO] -= grupo.get('delta_en_proceso', 0)
+        dia -= timedelta(days=1)
+    serie.reverse()
+    return serie
@@ -1,11 +1,33 @@
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
+from . import catalogos
 from .models import (
     Usuario, TipoUsuario, NivelAcceso, Sucursal, 
     Estado, Maquina, Solicitud, Informe, Task
 )
 
 
+class CatalogoField(serializers.Field):
+    """
+    FK a un catálogo leída del caché de api.catalogos (sin join ni consulta por fila)
+
+    `source` apunta al id (p. ej. 'codigo_estado_id'); `campos` son las claves del resultado.
+    Si el caché no tiene el id (fila creada por otro proceso) se consulta y se
+    relee el catálogo, así que una página cuesta a lo más un par de consultas.
+    """
+    def __init__(self, catalogo, campos, **kwargs):
+        kwargs['read_only'] = True
+        self.catalogo = catalogo
+        self.campos = campos
+        super().__init__(**kwargs)
+
+    def to_representation(self, pk):
+        instancia = catalogos.obtener_o_consultar(self.catalogo, pk)
+        if instancia is None:
+            return None
+        return {campo: getattr(instancia, campo) for campo in self.campos}
+
+
 class TipoUsuarioSerializer(serializers.ModelSerializer):
     class Meta:
         model = TipoUsuario
@@ -25,7 +47,7 @@ class SucursalSerializer(serializers.ModelSerializer):
 
 
 class UsuarioSerializer(serializers.ModelSerializer):
-    sucursal = SucursalSerializer(source='codigo_sucursal', read_only=True)
+    sucursal = CatalogoField('sucursal', SucursalSerializer.Meta.fields, source='codigo_sucursal_id')
     tipo_usuario_nombre = serializers.CharField(source='get_codigo_tipo_usuario_display', read_only=True)
     nivel_acceso_nombre = serializers.CharField(source='get_codigo_nivel_acceso_display', read_only=True)
     nombre_completo = serializers.CharField(source='get_full_name', read_only=True)
@@ -40,6 +62,8 @@ class UsuarioSerializer(serializers.ModelSerializer):
             'tipo_usuario_nombre', 'codigo_nivel_acceso', 'nivel_acceso_nombre',
             'nombre_completo', 'is_active', 'date_joined'
         ]
+        # Columnas de los campos calculados para ?fields= (CamposDispersosMixin)
+        campos_modelo = {'nombre_completo': ['first_name', 'apellido_paterno', 'apellido_materno']}
         extra_kwargs = {
             'contrasena': {'write_only': True, 'required': False},
             'password': {'write_only': True, 'required': False},
@@ -140,7 +164,7 @@ class EstadoSerializer(serializers.ModelSerializer):
 
 
 class MaquinaSerializer(serializers.ModelSerializer):
-    sucursal = SucursalSerializer(source='codigo_sucursal', read_only=True)
+    sucursal = CatalogoField('sucursal', SucursalSerializer.Meta.fields, source='codigo_sucursal_id')
     
     class Meta:
         model = Maquina
@@ -162,7 +186,7 @@ class SolicitudSerializer(serializers.ModelSerializer):
     maquina = MaquinaSimpleSerializer(source='codigo_maquinaria', read_only=True)
     usuario = UsuarioSimpleSerializer(source='id_usuario', read_only=True)
     ingeniero = UsuarioSimpleSerializer(source='ingeniero_asignado', read_only=True)
-    estado = EstadoSerializer(source='codigo_estado', read_only=True)
+    estado = CatalogoField('estado', EstadoSerializer.Meta.fields, source='codigo_estado_id')
     tiene_informe = serializers.SerializerMethodField()
     fecha_solicitud = serializers.SerializerMethodField()
     nombre_usuario = serializers.CharField(source='id_usuario.get_full_name', read_only=True)
@@ -175,12 +199,18 @@ class SolicitudSerializer(serializers.ModelSerializer):
             'id_usuario', 'usuario', 'nombre_usuario', 
             'ingeniero_asignado', 'ingeniero', 'nombre_ingeniero',
             'descripcion', 
-            'codigo_estado', 'estado', 'fecha_creacion', 'fecha_solicitud', 'fecha_programada',
+            'codigo_estado', 'estado', 'codigo_sucursal', 'fecha_creacion', 'fecha_solicitud', 'fecha_programada',
             'fecha_actualizacion', 'tiene_informe'
         ]
         read_only_fields = ['fecha_creacion', 'fecha_actualizacion']
+        # tiene_informe viene anotado en el queryset
+        campos_modelo = {'tiene_informe': [], 'fecha_solicitud': ['fecha_creacion']}
     
     def get_tiene_informe(self, obj):
+        # Los listados lo traen anotado (Exists); una instancia suelta consulta la relación
+        anotado = getattr(obj, 'tiene_informe', None)
+        if anotado is not None:
+            return anotado
         return hasattr(obj, 'informe')
 
     def get_fecha_solicitud(self, obj):
@@ -195,8 +225,8 @@ class SolicitudCreateUpdateSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if not attrs.get('id_usuario') and request and request.user and request.user.is_authenticated:
             attrs['id_usuario'] = request.user
-        # Si no viene codigo_estado, por defecto 1 (Pendiente)
-        if not attrs.get('codigo_estado'):
+        # Si no viene codigo_estado, por defecto 1 (Pendiente); un PATCH conserva el actual
+        if not attrs.get('codigo_estado') and self.instance is None:
             attrs['codigo_estado'] = 1
         return super().validate(attrs)
 
@@ -229,6 +259,7 @@ class InformeSerializer(serializers.ModelSerializer):
     usuario = UsuarioSimpleSerializer(source='id_usuario', read_only=True)
     archivo_pdf_url = serializers.SerializerMethodField()
     codigo_informe = serializers.IntegerField(source='codigo_solicitud_id', read_only=True)
+    pdf_status = serializers.CharField(source='estado_pdf', read_only=True)
     
     class Meta:
         model = Informe
@@ -236,9 +267,10 @@ class InformeSerializer(serializers.ModelSerializer):
             'codigo_informe', 'codigo_solicitud', 'solicitud', 'codigo_maquinaria', 
             'maquina', 'id_usuario', 'usuario', 'descripcion', 'descripcion_trabajo',
             'piezas_reemplazadas', 'recomendaciones',
-            'fecha_informe', 'archivo_pdf', 'archivo_pdf_url'
+            'fecha_informe', 'archivo_pdf', 'archivo_pdf_url', 'pdf_status'
         ]
         read_only_fields = ['fecha_informe']
+        campos_modelo = {'archivo_pdf_url': ['archivo_pdf']}
     
     def get_archivo_pdf_url(self, obj):
         if obj.archivo_pdf:
@@ -0,0 +1,110 @@
+"""
+Señales que mantienen datos denormalizados, el historial de estados, el resumen
+diario y la invalidación de cachés (incluido el de catálogos)
+"""
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import catalogos
+from .caching import invalidar
+from .models import Estado, Maquina, NivelAcceso, Solicitud, Sucursal, TipoUsuario
+from .rollup import registrar_borrado, registrar_guardado, registrar_traslado
+from .transiciones import registrar_transicion
+
+
+@receiver(pre_save, sender=Solicitud)
+def copiar_sucursal_de_maquina(sender, instance, raw=False, **kwargs):
+    """La solicitud hereda la sucursal de su máquina"""
+    if raw or instance.codigo_maquinaria_id is None:
+        return
+    instance.codigo_sucursal_id = instance.codigo_maquinaria.codigo_sucursal_id
+
+
+@receiver(post_save, sender=Maquina)
+def propagar_sucursal_de_maquina(sender, instance, created, raw=False, **kwargs):
+    """
+    Si la máquina cambia de sucursal, sus solicitudes la acompañan (un solo UPDATE)
+
+    Las abiertas se descuentan del backlog del resumen diario de la sucursal de
+    origen y se suman al de la nueva, en la misma transacción.
+    """
+    if raw or created:
+        return
+    movidas = Solicitud.objects.filter(codigo_maquinaria=instance).exclude(
+        codigo_sucursal=instance.codigo_sucursal_id
+    )
+    grupos = list(movidas.values('codigo_sucursal', 'codigo_estado').annotate(total=Count('pk')).order_by())
+    if not grupos:
+        return
+    with transaction.atomic():
+        movidas.update(codigo_sucursal=instance.codigo_sucursal_id)
+        registrar_traslado(grupos, instance.codigo_sucursal_id)
+    invalidar('solicitudes')
+
+
+@receiver(post_save, sender=Solicitud)
+@receiver(post_delete, sender=Solicitud)
+def invalidar_cache_solicitudes(sender, **kwargs):
+    """Las estadísticas cacheadas sobre solicitudes dejan de valer"""
+    invalidar('solicitudes')
+
+
+@receiver(pre_save, sender=Solicitud)
+def recordar_estado_anterior(sender, instance, raw=False, **kwargs):
+    """Estado previo al guardado (el leído de la base, o una consulta si la instancia no vino de ella)"""
+    if raw or instance._state.adding:
+        instance._estado_anterior = None
+    elif hasattr(instance, '_estado_cargado'):
+        instance._estado_anterior = instance._estado_cargado
+    else:
+        instance._estado_anterior = Solicitud.objects.filter(pk=instance.pk).values_list(
+            'codigo_estado', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=Solicitud)
+def registrar_historial_estado(sender, instance, created, raw=False, **kwargs):
+    """Creación o cambio de estado: fila en TransicionEstado (quién: `_modificado_por`, si la vista lo indicó)"""
+    if raw:
+        return
+    registrar_transicion(
+        instance, created, getattr(instance, '_estado_anterior', None), getattr(instance, '_modificado_por', None)
+    )
+
+
+@receiver(post_save, sender=Solicitud)
+def actualizar_resumen_diario(sender, instance, created, raw=False, **kwargs):
+    """Creaciones y cambios de estado suman en EstadisticaDiaria (loaddata: usar rebuild_daily_stats)"""
+    if raw:
+        return
+    registrar_guardado(instance, created, getattr(instance, '_estado_anterior', None))
+    instance._estado_cargado = instance.codigo_estado_id
+
+
+@receiver(post_delete, sender=Solicitud)
+def descontar_resumen_diario(sender, instance, **kwargs):
+    registrar_borrado(instance)
+
+
+@receiver(post_save, sender=Estado)
+@receiver(post_delete, sender=Estado)
+@receiver(post_save, sender=TipoUsuario)
+@receiver(post_delete, sender=TipoUsuario)
+@receiver(post_save, sender=NivelAcceso)
+@receiver(post_delete, sender=NivelAcceso)
+@receiver(post_save, sender=Sucursal)
+@receiver(post_delete, sender=Sucursal)
+def invalidar_catalogo(sender, **kwargs):
+    """Cualquier escritura en un catálogo descarta su caché y sus respuestas cacheadas (también con loaddata)"""
+    nombre = catalogos.nombre_de_modelo(sender)
+    catalogos.invalidar(nombre)
+    invalidar(f'catalogo:{nombre}')
+
+
+@receiver(post_save, sender=Maquina)
+@receiver(post_delete, sender=Maquina)
+def invalidar_cache_maquinas(sender, **kwargs):
+    """Las respuestas cacheadas de máquinas (RespuestaCacheadaMixin) dejan de valer"""
+    invalidar('maquinas')
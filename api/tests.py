@@ -1,8 +1,50 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import shutil
+import smtplib
+import tempfile
+import uuid
+import zipfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import CommandError, call_command
+from django.core.management.base import OutputWrapper
+from django.db import connection
+from django.db.models import F, Max
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnList
 from rest_framework.test import APITestCase
 from rest_framework import status
-from .models import Task
+from mantentask_project.middleware import CompresionAPIMiddleware, elegir_codec
+from .models import (
+    Usuario, Sucursal, Estado, Maquina, Solicitud, Informe, TareaPDF, CorreoSaliente,
+    EventoNotificacion, EstadisticaDiaria, Task, TransicionEstado
+)
+from . import catalogos
+from .generators import ORDEN_FIXTURES, generar_datos
+from .jobs import reclamar_tareas, ejecutar_tarea
+from .management.commands.check_solicitud_sucursal import solicitudes_inconsistentes
+from .caching import advertir_cache_por_proceso, invalidar
+from .rollup import reconstruir, serie_diaria
+from .transiciones import reconstruir_historial, tiempos_en_estado
+from .outbox import encolar_correo, enviar_correos, reclamar_correos
+from .renderers import ORJSONParser, ORJSONRenderer
+from .notifications import agrupar_notificaciones, registrar_nueva_solicitud
+from .utils import generar_pdf_informe, limpiar_pdfs_huerfanos, estadisticas_cache_pdf
 
 
 class TaskModelTest(TestCase):
@@ -92,3 +134,1506 @@ class TaskAPITest(APITestCase):
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(Task.objects.count(), 0)
+
+
+class MantenTaskTestMixin:
+    """Datos mínimos compartidos por las pruebas de la API"""
+
+    def crear_datos_base(self):
+        # Las invalidaciones corren en on_commit, que TestCase no ejecuta: cada prueba parte sin caché
+        cache.clear()
+        for codigo, nombre in [(1, 'Pendiente'), (2, 'En Proceso'), (3, 'Completado')]:
+            Estado.objects.create(codigo_estado=codigo, nombre_estado=nombre)
+        self.sucursal = Sucursal.objects.create(nombre_sucursal='Sucursal Centro')
+        self.maquina = Maquina.objects.create(
+            codigo_sucursal=self.sucursal,
+            modelo='Compresor Pro 5000',
+            marca='Atlas Copco',
+            fecha_compra=date(2024, 1, 10),
+            fecha_instalacion=date(2024, 1, 20),
+        )
+        self.ingeniero = Usuario.objects.create_user(
+            username='jperez',
+            password='ingeniero123',
+            first_name='Juan',
+            apellido_paterno='Pérez',
+            apellido_materno='García',
+            correo_electronico='juan.perez@mantentask.com',
+            codigo_tipo_usuario=1,
+            codigo_nivel_acceso=2,
+            codigo_sucursal=self.sucursal,
+        )
+        self.encargado = Usuario.objects.create_user(
+            username='crodriguez',
+            password='encargado123',
+            first_name='Carlos',
+            apellido_paterno='Rodríguez',
+            apellido_materno='Martínez',
+            correo_electronico='carlos.rodriguez@mantentask.com',
+            codigo_tipo_usuario=2,
+            codigo_nivel_acceso=4,
+            codigo_sucursal=self.sucursal,
+        )
+
+    def crear_solicitud(self, **kwargs):
+        datos = {
+            'codigo_maquinaria': self.maquina,
+            'id_usuario': self.encargado,
+            'ingeniero_asignado': self.ingeniero,
+            'descripcion': 'El compresor no alcanza la presión requerida.',
+            'codigo_estado_id': 3,
+        }
+        datos.update(kwargs)
+        return Solicitud.objects.create(**datos)
+
+    def crear_informe(self, solicitud=None):
+        solicitud = solicitud or self.crear_solicitud()
+        return Informe.objects.create(
+            codigo_solicitud=solicitud,
+            codigo_maquinaria=solicitud.codigo_maquinaria,
+            id_usuario=self.ingeniero,
+            descripcion='Se reemplazó el sello del cilindro principal.',
+        )
+
+
+class InformePDFAsincronoTest(MantenTaskTestMixin, APITestCase):
+    """La creación de informes no debe esperar la generación del PDF"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root, PDF_JOB_MAX_RETRIES=2)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.crear_datos_base()
+        self.solicitud = self.crear_solicitud()
+        self.client.force_authenticate(user=self.ingeniero)
+
+    @mock.patch('api.jobs.generar_pdf_informe')
+    @mock.patch('api.views.generar_pdf_informe')
+    def test_create_no_genera_pdf_en_el_request(self, generar_en_vista, generar_en_cola):
+        """El endpoint responde 201 con pdf_status pendiente sin renderizar"""
+        response = self.client.post(reverse('informe-list'), {
+            'codigo_solicitud': self.solicitud.codigo_solicitud,
+            'codigo_maquinaria': self.maquina.codigo_maquinaria,
+            'id_usuario': self.ingeniero.id_usuario,
+            'descripcion': 'Trabajo realizado',
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['pdf_status'], Informe.PDF_PENDIENTE)
+        generar_en_vista.assert_not_called()
+        generar_en_cola.assert_not_called()
+        self.assertEqual(
+            TareaPDF.objects.filter(informe_id=self.solicitud.codigo_solicitud, estado=TareaPDF.PENDIENTE).count(),
+            1
+        )
+
+    def test_worker_genera_pdf_y_marca_listo(self):
+        """El worker procesa la tarea y el informe queda con pdf_status listo"""
+        informe = self.crear_informe(self.solicitud)
+        from .jobs import encolar_pdf_informe
+        encolar_pdf_informe(informe)
+
+        tareas = reclamar_tareas(5)
+        self.assertEqual(len(tareas), 1)
+        self.assertTrue(ejecutar_tarea(tareas[0]))
+
+        informe.refresh_from_db()
+        self.assertEqual(informe.estado_pdf, Informe.PDF_LISTO)
+        self.assertTrue(informe.archivo_pdf)
+        self.assertEqual(TareaPDF.objects.get(pk=tareas[0]).estado, TareaPDF.COMPLETADA)
+
+    @mock.patch('api.jobs.generar_pdf_informe', side_effect=RuntimeError('ReportLab falló'))
+    def test_reintentos_y_fallo_definitivo(self, generar):
+        """Un error reprograma la tarea y al agotar los intentos el PDF queda fallido"""
+        informe = self.crear_informe(self.solicitud)
+        from .jobs import encolar_pdf_informe
+        tarea = encolar_pdf_informe(informe)
+
+        with self.assertLogs('api.jobs', level='ERROR'):
+            self.assertFalse(ejecutar_tarea(reclamar_tareas(1)[0]))
+        tarea.refresh_from_db()
+        self.assertEqual(tarea.estado, TareaPDF.PENDIENTE)
+        self.assertGreater(tarea.disponible_desde, timezone.now())
+        self.assertEqual(reclamar_tareas(1), [])  # aún en espera
+
+        TareaPDF.objects.filter(pk=tarea.pk).update(disponible_desde=timezone.now())
+        with self.assertLogs('api.jobs', level='ERROR'):
+            self.assertFalse(ejecutar_tarea(reclamar_tareas(1)[0]))
+        tarea.refresh_from_db()
+        informe.refresh_from_db()
+        self.assertEqual(tarea.estado, TareaPDF.FALLIDA)
+        self.assertEqual(tarea.intentos, 2)
+        self.assertEqual(informe.estado_pdf, Informe.PDF_FALLIDO)
+
+
+class PDFCacheTest(MantenTaskTestMixin, TestCase):
+    """Los PDFs se reutilizan mientras no cambie el contenido del informe"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.crear_datos_base()
+        self.informe = self.crear_informe()
+
+    def test_no_renderiza_si_el_contenido_no_cambia(self):
+        generar_pdf_informe(self.informe)
+        nombre = self.informe.archivo_pdf.name
+        antes = estadisticas_cache_pdf()
+
+        with mock.patch('api.utils.renderizar_pdf_informe') as renderizar:
+            generar_pdf_informe(self.informe)
+            renderizar.assert_not_called()
+
+        self.assertEqual(self.informe.archivo_pdf.name, nombre)
+        self.assertEqual(estadisticas_cache_pdf()['hits'], antes['hits'] + 1)
+
+    def test_cambio_de_contenido_regenera_y_borra_el_anterior(self):
+        generar_pdf_informe(self.informe)
+        anterior = self.informe.archivo_pdf.name
+        storage = self.informe.archivo_pdf.storage
+
+        self.informe.descripcion = 'Se reemplazó además el filtro de aire.'
+        self.informe.save()
+        generar_pdf_informe(self.informe)
+
+        self.assertNotEqual(self.informe.archivo_pdf.name, anterior)
+        self.assertFalse(storage.exists(anterior))
+        self.assertTrue(storage.exists(self.informe.archivo_pdf.name))
+
+    def test_limpiar_pdfs_huerfanos(self):
+        generar_pdf_informe(self.informe)
+        storage = self.informe.archivo_pdf.storage
+        huerfano = storage.save('informes/informe_solicitud_999_antiguo.pdf', ContentFile(b'%PDF-1.4'))
+
+        eliminados = limpiar_pdfs_huerfanos(antiguedad_minima=timedelta(0))
+
+        self.assertEqual(eliminados, [huerfano])
+        self.assertTrue(storage.exists(self.informe.archivo_pdf.name))
+
+
+class ExportarZipTest(MantenTaskTestMixin, APITestCase):
+    """Exportación masiva de PDFs en un ZIP transmitido"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root, PDF_EXPORT_WORKERS=2)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.crear_datos_base()
+        self.informes = [self.crear_informe() for _ in range(3)]
+        generar_pdf_informe(self.informes[0])
+        self.client.force_authenticate(user=self.encargado)
+
+    def test_anonimo_no_puede_exportar(self):
+        self.client.force_authenticate(user=None)
+
+        response = self.client.get(reverse('informe-exportar-zip'))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(PDF_EXPORT_MAX_INFORMES=2)
+    def test_rechaza_exportaciones_sobre_el_maximo(self):
+        response = self.client.get(reverse('informe-exportar-zip'))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('error', response.data)
+        # Con filtros que dejan el resultado bajo el máximo sí se exporta
+        response = self.client.get(reverse('informe-exportar-zip'), {'codigo_informe': self.informes[0].codigo_solicitud_id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_zip_incluye_todos_los_informes_filtrados(self):
+        response = self.client.get(reverse('informe-exportar-zip'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        contenido = b''.join(response.streaming_content)
+        with zipfile.ZipFile(io.BytesIO(contenido)) as archivo_zip:
+            nombres = sorted(archivo_zip.namelist())
+            self.assertEqual(nombres, sorted(
+                f'informe_{informe.codigo_solicitud_id}.pdf' for informe in self.informes
+            ))
+            for nombre in nombres:
+                self.assertTrue(archivo_zip.read(nombre).startswith(b'%PDF'))
+
+        # Los PDFs que faltaban quedaron guardados para las próximas descargas
+        self.assertEqual(Informe.objects.filter(estado_pdf=Informe.PDF_LISTO).count(), 3)
+
+    def test_consultas_constantes(self):
+        for informe in self.informes[1:]:
+            generar_pdf_informe(informe)
+
+        # Sondeo del máximo + la consulta con select_related (el hash lee el estado sin consulta extra)
+        with self.assertNumQueries(2):
+            contenido = b''.join(self.client.get(reverse('informe-exportar-zip')).streaming_content)
+        with zipfile.ZipFile(io.BytesIO(contenido)) as archivo_zip:
+            self.assertEqual(len(archivo_zip.namelist()), 3)
+
+    def test_zip_respeta_filtros(self):
+        otra = Sucursal.objects.create(nombre_sucursal='Sucursal Norte')
+        response = self.client.get(reverse('informe-exportar-zip'), {'codigo_sucursal': otra.codigo_sucursal})
+
+        contenido = b''.join(response.streaming_content)
+        with zipfile.ZipFile(io.BytesIO(contenido)) as archivo_zip:
+            self.assertEqual(archivo_zip.namelist(), [])
+
+
+class DescargaPDFTest(MantenTaskTestMixin, APITestCase):
+    """Entrega de PDFs según PROTECTED_MEDIA_MODE"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.crear_datos_base()
+        self.informe = self.crear_informe()
+        generar_pdf_informe(self.informe)
+        self.url = reverse('informe-descargar-pdf', args=[self.informe.pk])
+
+    def test_modo_django_transmite_el_archivo(self):
+        with override_settings(PROTECTED_MEDIA_MODE='django'):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with self.informe.archivo_pdf.open('rb') as archivo:
+            self.assertEqual(b''.join(response.streaming_content), archivo.read())
+        response.close()
+
+    def test_modo_nginx_delega_con_x_accel_redirect(self):
+        with override_settings(PROTECTED_MEDIA_MODE='nginx'):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.informe.archivo_pdf.name}')
+        self.assertEqual(response.content, b'')
+        self.assertIn('attachment', response['Content-Disposition'])
+
+    def test_range_responde_206_parcial(self):
+        with self.informe.archivo_pdf.open('rb') as archivo:
+            contenido = archivo.read()
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(contenido)}')
+        self.assertEqual(b''.join(response.streaming_content), contenido[10:20])
+
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(contenido)}-')
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+    def test_revalidacion_con_etag_y_last_modified(self):
+        response = self.client.get(self.url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        response.close()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # If-Range con un ETag viejo: se ignora el rango y se envía el archivo completo
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"viejo"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response.close()
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    EMAIL_RATE_LIMIT_PER_MINUTE=0,
+)
+class BandejaSalidaCorreoTest(MantenTaskTestMixin, APITestCase):
+    """Los requests solo encolan correos; el worker los envía"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.crear_datos_base()
+        self.client.force_authenticate(user=self.encargado)
+
+    def procesar_cola(self, **opciones):
+        call_command('process_email_queue', once=True, stdout=io.StringIO(), **opciones)
+
+    def test_nueva_solicitud_encola_y_el_worker_envia(self):
+        """Crear una solicitud no envía nada en el request; el worker sí"""
+        response = self.client.post(reverse('solicitud-list'), {
+            'codigo_maquinaria': self.maquina.codigo_maquinaria,
+            'descripcion': 'Ruido anormal en el motor',
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(EventoNotificacion.objects.filter(agrupado_en__isnull=True).count(), 1)
+
+        self.procesar_cola(digest_window=0)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.ingeniero.correo_electronico])
+        self.assertEqual(CorreoSaliente.objects.get().estado, CorreoSaliente.ENVIADO)
+
+    def test_enviar_informe_adjunta_el_pdf_al_enviar(self):
+        """enviar_por_correo responde 202 y el worker adjunta el PDF del informe"""
+        informe = self.crear_informe()
+        self.client.force_authenticate(user=self.ingeniero)
+        response = self.client.post(
+            reverse('informe-enviar-por-correo', args=[informe.pk]),
+            {'email': 'cliente@example.com'},
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.procesar_cola()
+
+        self.assertEqual(len(mail.outbox), 1)
+        nombre, contenido, tipo = mail.outbox[0].attachments[0]
+        self.assertTrue(contenido.startswith(b'%PDF'))
+        self.assertEqual(tipo, 'application/pdf')
+
+    def test_limite_por_minuto(self):
+        """El worker no supera el límite de correos por minuto"""
+        for n in range(3):
+            encolar_correo(f'Aviso {n}', 'Cuerpo', ['destino@example.com'])
+
+        self.procesar_cola(rate_limit=2)
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(CorreoSaliente.objects.filter(estado=CorreoSaliente.PENDIENTE).count(), 1)
+
+    def test_error_smtp_reprograma_con_espera(self):
+        """Un error SMTP deja el correo pendiente con espera exponencial"""
+        correo = encolar_correo('Aviso', 'Cuerpo', ['destino@example.com'])
+        connection = mail.get_connection()
+
+        with mock.patch.object(connection, 'send_messages', side_effect=smtplib.SMTPServerDisconnected('caído')):
+            with self.assertLogs('api.outbox', level='WARNING'):
+                self.assertEqual(enviar_correos(reclamar_correos(5), connection), (0, 1))
+
+        correo.refresh_from_db()
+        self.assertEqual(correo.estado, CorreoSaliente.PENDIENTE)
+        self.assertEqual(correo.intentos, 1)
+        self.assertGreater(correo.disponible_desde, timezone.now())
+        self.assertEqual(reclamar_correos(5), [])
+
+    def test_resumen_por_destinatario_y_ventana(self):
+        """Varias solicitudes dentro de la ventana generan un solo correo por ingeniero"""
+        otro = Usuario.objects.create_user(
+            username='mlopez',
+            password='ingeniero123',
+            correo_electronico='maria.lopez@mantentask.com',
+            codigo_tipo_usuario=1,
+            codigo_nivel_acceso=2,
+        )
+        for _ in range(3):
+            registrar_nueva_solicitud(self.crear_solicitud(codigo_estado_id=1))
+        self.assertEqual(EventoNotificacion.objects.count(), 6)
+
+        # La ventana aún no cierra: nada se agrupa
+        self.assertEqual(agrupar_notificaciones(ventana=300), (0, 0))
+
+        self.assertEqual(agrupar_notificaciones(ventana=0), (6, 2))
+        self.procesar_cola()
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(
+            sorted(correo.to[0] for correo in mail.outbox),
+            sorted([otro.correo_electronico, self.ingeniero.correo_electronico]),
+        )
+        for correo in mail.outbox:
+            self.assertEqual(correo.subject, '3 nuevas solicitudes de mantenimiento')
+        self.assertFalse(EventoNotificacion.objects.filter(agrupado_en__isnull=True).exists())
+
+
+class SolicitudSucursalDenormalizadaTest(MantenTaskTestMixin, APITestCase):
+    """Solicitud.codigo_sucursal sigue a la sucursal de su máquina"""
+
+    def setUp(self):
+        self.crear_datos_base()
+        self.otra_sucursal = Sucursal.objects.create(nombre_sucursal='Sucursal Norte')
+        self.client.force_authenticate(user=self.encargado)
+
+    def test_hereda_y_sigue_a_la_maquina(self):
+        solicitud = self.crear_solicitud()
+        self.assertEqual(solicitud.codigo_sucursal_id, self.sucursal.pk)
+
+        self.maquina.codigo_sucursal = self.otra_sucursal
+        self.maquina.save()
+
+        solicitud.refresh_from_db()
+        self.assertEqual(solicitud.codigo_sucursal_id, self.otra_sucursal.pk)
+
+    def test_filtros_por_sucursal_usan_la_columna(self):
+        propia = self.crear_solicitud()
+        maquina_norte = Maquina.objects.create(
+            codigo_sucursal=self.otra_sucursal,
+            modelo='Torno CNC',
+            marca='Haas',
+            fecha_compra=date(2024, 2, 1),
+            fecha_instalacion=date(2024, 2, 10),
+        )
+        self.crear_solicitud(codigo_maquinaria=maquina_norte)
+
+        response = self.client.get(reverse('solicitud-list'), {
+            'codigo_maquinaria__codigo_sucursal': self.sucursal.pk,
+        })
+        self.assertEqual([s['codigo_solicitud'] for s in response.data['results']], [propia.pk])
+
+        response = self.client.get(reverse('solicitud-por-sucursal'), {'codigo_sucursal': self.sucursal.pk})
+        self.assertEqual([s['codigo_solicitud'] for s in response.data['results']], [propia.pk])
+
+    def test_comando_de_consistencia(self):
+        solicitud = self.crear_solicitud()
+        Solicitud.objects.filter(pk=solicitud.pk).update(codigo_sucursal=self.otra_sucursal)
+
+        with self.assertRaises(CommandError):
+            call_command('check_solicitud_sucursal', stdout=io.StringIO())
+
+        call_command('check_solicitud_sucursal', fix=True, stdout=io.StringIO())
+        solicitud.refresh_from_db()
+        self.assertEqual(solicitud.codigo_sucursal_id, self.sucursal.pk)
+
+
+class ListadosSolicitudTest(MantenTaskTestMixin, APITestCase):
+    """Las acciones de listado paginan y admiten ?stream=1"""
+
+    def setUp(self):
+        self.crear_datos_base()
+        for _ in range(12):
+            self.crear_solicitud(codigo_estado_id=1)
+        self.crear_solicitud(codigo_estado_id=3)
+        self.client.force_authenticate(user=self.encargado)
+
+    def test_acciones_paginadas(self):
+        for nombre, esperadas in [
+            ('solicitud-pendientes', 12),
+            ('solicitud-completadas', 1),
+            ('solicitud-por-encargados', 13),
+        ]:
+            response = self.client.get(reverse(nombre))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data['count'], esperadas)
+            self.assertLessEqual(len(response.data['results']), 10)
+
+        response = self.client.get(reverse('solicitud-por-sucursal'), {'codigo_sucursal': self.sucursal.pk})
+        self.assertEqual(response.data['count'], 13)
+
+    @override_settings(LIST_STREAM_CHUNK_SIZE=5)
+    def test_stream_devuelve_todas_las_filas(self):
+        response = self.client.get(reverse('solicitud-pendientes'), {'stream': '1'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        filas = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(filas), 12)
+        paginada = self.client.get(reverse('solicitud-pendientes'))
+        self.assertEqual(filas[:10], json.loads(json.dumps(paginada.data['results'])))
+
+
+class PaginacionCursorTest(MantenTaskTestMixin, APITestCase):
+    """?paginacion=cursor recorre los listados con cursores estables"""
+
+    def setUp(self):
+        self.crear_datos_base()
+        self.solicitudes = [self.crear_solicitud(codigo_estado_id=1) for _ in range(25)]
+        # Empates en la fecha: el pk desempata
+        misma_fecha = timezone.now() - timedelta(days=1)
+        Solicitud.objects.filter(pk__in=[s.pk for s in self.solicitudes[5:12]]).update(fecha_creacion=misma_fecha)
+        self.client.force_authenticate(user=self.encargado)
+
+    def recorrer(self, url, params):
+        vistos, paginas = [], 0
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            vistos += [fila['codigo_solicitud'] for fila in response.data['results']]
+            paginas += 1
+            if not response.data['next']:
+                return vistos, paginas, response
+            response = self.client.get(response.data['next'])
+
+    def test_recorre_todo_sin_repetir_ni_saltar(self):
+        vistos, paginas, ultima = self.recorrer(reverse('solicitud-list'), {'paginacion': 'cursor'})
+
+        esperados = list(
+            Solicitud.objects.order_by('-fecha_creacion', '-codigo_solicitud').values_list('pk', flat=True)
+        )
+        self.assertEqual(vistos, esperados)
+        self.assertEqual(paginas, 3)
+
+        anterior = self.client.get(ultima.data['previous'])
+        self.assertEqual([f['codigo_solicitud'] for f in anterior.data['results']], esperados[10:20])
+
+    def test_respeta_filtros_y_ordering(self):
+        Solicitud.objects.filter(pk__in=[s.pk for s in self.solicitudes[:4]]).update(codigo_estado_id=3)
+        vistos, _, _ = self.recorrer(reverse('solicitud-list'), {
+            'paginacion': 'cursor', 'codigo_estado': 1, 'ordering': 'fecha_actualizacion',
+        })
+        esperados = list(
+            Solicitud.objects.filter(codigo_estado=1)
+            .order_by('fecha_actualizacion', 'codigo_solicitud').values_list('pk', flat=True)
+        )
+        self.assertEqual(vistos, esperados)
+
+    def test_cursor_invalido(self):
+        response = self.client.get(reverse('solicitud-list'), {'cursor': 'no-es-un-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_informes_por_cursor(self):
+        for solicitud in self.solicitudes[:12]:
+            self.crear_informe(solicitud)
+        self.client.force_authenticate(user=self.ingeniero)
+
+        vistos, paginas, _ = self.recorrer(reverse('informe-list'), {'paginacion': 'cursor'})
+
+        self.assertEqual(paginas, 2)
+        self.assertEqual(vistos, list(
+            Informe.objects.order_by('-fecha_informe', '-codigo_solicitud').values_list('pk', flat=True)
+        ))
+
+
+
+class ConsultasListadoTest(MantenTaskTestMixin, APITestCase):
+    """
+    Cada listado hace un número fijo de consultas, sin importar cuántas filas devuelva
+
+    Si una relación nueva del serializer no entra en select_related (o un
+    SerializerMethodField consulta por fila), el conteo crece con las filas y
+    la prueba falla.
+    """
+    TAMANOS = (1, 10, 100)
+
+    def setUp(self):
+        self.crear_datos_base()
+        catalogos.precargar()
+        self.sembradas = 0
+        # Una sola página con todas las filas, para que el N+1 se note
+        parche = mock.patch.object(PageNumberPagination, 'page_size', 500)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def sembrar_hasta(self, total):
+        """Por fila: una máquina, un encargado, una solicitud pendiente y una completada con informe"""
+        nuevas = range(self.sembradas, total)
+        maquinas = Maquina.objects.bulk_create([
+            Maquina(codigo_sucursal=self.sucursal, modelo=f'Modelo {i}', marca='Marca',
+                    fecha_compra=date(2024, 1, 1), fecha_instalacion=date(2024, 1, 2))
+            for i in nuevas
+        ])
+        encargados = Usuario.objects.bulk_create([
+            Usuario(username=f'encargado{i}', correo_electronico=f'encargado{i}@mantentask.com',
+                    apellido_paterno='Soto', apellido_materno='Vera', codigo_sucursal=self.sucursal,
+                    codigo_tipo_usuario=2, codigo_nivel_acceso=2)
+            for i in nuevas
+        ])
+        solicitudes = Solicitud.objects.bulk_create([
+            Solicitud(codigo_maquinaria=maquina, codigo_sucursal=self.sucursal, id_usuario=encargado,
+                      ingeniero_asignado=self.ingeniero, descripcion='Falla', codigo_estado_id=estado)
+            for maquina, encargado in zip(maquinas, encargados)
+            for estado in (1, 3)
+        ])
+        Informe.objects.bulk_create([
+            Informe(codigo_solicitud=solicitud, codigo_maquinaria=solicitud.codigo_maquinaria,
+                    id_usuario=self.ingeniero, descripcion='Reparada')
+            for solicitud in solicitudes if solicitud.codigo_estado_id == 3
+        ])
+        # bulk_create no dispara señales: se invalida a mano, como tras una carga masiva
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidar('maquinas')
+        self.sembradas = total
+
+    def assertConsultasConstantes(self, casos):
+        """casos: (consultas esperadas, nombre de la ruta, params, usuario)"""
+        for total in self.TAMANOS:
+            self.sembrar_hasta(total)
+            for consultas, nombre, params, usuario in casos:
+                self.client.force_authenticate(user=usuario or self.encargado)
+                with self.subTest(endpoint=nombre, params=params, filas=total):
+                    with self.assertNumQueries(consultas):
+                        response = self.client.get(reverse(nombre), params or {})
+                        if response.streaming:
+                            filas = json.loads(b''.join(response.streaming_content))
+                        else:
+                            filas = response.data['results'] if isinstance(response.data, dict) else response.data
+                    self.assertEqual(response.status_code, status.HTTP_200_OK)
+                    self.assertGreaterEqual(len(filas), total)
+
+    def test_listados_de_solicitudes(self):
+        sucursal = {'codigo_sucursal': self.sucursal.pk}
+        # COUNT + página (tiene_informe viaja en la misma consulta como EXISTS)
+        self.assertConsultasConstantes([
+            (2, 'solicitud-list', None, None),
+            (2, 'solicitud-pendientes', None, None),
+            (2, 'solicitud-completadas', None, None),
+            (2, 'solicitud-por-encargados', None, None),
+            (2, 'solicitud-por-sucursal', sucursal, None),
+            (1, 'solicitud-list', {'paginacion': 'cursor'}, None),
+            (1, 'solicitud-pendientes', {'stream': '1'}, None),
+        ])
+
+    def test_listados_de_informes_usuarios_y_maquinas(self):
+        self.assertConsultasConstantes([
+            (2, 'informe-list', None, self.ingeniero),
+            (2, 'usuario-list', None, None),
+            (1, 'usuario-encargados', None, None),
+            (2, 'maquina-list', None, None),
+        ])
+
+    def test_tiene_informe_anotado(self):
+        self.sembrar_hasta(3)
+        self.client.force_authenticate(user=self.encargado)
+
+        response = self.client.get(reverse('solicitud-list'))
+
+        esperado = {s.pk: hasattr(s, 'informe') for s in Solicitud.objects.all()}
+        self.assertEqual({f['codigo_solicitud']: f['tiene_informe'] for f in response.data['results']}, esperado)
+        self.assertEqual(sorted(esperado.values()), [False] * 3 + [True] * 3)
+
+
+class GeneradorCargaTest(TestCase):
+    """generate_load_data: determinista, consistente y con fixtures reutilizables"""
+
+    def generar(self, **opciones):
+        datos = dict(sucursales=3, maquinas=20, usuarios=12, solicitudes=300, seed=5, chunk=64)
+        datos.update(opciones)
+        return generar_datos(salida=OutputWrapper(io.StringIO()), **datos)
+
+    def huella(self):
+        return list(Solicitud.objects.order_by('pk').values_list(
+            'codigo_maquinaria', 'id_usuario', 'ingeniero_asignado', 'codigo_estado', 'fecha_creacion'
+        ))
+
+    def test_misma_semilla_mismos_datos(self):
+        self.generar()
+        primera = self.huella()
+        for modelo in (Solicitud, Maquina, Usuario, Sucursal):
+            modelo.objects.all().delete()
+
+        self.generar()
+
+        self.assertEqual(self.huella(), primera)
+
+    def test_datos_consistentes(self):
+        resumen = self.generar()
+
+        self.assertEqual(resumen['solicitudes'], 300)
+        self.assertEqual(Solicitud.objects.count(), 300)
+        self.assertEqual(Informe.objects.count(), resumen['informes'])
+        self.assertFalse(solicitudes_inconsistentes().exists())
+        self.assertFalse(Informe.objects.exclude(codigo_solicitud__codigo_estado=3).exists())
+        self.assertFalse(Solicitud.objects.filter(ingeniero_asignado__codigo_tipo_usuario=2).exists())
+        self.assertFalse(Solicitud.objects.filter(fecha_actualizacion__lt=F('fecha_creacion')).exists())
+
+    def test_create_posterior_no_choca_con_los_pk_generados(self):
+        self.generar()
+
+        sucursal = Sucursal.objects.create(nombre_sucursal='Sucursal Nueva')
+        solicitud = Solicitud.objects.create(
+            codigo_maquinaria=Maquina.objects.first(), id_usuario=Usuario.objects.first(),
+            descripcion='Después de generar',
+        )
+
+        self.assertGreater(sucursal.pk, Sucursal.objects.exclude(pk=sucursal.pk).aggregate(m=Max('pk'))['m'])
+        self.assertGreater(solicitud.pk, Solicitud.objects.exclude(pk=solicitud.pk).aggregate(m=Max('pk'))['m'])
+
+    def test_fixtures_se_pueden_cargar(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        out = io.StringIO()
+        call_command('generate_load_data', '--solicitudes', '50', '--maquinas', '5', '--usuarios', '4',
+                     '--sucursales', '2', '--fixtures', directorio, stdout=out)
+        esperadas = Solicitud.objects.count()
+        Sucursal.objects.all().delete()
+        Usuario.objects.all().delete()
+
+        call_command('loaddata', *[f'{directorio}/{nombre}.jsonl' for nombre in ORDEN_FIXTURES], verbosity=0)
+
+        self.assertEqual(Solicitud.objects.count(), esperadas)
+        self.assertFalse(solicitudes_inconsistentes().exists())
+        self.assertIn('loaddata', out.getvalue())
+
+
+class EstadisticasPanelTest(MantenTaskTestMixin, APITestCase):
+    """/api/admin-dashboard/estadisticas/: agregados en la base y caché invalidado al escribir"""
+
+    def setUp(self):
+        cache.clear()
+        self.crear_datos_base()
+        Estado.objects.create(codigo_estado=4, nombre_estado='Cancelado')
+        self.otra_sucursal = Sucursal.objects.create(nombre_sucursal='Sucursal Norte')
+        self.otra_maquina = Maquina.objects.create(
+            codigo_sucursal=self.otra_sucursal, modelo='Torno', marca='Haas',
+            fecha_compra=date(2024, 1, 1), fecha_instalacion=date(2024, 1, 2),
+        )
+        for estado in (1, 1, 2, 3):
+            self.crear_solicitud(codigo_estado_id=estado)
+        self.crear_solicitud(codigo_estado_id=4, codigo_maquinaria=self.otra_maquina, ingeniero_asignado=None)
+        self.url = reverse('admin-dashboard-estadisticas')
+        self.client.force_authenticate(user=self.encargado)
+
+    def test_totales_y_desgloses(self):
+        response = self.client.get(self.url, {'dias': 7})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        datos = response.data
+        self.assertEqual(datos['total_solicitudes'], 5)
+        self.assertEqual(
+            [datos['solicitudes_pendientes'], datos['solicitudes_en_proceso'],
+             datos['solicitudes_completadas'], datos['solicitudes_canceladas']],
+            [2, 1, 1, 1],
+        )
+        self.assertEqual(datos['total_sucursales'], 2)
+        centro, norte = datos['por_sucursal']
+        self.assertEqual((centro['nombre_sucursal'], centro['total'], centro['pendientes']), ('Sucursal Centro', 4, 2))
+        self.assertEqual((norte['total'], norte['canceladas']), (1, 1))
+        self.assertEqual(datos['por_ingeniero'], [{
+            'ingeniero_asignado': self.ingeniero.pk, 'username': 'jperez',
+            'total': 4, 'pendientes': 2, 'en_proceso': 1, 'completadas': 1, 'canceladas': 0,
+        }])
+        self.assertEqual(len(datos['por_dia']), 7)
+        self.assertEqual(datos['por_dia'][-1], {'dia': timezone.localdate(), 'creadas': 5, 'completadas': 1})
+        self.assertEqual(sum(dia['creadas'] for dia in datos['por_dia'][:-1]), 0)
+
+    def test_cache_e_invalidacion(self):
+        with self.assertNumQueries(7):
+            self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).data['total_solicitudes'], 5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.crear_solicitud(codigo_estado_id=1)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['total_solicitudes'], 6)
+        self.assertEqual(response.data['solicitudes_pendientes'], 3)
+
+    def test_desalojar_la_version_no_revive_entradas_viejas(self):
+        self.assertEqual(self.client.get(self.url).data['total_solicitudes'], 5)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.crear_solicitud(codigo_estado_id=1)
+        self.assertEqual(self.client.get(self.url).data['total_solicitudes'], 6)
+
+        # El caché desaloja la versión (MAX_ENTRIES, reinicio de Redis...)
+        cache.delete('version:solicitudes')
+
+        self.assertEqual(self.client.get(self.url).data['total_solicitudes'], 6)
+
+    def test_solo_administradores(self):
+        self.client.force_authenticate(user=self.ingeniero)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ResumenDiarioTest(MantenTaskTestMixin, APITestCase):
+    """EstadisticaDiaria: mantenido por señales, reconstruible y expuesto en /api/estadisticas-diarias/"""
+
+    def setUp(self):
+        self.crear_datos_base()
+        Estado.objects.create(codigo_estado=4, nombre_estado='Cancelado')
+        self.hoy = timezone.localdate()
+        self.url = reverse('estadistica-diaria-list')
+
+    def resumen_de_hoy(self):
+        return EstadisticaDiaria.objects.get(fecha=self.hoy, codigo_sucursal=self.sucursal)
+
+    def test_senales_acumulan_creaciones_y_transiciones(self):
+        primera = self.crear_solicitud(codigo_estado_id=1)
+        segunda = self.crear_solicitud(codigo_estado_id=1)
+        self.crear_solicitud(codigo_estado_id=1).delete()
+
+        self.client.force_authenticate(user=self.ingeniero)
+        self.client.post(reverse('solicitud-cambiar-estado', args=[primera.pk]), {'codigo_estado': 2}, format='json')
+        self.client.post(reverse('solicitud-cambiar-estado', args=[primera.pk]), {'codigo_estado': 3}, format='json')
+        segunda.codigo_estado_id = 4
+        segunda.save()
+        segunda.save()
+
+        resumen = self.resumen_de_hoy()
+        self.assertEqual((resumen.creadas, resumen.completadas, resumen.canceladas), (3, 1, 1))
+        self.assertEqual((resumen.delta_pendientes, resumen.delta_en_proceso), (0, 0))
+
+    def test_backlog_de_dias_anteriores(self):
+        ayer = self.hoy - timedelta(days=1)
+        EstadisticaDiaria.objects.create(
+            fecha=ayer, codigo_sucursal=self.sucursal, creadas=3, delta_pendientes=2, delta_en_proceso=1,
+        )
+        self.crear_solicitud(codigo_estado_id=1)
+        self.crear_solicitud(codigo_estado_id=1)
+        self.crear_solicitud(codigo_estado_id=2)
+        self.crear_solicitud(codigo_estado_id=3)
+
+        antier, ayer_, hoy = serie_diaria(ayer - timedelta(days=1), self.hoy)
+
+        self.assertEqual(hoy['backlog'], {'pendientes': 2, 'en_proceso': 1})
+        self.assertEqual((hoy['creadas'], hoy['completadas']), (4, 1))
+        self.assertEqual(ayer_['backlog'], {'pendientes': 0, 'en_proceso': 0})
+        self.assertEqual(antier['backlog'], {'pendientes': -2, 'en_proceso': -1})
+
+    def test_rango_pasado_lee_solo_sus_dias_y_un_agregado(self):
+        for dias, pendientes in ((10, 3), (5, 2), (2, -1)):
+            EstadisticaDiaria.objects.create(
+                fecha=self.hoy - timedelta(days=dias), codigo_sucursal=self.sucursal,
+                creadas=abs(pendientes), delta_pendientes=pendientes,
+            )
+        self.crear_solicitud(codigo_estado_id=1)
+        desde, hasta = self.hoy - timedelta(days=10), self.hoy - timedelta(days=5)
+
+        with CaptureQueriesContext(connection) as consultas:
+            serie = serie_diaria(desde, hasta)
+
+        self.assertEqual(len(consultas), 3)
+        self.assertIn('SUM', consultas[2]['sql'].upper())
+        self.assertEqual(len(serie), 6)
+        # El backlog al cierre de `hasta` coincide con el de la serie que llega hasta hoy
+        self.assertEqual(serie[-1]['backlog']['pendientes'], serie_diaria(hasta, self.hoy)[0]['backlog']['pendientes'])
+        self.assertEqual(serie[0]['backlog']['pendientes'], serie[-1]['backlog']['pendientes'] - 2)
+
+    def test_traslado_de_maquina_mueve_el_backlog(self):
+        ayer = self.hoy - timedelta(days=1)
+        for estado in (1, 2, 3):
+            self.crear_solicitud(codigo_estado_id=estado)
+        antes = serie_diaria(ayer, self.hoy, self.sucursal.pk)
+        otra = Sucursal.objects.create(nombre_sucursal='Sucursal Norte')
+
+        self.maquina.codigo_sucursal = otra
+        self.maquina.save()
+
+        vacio = {'pendientes': 0, 'en_proceso': 0}
+        origen = serie_diaria(ayer, self.hoy, self.sucursal.pk)
+        destino = serie_diaria(ayer, self.hoy, otra.pk)
+        self.assertEqual(origen[0]['backlog'], antes[0]['backlog'])
+        self.assertEqual(origen[1]['backlog'], vacio)
+        self.assertEqual(destino[0]['backlog'], vacio)
+        self.assertEqual(destino[1]['backlog'], {'pendientes': 1, 'en_proceso': 1})
+        # El total de todas las sucursales no cambia
+        self.assertEqual(serie_diaria(ayer, self.hoy)[1]['backlog'], antes[1]['backlog'])
+
+    def test_reconstruir_coincide_con_las_senales(self):
+        for estado in (1, 1, 2, 3, 4):
+            self.crear_solicitud(codigo_estado_id=estado)
+        antes = self.resumen_de_hoy()
+
+        self.assertEqual(reconstruir(self.hoy - timedelta(days=7), self.hoy), 1)
+
+        despues = self.resumen_de_hoy()
+        campos = ['creadas', 'completadas', 'canceladas', 'delta_pendientes', 'delta_en_proceso']
+        self.assertEqual([getattr(despues, c) for c in campos], [getattr(antes, c) for c in campos])
+
+    def test_comando_rebuild_daily_stats(self):
+        self.crear_solicitud(codigo_estado_id=1)
+        EstadisticaDiaria.objects.all().delete()
+
+        salida = io.StringIO()
+        call_command('rebuild_daily_stats', stdout=salida)
+
+        self.assertIn('1 filas', salida.getvalue())
+        self.assertEqual(self.resumen_de_hoy().creadas, 1)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_daily_stats', '--desde', '2024-13-01', stdout=io.StringIO())
+
+    def test_endpoint_restringe_sucursal_y_valida_parametros(self):
+        self.crear_solicitud(codigo_estado_id=1)
+        otra = Sucursal.objects.create(nombre_sucursal='Sucursal Norte')
+        self.client.force_authenticate(user=self.ingeniero)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'desde': self.hoy - timedelta(days=6)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['codigo_sucursal'], self.sucursal.pk)
+        self.assertEqual(len(response.data['dias']), 7)
+        self.assertEqual(response.data['dias'][-1]['backlog']['pendientes'], 1)
+
+        self.assertEqual(self.client.get(self.url, {'codigo_sucursal': otra.pk}).status_code,
+                         status.HTTP_403_FORBIDDEN)
+        for parametros in ({'desde': 'ayer'}, {'desde': '2024-02-30'}, {'codigo_sucursal': 'x'},
+                           {'desde': '2020-01-01', 'hasta': '2024-01-01'}):
+            self.assertEqual(self.client.get(self.url, parametros).status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(user=self.encargado)
+        self.assertEqual(self.client.get(self.url, {'codigo_sucursal': otra.pk}).status_code, status.HTTP_200_OK)
+
+
+class HistorialEstadosTest(MantenTaskTestMixin, APITestCase):
+    """TransicionEstado: una fila por creación/cambio y percentiles de tiempo en estado"""
+
+    def setUp(self):
+        cache.clear()
+        self.crear_datos_base()
+        self.client.force_authenticate(user=self.ingeniero)
+
+    def cambiar_estado(self, solicitud, estado):
+        return self.client.post(
+            reverse('solicitud-cambiar-estado', args=[solicitud.pk]), {'codigo_estado': estado}, format='json'
+        )
+
+    def test_creacion_y_cambios_quedan_registrados(self):
+        solicitud = self.crear_solicitud(codigo_estado_id=1)
+        self.cambiar_estado(solicitud, 2)
+        self.cambiar_estado(solicitud, 3)
+        solicitud.refresh_from_db()
+        solicitud.descripcion = 'Sin cambio de estado'
+        solicitud.save()
+
+        historial = list(solicitud.transiciones.values_list('estado_anterior', 'estado_nuevo', 'usuario'))
+        self.assertEqual(historial, [
+            (None, 1, self.encargado.pk), (1, 2, self.ingeniero.pk), (2, 3, self.ingeniero.pk),
+        ])
+        with self.assertRaises(ValueError):
+            solicitud.transiciones.first().save()
+
+    def test_transicion_en_la_misma_transaccion(self):
+        solicitud = self.crear_solicitud(codigo_estado_id=1)
+        solicitud.codigo_estado_id = 2
+        with mock.patch('api.signals.registrar_transicion', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                solicitud.save()
+
+        self.assertEqual(Solicitud.objects.get(pk=solicitud.pk).codigo_estado_id, 1)
+        self.assertEqual(solicitud.transiciones.count(), 1)
+
+    def test_borrar_estado_con_historial(self):
+        Estado.objects.create(codigo_estado=4, nombre_estado='Cancelado')
+        solicitud = self.crear_solicitud(codigo_estado_id=1)
+        solicitud.codigo_estado_id = 4
+        solicitud.save()
+
+        response = self.client.delete(reverse('estado-detail', args=[4]))
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(Solicitud.objects.get(pk=solicitud.pk).codigo_estado_id, 1)
+        self.assertEqual(list(solicitud.transiciones.values_list('estado_anterior', 'estado_nuevo')),
+                         [(None, 1), (1, None)])
+
+    def test_percentiles_por_sucursal_e_ingeniero(self):
+        inicio = timezone.now() - timedelta(days=5)
+        for horas in range(1, 11):
+            solicitud = self.crear_solicitud(codigo_estado_id=1)
+            solicitud.transiciones.all().delete()
+            TransicionEstado.objects.bulk_create([
+                TransicionEstado(solicitud=solicitud, estado_nuevo_id=1, codigo_sucursal=self.sucursal,
+                                 ingeniero_asignado=self.ingeniero, fecha=inicio),
+                TransicionEstado(solicitud=solicitud, estado_anterior_id=1, estado_nuevo_id=2,
+                                 codigo_sucursal=self.sucursal, ingeniero_asignado=self.ingeniero,
+                                 fecha=inicio + timedelta(hours=horas)),
+            ])
+
+        with self.assertNumQueries(1):
+            tiempos = tiempos_en_estado(inicio - timedelta(days=1))
+
+        self.assertEqual(tiempos['por_sucursal'], [{
+            'codigo_sucursal': self.sucursal.pk, 'nombre_sucursal': 'Sucursal Centro', 'codigo_estado': 1,
+            'transiciones': 10, 'p50_horas': 5.0, 'p90_horas': 9.0, 'p99_horas': 10.0,
+        }])
+        self.assertEqual(tiempos['por_ingeniero'], [{
+            'ingeniero_asignado': self.ingeniero.pk, 'username': 'jperez', 'codigo_estado': 1,
+            'transiciones': 10, 'p50_horas': 5.0, 'p90_horas': 9.0, 'p99_horas': 10.0,
+        }])
+        # Las estancias iniciadas antes de `desde` no cuentan
+        self.assertEqual(tiempos_en_estado(inicio + timedelta(minutes=1))['por_sucursal'], [])
+
+    def test_endpoint_solo_administradores(self):
+        url = reverse('admin-dashboard-tiempos-estado')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.encargado)
+        self.cambiar_estado(self.crear_solicitud(codigo_estado_id=1), 3)
+        response = self.client.get(url, {'dias': 7})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([fila['codigo_estado'] for fila in response.data['por_sucursal']], [1])
+        self.assertEqual(self.client.get(url, {'dias': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_backfill_y_reconstruir_resumen(self):
+        Solicitud.objects.bulk_create([
+            Solicitud(codigo_maquinaria=self.maquina, codigo_sucursal=self.sucursal, id_usuario=self.encargado,
+                      descripcion='Cargada sin señales', codigo_estado_id=estado)
+            for estado in (1, 2, 3)
+        ])
+
+        salida = io.StringIO()
+        call_command('backfill_state_transitions', stdout=salida)
+
+        self.assertIn('5 transiciones', salida.getvalue())
+        self.assertTrue(TransicionEstado.objects.filter(reconstruida=True).exists())
+        self.assertEqual(reconstruir_historial(), 0)
+        reconstruir(timezone.localdate(), timezone.localdate())
+        resumen = EstadisticaDiaria.objects.get()
+        self.assertEqual((resumen.creadas, resumen.completadas, resumen.delta_pendientes, resumen.delta_en_proceso),
+                         (3, 1, 1, 1))
+
+
+class OperacionesMasivasTest(MantenTaskTestMixin, APITestCase):
+    """cambiar-estado-masivo / asignar-ingeniero-masivo: mismas reglas, una transacción, resultado por id"""
+
+    def setUp(self):
+        self.crear_datos_base()
+        self.url_estado = reverse('solicitud-cambiar-estado-masivo')
+        self.url_asignar = reverse('solicitud-asignar-ingeniero-masivo')
+        self.client.force_authenticate(user=self.encargado)
+
+    def test_cambio_de_estado_masivo(self):
+        ids = [self.crear_solicitud(codigo_estado_id=1).pk for _ in range(3)]
+        ya_en_proceso = self.crear_solicitud(codigo_estado_id=2).pk
+
+        response = self.client.post(self.url_estado, {'ids': ids + [ya_en_proceso, 999], 'codigo_estado': 2},
+                                    format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['actualizadas'], 3)
+        self.assertEqual([r['ok'] for r in response.data['resultados']], [True, True, True, True, False])
+        self.assertEqual(response.data['resultados'][-1]['error'], 'Solicitud no encontrada')
+        self.assertEqual(Solicitud.objects.filter(codigo_estado=2).count(), 4)
+        self.assertEqual(TransicionEstado.objects.filter(estado_anterior=1, estado_nuevo=2).count(), 3)
+        resumen = EstadisticaDiaria.objects.get()
+        self.assertEqual((resumen.delta_pendientes, resumen.delta_en_proceso), (0, 4))
+        # Un solo correo para el creador de las tres
+        self.assertEqual(CorreoSaliente.objects.count(), 1)
+
+    def test_ingeniero_solo_asignadas_y_sin_retroceder(self):
+        self.client.force_authenticate(user=self.ingeniero)
+        asignada = self.crear_solicitud(codigo_estado_id=1)
+        ajena = self.crear_solicitud(codigo_estado_id=1, ingeniero_asignado=None)
+        completada = self.crear_solicitud(codigo_estado_id=3)
+
+        response = self.client.post(
+            self.url_estado, {'ids': [asignada.pk, ajena.pk, completada.pk], 'codigo_estado': 2}, format='json'
+        )
+
+        self.assertEqual([r['ok'] for r in response.data['resultados']], [True, False, False])
+        self.assertIn('asignadas a ti', response.data['resultados'][1]['error'])
+        self.assertIn('retroceder', response.data['resultados'][2]['error'])
+        self.assertEqual(Solicitud.objects.get(pk=completada.pk).codigo_estado_id, 3)
+        self.assertEqual(
+            self.client.post(self.url_asignar, {'ids': [asignada.pk], 'id_ingeniero': self.ingeniero.pk},
+                             format='json').status_code,
+            status.HTTP_403_FORBIDDEN,
+        )
+
+    def test_asignacion_masiva_con_consultas_constantes(self):
+        otro = Usuario.objects.create_user(
+            username='otro_ing', password='x', apellido_paterno='A', apellido_materno='B',
+            correo_electronico='otro@mantentask.com', codigo_tipo_usuario=1, codigo_nivel_acceso=2,
+        )
+        pocas = [self.crear_solicitud(codigo_estado_id=1).pk for _ in range(2)]
+        muchas = [self.crear_solicitud(codigo_estado_id=1).pk for _ in range(20)]
+
+        with CaptureQueriesContext(connection) as con_pocas:
+            self.client.post(self.url_asignar, {'ids': pocas, 'id_ingeniero': otro.pk}, format='json')
+        with CaptureQueriesContext(connection) as con_muchas:
+            response = self.client.post(self.url_asignar, {'ids': muchas, 'id_ingeniero': otro.pk}, format='json')
+
+        self.assertEqual(len(con_pocas), len(con_muchas))
+        self.assertEqual(response.data['actualizadas'], 20)
+        self.assertEqual(Solicitud.objects.filter(ingeniero_asignado=otro).count(), 22)
+
+    @override_settings(BULK_UPDATE_MAX_IDS=2)
+    def test_validaciones(self):
+        pk = self.crear_solicitud(codigo_estado_id=1).pk
+        casos = [
+            (self.url_estado, {'ids': [pk, pk + 1, pk + 2], 'codigo_estado': 2}, status.HTTP_400_BAD_REQUEST),
+            (self.url_estado, {'ids': [], 'codigo_estado': 2}, status.HTTP_400_BAD_REQUEST),
+            (self.url_estado, {'ids': ['x'], 'codigo_estado': 2}, status.HTTP_400_BAD_REQUEST),
+            (self.url_estado, {'ids': [pk], 'codigo_estado': 9}, status.HTTP_400_BAD_REQUEST),
+            (self.url_estado, {'ids': [pk]}, status.HTTP_400_BAD_REQUEST),
+            (self.url_asignar, {'ids': [pk], 'id_ingeniero': self.encargado.pk}, status.HTTP_404_NOT_FOUND),
+            (self.url_asignar, {'ids': [pk]}, status.HTTP_400_BAD_REQUEST),
+        ]
+        for url, datos, esperado in casos:
+            with self.subTest(datos=datos):
+                self.assertEqual(self.client.post(url, datos, format='json').status_code, esperado)
+
+
+class CatalogosCacheTest(MantenTaskTestMixin, APITestCase):
+    """Catálogos en caché del proceso, invalidados por señales; ETag y Cache-Control en sus endpoints"""
+
+    def setUp(self):
+        self.crear_datos_base()
+        cache.clear()
+
+    def test_lecturas_sin_consultas_e_invalidacion_al_guardar(self):
+        self.assertEqual(catalogos.obtener('estado', 2).nombre_estado, 'En Proceso')
+        with self.assertNumQueries(0):
+            self.assertEqual(catalogos.obtener('estado', '3').nombre_estado, 'Completado')
+            self.assertIsNone(catalogos.obtener('estado', 9))
+            self.assertIsNone(catalogos.obtener('estado', 'x'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            estado = Estado.objects.get(pk=2)
+            estado.nombre_estado = 'En Curso'
+            estado.save()
+        self.assertEqual(catalogos.obtener('estado', 2).nombre_estado, 'En Curso')
+
+    def test_estado_que_falta_en_el_caché_se_consulta(self):
+        # Otro proceso agregó estados que la copia local (sin cambio de marca) no tiene
+        catalogos.precargar()
+        for pk in (2, 3):
+            catalogos.filas('estado').pop(pk)
+        self.assertEqual(catalogos.obtener_o_consultar('estado', 2).nombre_estado, 'En Proceso')
+        self.assertIsNone(catalogos.obtener_o_consultar('estado', 9))
+        for pk in (2, 3):
+            catalogos.filas('estado').pop(pk, None)
+        solicitud = self.crear_solicitud(codigo_estado_id=2)
+        self.client.force_authenticate(user=self.encargado)
+
+        response = self.client.post(reverse('solicitud-cambiar-estado', args=[solicitud.pk]),
+                                    {'codigo_estado': 3}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.patch(reverse('solicitud-detail', args=[solicitud.pk]),
+                                     {'codigo_estado': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        cuerpos = list(CorreoSaliente.objects.order_by('pk').values_list('cuerpo', flat=True))
+        self.assertIn('Estado anterior: En Proceso', cuerpos[-2])
+        self.assertIn('Estado anterior: Completado', cuerpos[-1])
+
+    def test_serializer_consulta_filas_que_faltan_en_el_caché(self):
+        catalogos.precargar()
+        # Otro proceso crea el estado: aquí no llega ninguna señal ni cambia la marca
+        Estado.objects.bulk_create([Estado(codigo_estado=5, nombre_estado='En Espera')])
+        solicitud = self.crear_solicitud(codigo_estado_id=5)
+        self.client.force_authenticate(user=self.encargado)
+
+        response = self.client.get(reverse('solicitud-detail', args=[solicitud.pk]))
+
+        self.assertEqual(response.data['estado'], {'codigo_estado': 5, 'nombre_estado': 'En Espera'})
+        # La copia local se descartó: se relee una vez entera y luego ya no consulta
+        with self.assertNumQueries(1):
+            self.assertEqual(catalogos.obtener('estado', 5).nombre_estado, 'En Espera')
+        with self.assertNumQueries(0):
+            self.assertEqual(catalogos.obtener('estado', 5).nombre_estado, 'En Espera')
+
+    def test_listado_de_solicitudes_toma_estado_y_sucursal_del_catalogo(self):
+        self.crear_solicitud()
+        catalogos.precargar()
+        self.client.force_authenticate(user=self.encargado)
+
+        response = self.client.get(reverse('solicitud-list'))
+
+        fila = response.data['results'][0]
+        self.assertEqual(fila['estado'], {'codigo_estado': 3, 'nombre_estado': 'Completado'})
+        response = self.client.get(reverse('maquina-detail', args=[self.maquina.pk]))
+        self.assertEqual(response.data['sucursal']['nombre_sucursal'], 'Sucursal Centro')
+
+    def test_etag_y_cache_control(self):
+        url = reverse('estado-list')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=3600', response['Cache-Control'])
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        # Otra URL (filtros, página) tiene su propio ETag
+        self.assertNotEqual(self.client.get(url + '?page=1')['ETag'], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Estado.objects.create(codigo_estado=4, nombre_estado='Cancelado')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class LecturaLigeraTest(MantenTaskTestMixin, APITestCase):
+    """?fields= / ?expand= arman el listado con .values() y el mismo formato que SolicitudSerializer"""
+
+    def setUp(self):
+        self.crear_datos_base()
+        self.crear_informe(self.crear_solicitud(fecha_programada=date(2025, 3, 1)))
+        for _ in range(11):
+            self.crear_solicitud(codigo_estado_id=1, ingeniero_asignado=None)
+        self.url = reverse('solicitud-list')
+        self.client.force_authenticate(user=self.encargado)
+
+    def test_todos_los_campos_igual_que_el_serializer(self):
+        completo = self.client.get(self.url, {'page_size': 20})
+        ligero = self.client.get(self.url, {'page_size': 20, 'expand': 'maquina,usuario,ingeniero,estado'})
+
+        self.assertEqual(ligero.status_code, status.HTTP_200_OK)
+        self.assertEqual(ligero.data['count'], 12)
+        self.assertEqual(
+            json.loads(json.dumps(ligero.data['results'])), json.loads(json.dumps(completo.data['results']))
+        )
+
+    def test_fields_limita_y_sin_expand_no_hay_anidados(self):
+        response = self.client.get(self.url, {'fields': 'estado,codigo_solicitud,nombre_ingeniero'})
+        fila = response.data['results'][0]
+        self.assertEqual(list(fila), ['codigo_solicitud', 'nombre_ingeniero', 'estado'])
+
+        response = self.client.get(self.url, {'expand': 'maquina'})
+        fila = response.data['results'][0]
+        self.assertIn('maquina', fila)
+        self.assertNotIn('usuario', fila)
+        self.assertIn('nombre_usuario', fila)
+
+    def test_parametros_invalidos(self):
+        for parametros in ({'fields': 'codigo_solicitud,clave'}, {'expand': 'descripcion'}):
+            with self.subTest(parametros=parametros):
+                response = self.client.get(self.url, parametros)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn('error', response.data)
+
+    def test_cursor_y_stream(self):
+        vistas = []
+        siguiente = self.client.get(self.url, {'paginacion': 'cursor', 'page_size': 5, 'fields': 'descripcion'})
+        while True:
+            vistas += siguiente.data['results']
+            if not siguiente.data['next']:
+                break
+            siguiente = self.client.get(siguiente.data['next'])
+        self.assertEqual(len(vistas), 12)
+        self.assertEqual(list(vistas[0]), ['descripcion'])
+
+        response = self.client.get(reverse('solicitud-pendientes'), {'stream': '1', 'fields': 'codigo_solicitud'})
+        self.assertEqual(len(json.loads(b''.join(response.streaming_content))), 11)
+
+
+class CamposDispersosTest(MantenTaskTestMixin, APITestCase):
+    """?fields= en cualquier ViewSet: menos campos en la respuesta, menos columnas y joins en el SQL"""
+
+    def setUp(self):
+        self.crear_datos_base()
+        self.informe = self.crear_informe()
+        self.client.force_authenticate(user=self.encargado)
+
+    def consultar(self, url, parametros):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url, parametros)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, ' '.join(consulta['sql'] for consulta in consultas)
+
+    def test_usuario_solo_columnas_pedidas(self):
+        response, sql = self.consultar(
+            reverse('usuario-list'), {'fields': 'username,nombre_completo', 'search': 'crodriguez'}
+        )
+
+        self.assertEqual(response.data['results'], [
+            {'username': 'crodriguez', 'nombre_completo': self.encargado.get_full_name()},
+        ])
+        self.assertNotIn('"telefono"', sql)
+        self.assertNotIn('"date_joined"', sql)
+
+    def test_relaciones_no_pedidas_no_se_unen(self):
+        url = reverse('informe-detail', args=[self.informe.pk])
+        response, sql = self.consultar(url, {'fields': 'codigo_informe,pdf_status,archivo_pdf_url'})
+        self.assertEqual(list(response.data), ['codigo_informe', 'archivo_pdf_url', 'pdf_status'])
+        self.assertNotIn('JOIN', sql)
+
+        response, sql = self.consultar(url, {'fields': 'codigo_informe,maquina'})
+        self.assertEqual(response.data['maquina']['modelo'], 'Compresor Pro 5000')
+        self.assertIn('JOIN "maquina"', sql)
+        self.assertNotIn('JOIN "solicitud"', sql)
+
+    def test_detalle_de_solicitud_y_campos_invalidos(self):
+        solicitud = self.informe.codigo_solicitud
+        response, _ = self.consultar(reverse('solicitud-detail', args=[solicitud.pk]),
+                                     {'fields': 'tiene_informe,fecha_solicitud,nombre_usuario'})
+        self.assertEqual(response.data, {
+            'nombre_usuario': self.encargado.get_full_name(),
+            'fecha_solicitud': solicitud.fecha_creacion.date().isoformat(),
+            'tiene_informe': True,
+        })
+
+        response = self.client.get(reverse('maquina-list'), {'fields': 'modelo,precio'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'error': 'Campos no válidos: precio'})
+
+    def test_escrituras_no_se_recortan(self):
+        response = self.client.patch(
+            reverse('maquina-detail', args=[self.maquina.pk]) + '?fields=modelo', {'marca': 'Kaeser'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['marca'], 'Kaeser')
+
+
+class RendererJSONTest(TestCase):
+    """ORJSONRenderer/ORJSONParser dan lo mismo que JSONRenderer/JSONParser de DRF"""
+
+    def test_misma_salida_que_drf(self):
+        datos = {
+            'fecha_hora': timezone.make_aware(datetime(2025, 3, 1, 12, 30, 5, 123456)),
+            'fecha': date(2025, 3, 1),
+            'monto': Decimal('10.50'),
+            'texto': gettext_lazy('Pendiente'),
+            'uuid': uuid.UUID(int=7),
+            'claves_numericas': {1: 'uno'},
+            'separador': 'a\u2028b',
+            'lista': ReturnList([{'n': 1}], serializer=None),
+        }
+        self.assertEqual(ORJSONRenderer().render(datos), JSONRenderer().render(datos))
+        self.assertEqual(
+            ORJSONRenderer().render(datos, 'application/json; indent=2'),
+            JSONRenderer().render(datos, 'application/json; indent=2'),
+        )
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_parser(self):
+        parser = ORJSONParser()
+        self.assertEqual(parser.parse(io.BytesIO('{"a": [1, "ñ"]}'.encode('utf-8'))), {'a': [1, 'ñ']})
+        self.assertEqual(
+            parser.parse(io.BytesIO('{"a": "ñ"}'.encode('latin-1')), parser_context={'encoding': 'latin-1'}),
+            {'a': 'ñ'},
+        )
+        for invalido in (b'{"a": ', b'{"a": NaN}'):
+            with self.subTest(invalido=invalido), self.assertRaises(ParseError):
+                parser.parse(io.BytesIO(invalido))
+
+
+class CompresionRespuestasTest(MantenTaskTestMixin, APITestCase):
+    """CompresionAPIMiddleware: negociación, umbral, streaming y tipos que no se comprimen"""
+
+    def setUp(self):
+        self.crear_datos_base()
+        for _ in range(12):
+            self.crear_solicitud(codigo_estado_id=1)
+        self.client.force_authenticate(user=self.encargado)
+        self.url = reverse('solicitud-list')
+
+    def test_listado_comprimido_con_gzip(self):
+        plano = self.client.get(self.url)
+        comprimido = self.client.get(self.url, HTTP_ACCEPT_ENCODING='br;q=1.0, gzip;q=0.8')
+
+        self.assertNotIn('Content-Encoding', plano)
+        self.assertIn('Accept-Encoding', plano['Vary'])
+        self.assertEqual(comprimido['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', comprimido['Vary'])
+        self.assertEqual(int(comprimido['Content-Length']), len(comprimido.content))
+        self.assertLess(len(comprimido.content), len(plano.content))
+        self.assertEqual(gzip.decompress(comprimido.content), plano.content)
+
+    def test_sin_comprimir(self):
+        casos = [
+            (self.url, 'gzip;q=0'),
+            (self.url, 'identity'),
+            (reverse('estado-detail', args=[1]), 'gzip'),  # bajo API_COMPRESSION_MIN_BYTES
+        ]
+        for url, accept in casos:
+            with self.subTest(url=url, accept=accept):
+                self.assertNotIn('Content-Encoding', self.client.get(url, HTTP_ACCEPT_ENCODING=accept))
+        with override_settings(API_COMPRESSION_ENABLED=False):
+            self.assertNotIn('Content-Encoding', self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip'))
+
+    @override_settings(LIST_STREAM_CHUNK_SIZE=5)
+    def test_stream_comprimido_por_bloques(self):
+        plano = self.client.get(self.url, {'stream': '1'})
+        response = self.client.get(self.url, {'stream': '1'}, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b''.join(plano.streaming_content))
+
+    @override_settings(API_COMPRESSION_MIN_BYTES=0)
+    def test_respuestas_con_secretos_sin_comprimir(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.post(reverse('auth-login'), {'username': 'crodriguez', 'password': 'encargado123'},
+                                    format='json', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('access_token', response.data)
+        self.assertNotIn('Content-Encoding', response)
+
+        middleware = CompresionAPIMiddleware(lambda request: None)
+        request = RequestFactory().get('/api/solicitudes/', HTTP_ACCEPT_ENCODING='gzip')
+        con_cookie = HttpResponse(b'{"a": 1}' * 500, content_type='application/json')
+        con_cookie.set_cookie('sessionid', 'secreto')
+        self.assertNotIn('Content-Encoding', middleware.process_response(request, con_cookie))
+
+    def test_tipos_y_estados_excluidos(self):
+        middleware = CompresionAPIMiddleware(lambda request: None)
+        request = RequestFactory().get('/api/informes/1/descargar_pdf/', HTTP_ACCEPT_ENCODING='gzip')
+        cuerpo = b'x' * 5000
+        for response in (
+            HttpResponse(cuerpo, content_type='application/pdf'),
+            HttpResponse(cuerpo, content_type='application/json', status=206),
+            HttpResponse(cuerpo, content_type='application/json', headers={'Content-Encoding': 'br'}),
+        ):
+            with self.subTest(tipo=response['Content-Type'], estado=response.status_code):
+                self.assertEqual(middleware.process_response(request, response).content, cuerpo)
+        fuera_de_api = RequestFactory().get('/admin/', HTTP_ACCEPT_ENCODING='gzip')
+        response = middleware.process_response(fuera_de_api, HttpResponse(cuerpo, content_type='text/html'))
+        self.assertNotIn('Content-Encoding', response)
+
+    def test_negociacion(self):
+        self.assertEqual(elegir_codec('deflate, *;q=0.1').nombre, 'gzip')
+        self.assertIsNone(elegir_codec(''))
+        with override_settings(API_COMPRESSION_ALGORITHMS=['no-existe', 'gzip']):
+            self.assertEqual(elegir_codec('gzip').nombre, 'gzip')
+        with override_settings(API_COMPRESSION_ALGORITHMS=[]):
+            self.assertIsNone(elegir_codec('gzip'))
+
+
+class RespuestaCacheadaTest(MantenTaskTestMixin, APITestCase):
+    """RespuestaCacheadaMixin: aciertos sin consultas, llave por rol y parámetros, invalidación por señales"""
+
+    def setUp(self):
+        self.crear_datos_base()
+        catalogos.precargar()
+        self.url = reverse('maquina-list')
+
+    def test_acierto_sin_consultas_y_llave_por_parametros_y_rol(self):
+        primera = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            segunda = self.client.get(self.url)
+        self.assertEqual(segunda.data, primera.data)
+
+        # Otros parámetros (aunque en otro orden sea la misma consulta) u otro rol: otra entrada
+        self.client.get(self.url, {'marca': 'Atlas Copco', 'ordering': 'fecha_compra'})
+        with self.assertNumQueries(0):
+            self.client.get(self.url + '?ordering=fecha_compra&marca=Atlas+Copco')
+        self.client.force_authenticate(user=self.ingeniero)
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(self.url)
+        self.assertGreater(len(consultas), 0)
+
+    def test_senales_invalidan(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.maquina.marca = 'Kaeser'
+            self.maquina.save()
+        self.assertEqual(self.client.get(self.url).data['results'][0]['marca'], 'Kaeser')
+
+        # La sucursal viene del catálogo: cambiarla también invalida las máquinas
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sucursal.nombre_sucursal = 'Sucursal Norte'
+            self.sucursal.save()
+        self.assertEqual(self.client.get(self.url).data['results'][0]['sucursal']['nombre_sucursal'], 'Sucursal Norte')
+
+    def test_errores_no_se_cachean_y_etag_en_aciertos(self):
+        url = reverse('maquina-por-sucursal')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_400_BAD_REQUEST)
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.client.get(url, {'sucursal': self.sucursal.pk}).status_code, status.HTTP_200_OK)
+        self.assertGreater(len(consultas), 0)
+
+        etag = self.client.get(reverse('sucursal-list'))['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('sucursal-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertIn('max-age', response['Cache-Control'])
+
+    def test_advierte_locmem_sin_debug(self):
+        with override_settings(DEBUG=False), self.assertLogs('api.caching', 'WARNING') as logs:
+            self.assertTrue(advertir_cache_por_proceso())
+        self.assertIn('CACHE_BACKEND=redis', logs.output[0])
+        with override_settings(DEBUG=True):
+            self.assertFalse(advertir_cache_por_proceso())
+
+    def test_backend_de_archivos(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        archivo = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                               'LOCATION': directorio}}
+        with override_settings(CACHES=archivo):
+            catalogos.precargar()
+            primera = self.client.get(self.url)
+            with self.assertNumQueries(0):
+                self.assertEqual(self.client.get(self.url).data, primera.data)
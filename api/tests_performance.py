@@ -0,0 +1,261 @@
+"""
+Presupuestos de rendimiento por endpoint
+
+Siembra un volumen realista (create_test_data + los generadores de
+api.generators), recorre todas las rutas del router (incluidas las acciones
+personalizadas) y verifica por endpoint:
+
+- cantidad de consultas SQL,
+- tiempo total en SQL,
+- tiempo en Python (vista + serialización = total - SQL).
+
+Al terminar escribe un reporte JSON (PERF_REPORT, por defecto perf_report.json)
+para comparar tendencias entre commits. Variables de entorno:
+
+- PERF_SOLICITUDES: solicitudes sintéticas a sembrar (default 2000)
+- PERF_BUDGET_FACTOR: multiplica los presupuestos de tiempo (máquinas lentas de CI)
+- PERF_REPORT: ruta del reporte (vacío para no escribirlo)
+"""
+import io
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import OutputWrapper
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from . import catalogos
+from .generators import ESTADOS, generar_datos
+from .models import (
+    Estado, Informe, Maquina, NivelAcceso, Solicitud, Sucursal, Task, TipoUsuario, Usuario
+)
+from .urls import router
+
+SOLICITUDES = int(os.getenv('PERF_SOLICITUDES', '2000'))
+FACTOR = float(os.getenv('PERF_BUDGET_FACTOR', '1'))
+RUTA_REPORTE = os.getenv('PERF_REPORT', 'perf_report.json')
+
+Presupuesto = namedtuple('Presupuesto', ['consultas', 'sql_ms', 'python_ms'])
+# Caso: método HTTP, nombre de la ruta, función (test) -> (args de reverse, datos), presupuesto
+Caso = namedtuple('Caso', ['metodo', 'ruta', 'preparar', 'presupuesto'])
+
+# Los listados paginados hacen COUNT + página; el detalle, una sola consulta
+LIGERO = Presupuesto(consultas=2, sql_ms=50, python_ms=150)
+LISTADO = Presupuesto(consultas=2, sql_ms=150, python_ms=300)
+ESCRITURA = Presupuesto(consultas=5, sql_ms=100, python_ms=300)
+# Un cambio de estado agrega SAVEPOINT/RELEASE (Solicitud.save), la transición y el resumen diario
+CAMBIO_ESTADO = Presupuesto(consultas=8, sql_ms=100, python_ms=300)
+PDF = Presupuesto(consultas=3, sql_ms=100, python_ms=3000)
+
+
+def sin_datos(test):
+    return [], None
+
+
+def con_pk(atributo, datos=None):
+    """Ruta de detalle sobre `test.<atributo>`; `datos` puede ser un callable(test)"""
+    def preparar(test):
+        objeto = getattr(test, atributo)
+        cuerpo = datos(test) if callable(datos) else datos
+        return [objeto.pk], cuerpo
+    return preparar
+
+
+def con_datos(datos):
+    def preparar(test):
+        return [], datos(test) if callable(datos) else datos
+    return preparar
+
+
+CASOS = [
+    # Catálogos
+    Caso('get', 'tipo-usuario-list', sin_datos, LIGERO),
+    Caso('get', 'tipo-usuario-detail', con_pk('tipo_usuario'), LIGERO),
+    Caso('get', 'nivel-acceso-list', sin_datos, LIGERO),
+    Caso('get', 'nivel-acceso-detail', con_pk('nivel_acceso'), LIGERO),
+    Caso('get', 'estado-list', sin_datos, LIGERO),
+    Caso('get', 'estado-detail', con_pk('estado'), LIGERO),
+    Caso('get', 'sucursal-list', sin_datos, LIGERO),
+    Caso('get', 'sucursal-detail', con_pk('sucursal'), LIGERO),
+    # Usuarios
+    Caso('get', 'usuario-list', sin_datos, LISTADO),
+    Caso('get', 'usuario-list', con_datos({'fields': 'id_usuario,username,nombre_completo'}), LISTADO),
+    Caso('get', 'usuario-detail', con_pk('ingeniero'), LIGERO),
+    Caso('get', 'usuario-me', sin_datos, Presupuesto(1, 10, 100)),
+    Caso('get', 'usuario-ingenieros', sin_datos, Presupuesto(1, 100, 500)),
+    Caso('get', 'usuario-encargados', sin_datos, Presupuesto(1, 100, 500)),
+    # Máquinas
+    Caso('get', 'maquina-list', sin_datos, LISTADO),
+    Caso('get', 'maquina-detail', con_pk('maquina'), LIGERO),
+    Caso('get', 'maquina-por-sucursal', lambda t: ([], {'sucursal': t.sucursal.pk}), Presupuesto(1, 100, 1000)),
+    Caso('post', 'maquina-registrar-mantenimiento', con_pk('maquina'), ESCRITURA),
+    # Solicitudes
+    Caso('get', 'solicitud-list', sin_datos, LISTADO),
+    Caso('get', 'solicitud-list', con_datos({'paginacion': 'cursor'}), Presupuesto(1, 100, 300)),
+    Caso('get', 'solicitud-list', con_datos({'fields': 'codigo_solicitud,descripcion,estado,nombre_ingeniero'}), LISTADO),
+    Caso('get', 'solicitud-list', con_datos({'expand': 'maquina,usuario,ingeniero,estado'}), LISTADO),
+    Caso('get', 'solicitud-detail', con_pk('solicitud'), LIGERO),
+    Caso('get', 'solicitud-pendientes', sin_datos, LISTADO),
+    Caso('get', 'solicitud-completadas', sin_datos, LISTADO),
+    Caso('get', 'solicitud-por-encargados', sin_datos, LISTADO),
+    Caso('get', 'solicitud-por-sucursal', lambda t: ([], {'codigo_sucursal': t.sucursal.pk}), LISTADO),
+    Caso('post', 'solicitud-list', con_datos(lambda t: {
+        'codigo_maquinaria': t.maquina.pk, 'descripcion': 'Solicitud de prueba de rendimiento',
+    }), Presupuesto(11, 100, 300)),
+    Caso('patch', 'solicitud-detail', con_pk('solicitud', {'descripcion': 'Descripción actualizada'}), ESCRITURA),
+    Caso('post', 'solicitud-asignar-ingeniero', con_pk('solicitud', lambda t: {
+        'id_ingeniero': t.ingeniero.pk,
+    }), ESCRITURA),
+    Caso('post', 'solicitud-cambiar-estado', con_pk('solicitud', {'codigo_estado': 2}), CAMBIO_ESTADO),
+    # Masivas: consultas constantes en la cantidad de ids
+    Caso('post', 'solicitud-asignar-ingeniero-masivo', con_datos(lambda t: {
+        'ids': t.lote, 'id_ingeniero': t.ingeniero.pk,
+    }), Presupuesto(5, 100, 300)),
+    Caso('post', 'solicitud-cambiar-estado-masivo', con_datos(lambda t: {
+        'ids': t.lote, 'codigo_estado': 2,
+    }), Presupuesto(10, 200, 500)),
+    # Informes
+    Caso('get', 'informe-list', sin_datos, LISTADO),
+    Caso('get', 'informe-list', con_datos({'fields': 'codigo_informe,pdf_status,fecha_informe'}), LISTADO),
+    Caso('get', 'informe-detail', con_pk('informe'), LIGERO),
+    Caso('get', 'informe-descargar-pdf', con_pk('informe'), PDF),
+    Caso('post', 'informe-regenerar-pdf', con_pk('informe'), ESCRITURA),
+    Caso('post', 'informe-enviar-por-correo', con_pk('informe', {'email': 'jefe@mantentask.com'}), ESCRITURA),
+    Caso('get', 'informe-exportar-zip', lambda t: ([], {'codigo_informe': t.informe.pk}), PDF),
+    Caso('get', 'informe-estadisticas-cache', sin_datos, Presupuesto(0, 10, 100)),
+    # Panel de administración
+    Caso('get', 'admin-dashboard-estadisticas', sin_datos, Presupuesto(7, 200, 300)),
+    Caso('get', 'admin-dashboard-tiempos-estado', sin_datos, Presupuesto(1, 300, 1000)),
+    Caso('get', 'admin-dashboard-usuarios-dashboard', sin_datos, Presupuesto(1, 100, 500)),
+    Caso('get', 'admin-dashboard-solicitudes-dashboard', sin_datos, Presupuesto(1, 300, 1500)),
+    Caso('post', 'admin-dashboard-cambiar-nivel-usuario',
+         con_pk('otro_usuario', {'codigo_nivel_acceso': 2}), ESCRITURA),
+    Caso('post', 'admin-dashboard-cambiar-tipo-usuario',
+         con_pk('otro_usuario', {'codigo_tipo_usuario': 1}), ESCRITURA),
+    Caso('post', 'admin-dashboard-desactivar-usuario', con_pk('otro_usuario'), ESCRITURA),
+    Caso('get', 'estadistica-diaria-list', sin_datos, Presupuesto(2, 50, 150)),
+    # Legacy
+    Caso('get', 'task-list', sin_datos, LIGERO),
+    Caso('get', 'task-detail', con_pk('task'), LIGERO),
+]
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class PresupuestoEndpointsTest(APITestCase):
+    """Consultas y tiempos de cada endpoint del router contra su presupuesto"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.override = override_settings(MEDIA_ROOT=cls.media_root, EMAIL_RATE_LIMIT_PER_MINUTE=0)
+        cls.override.enable()
+        cls.mediciones = []
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        if RUTA_REPORTE and cls.mediciones:
+            with open(RUTA_REPORTE, 'w', encoding='utf-8') as salida:
+                json.dump({
+                    'commit': _commit_actual(),
+                    'fecha': timezone.now().isoformat(),
+                    'motor': connection.vendor,
+                    'solicitudes': SOLICITUDES,
+                    'factor_presupuesto': FACTOR,
+                    'endpoints': cls.mediciones,
+                }, salida, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def setUpTestData(cls):
+        for codigo, nombre in ESTADOS:
+            Estado.objects.get_or_create(codigo_estado=codigo, defaults={'nombre_estado': nombre})
+        call_command('create_test_data', stdout=io.StringIO())
+        generar_datos(
+            sucursales=10, maquinas=200, usuarios=100, solicitudes=SOLICITUDES, seed=7,
+            salida=OutputWrapper(io.StringIO()),
+        )
+
+        cls.admin = Usuario.objects.get(username='admin')
+        cls.ingeniero = Usuario.objects.get(username='jperez')
+        cls.otro_usuario = Usuario.objects.get(username='mlopez')
+        cls.tipo_usuario = TipoUsuario.objects.create(nombre_tipo_usuario='Ingeniero')
+        cls.nivel_acceso = NivelAcceso.objects.create(nombre_nivel_acceso='Básico')
+        cls.estado = Estado.objects.get(codigo_estado=1)
+        cls.sucursal = Sucursal.objects.order_by('pk').first()
+        cls.maquina = Maquina.objects.filter(codigo_sucursal=cls.sucursal).order_by('pk').first()
+        cls.solicitud = Solicitud.objects.filter(codigo_estado=1).order_by('pk').first()
+        cls.lote = list(Solicitud.objects.filter(codigo_estado=1).order_by('pk').values_list('pk', flat=True)[1:51])
+        cls.informe = Informe.objects.order_by('pk').first()
+        cls.task = Task.objects.create(title='Legacy', description='Tarea legacy')
+
+    def setUp(self):
+        cache.clear()
+        # Régimen estable: los catálogos ya están en el caché del proceso
+        catalogos.precargar()
+        self.client.force_authenticate(user=self.admin)
+
+    def medir(self, caso):
+        args, datos = caso.preparar(self)
+        url = reverse(caso.ruta, args=args)
+        cliente = getattr(self.client, caso.metodo)
+        with CaptureQueriesContext(connection) as capturadas:
+            inicio = time.perf_counter()
+            if caso.metodo == 'get':
+                response = cliente(url, datos)
+            else:
+                response = cliente(url, datos, format='json')
+            if response.streaming:
+                b''.join(response.streaming_content)
+            total_ms = (time.perf_counter() - inicio) * 1000
+        sql_ms = sum(float(consulta['time']) for consulta in capturadas.captured_queries) * 1000
+        return response, {
+            'ruta': caso.ruta,
+            'metodo': caso.metodo.upper(),
+            'url': url,
+            'status': response.status_code,
+            'consultas': len(capturadas),
+            'sql_ms': round(sql_ms, 3),
+            'python_ms': round(max(total_ms - sql_ms, 0), 3),
+            'total_ms': round(total_ms, 3),
+            'presupuesto': caso.presupuesto._asdict(),
+        }
+
+    def test_endpoints_dentro_de_presupuesto(self):
+        for caso in CASOS:
+            with self.subTest(ruta=caso.ruta, metodo=caso.metodo):
+                response, medicion = self.medir(caso)
+                self.mediciones.append(medicion)
+
+                self.assertLess(response.status_code, 400, getattr(response, 'data', None))
+                presupuesto = caso.presupuesto
+                self.assertLessEqual(medicion['consultas'], presupuesto.consultas, 'consultas SQL')
+                self.assertLessEqual(medicion['sql_ms'], presupuesto.sql_ms * FACTOR, 'tiempo en SQL')
+                self.assertLessEqual(medicion['python_ms'], presupuesto.python_ms * FACTOR, 'tiempo en Python')
+
+    def test_todas_las_rutas_tienen_caso(self):
+        """Una ruta o acción nueva en el router necesita su caso en CASOS"""
+        rutas = {patron.name for patron in router.urls if patron.name and patron.name != 'api-root'}
+        cubiertas = {caso.ruta for caso in CASOS}
+        self.assertEqual(rutas - cubiertas, set())
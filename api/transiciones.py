@@ -0,0 +1,174 @@
+"""
+Historial de estados de solicitudes (TransicionEstado) y tiempos en cada estado
+
+`registrar_transicion` la llama la señal post_save de Solicitud. Los tiempos
+en estado salen de una sola consulta: LEAD(fecha) sobre las transiciones de
+cada solicitud da cuándo se salió de cada estado, y la duración se calcula en
+la base. SQLite y MySQL no tienen PERCENTILE_CONT, así que los percentiles son
+de rango más cercano, también en la base: ROW_NUMBER() y COUNT(*) OVER sobre
+las duraciones de cada grupo y solo vuelven las filas que caen en ceil(p·n).
+Requiere funciones de ventana (SQLite 3.25+, MySQL 8, PostgreSQL).
+"""
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import Exists, OuterRef
+
+from .models import Solicitud, Sucursal, TransicionEstado, Usuario
+
+PENDIENTE = 1
+PERCENTILES = (50, 90, 99)
+
+
+def registrar_transicion(solicitud, creada, estado_anterior, usuario=None):
+    """Agrega la fila del historial si `solicitud` se creó o cambió de estado"""
+    if not creada and estado_anterior == solicitud.codigo_estado_id:
+        return None
+    if usuario is None and creada:
+        usuario = solicitud.id_usuario_id
+    return TransicionEstado.objects.create(
+        solicitud_id=solicitud.pk,
+        estado_anterior_id=None if creada else estado_anterior,
+        estado_nuevo_id=solicitud.codigo_estado_id,
+        codigo_sucursal_id=solicitud.codigo_sucursal_id,
+        ingeniero_asignado_id=solicitud.ingeniero_asignado_id,
+        usuario_id=getattr(usuario, 'pk', usuario),
+        fecha=solicitud.fecha_creacion if creada else solicitud.fecha_actualizacion,
+    )
+
+
+def transiciones_inferidas(solicitud):
+    """
+    Historial mínimo de una solicitud sin transiciones: nace pendiente y pasa a
+    su estado actual en fecha_actualizacion. `solicitud` es un dict con los campos.
+    """
+    comunes = {
+        'solicitud_id': solicitud['codigo_solicitud'],
+        'codigo_sucursal_id': solicitud['codigo_sucursal'],
+        'ingeniero_asignado_id': solicitud['ingeniero_asignado'],
+        'reconstruida': True,
+    }
+    filas = [TransicionEstado(
+        estado_anterior_id=None, estado_nuevo_id=PENDIENTE, usuario_id=solicitud['id_usuario'],
+        fecha=solicitud['fecha_creacion'], **comunes,
+    )]
+    if solicitud['codigo_estado'] != PENDIENTE:
+        filas.append(TransicionEstado(
+            estado_anterior_id=PENDIENTE, estado_nuevo_id=solicitud['codigo_estado'],
+            fecha=solicitud['fecha_actualizacion'], **comunes,
+        ))
+    return filas
+
+
+def reconstruir_historial(tamano_lote=2000):
+    """Crea el historial inferido de las solicitudes que no tienen ninguno; retorna las filas creadas"""
+    sin_historial = Solicitud.objects.filter(
+        ~Exists(TransicionEstado.objects.filter(solicitud=OuterRef('pk')))
+    ).order_by('pk').values(
+        'codigo_solicitud', 'codigo_sucursal', 'ingeniero_asignado', 'id_usuario',
+        'codigo_estado', 'fecha_creacion', 'fecha_actualizacion',
+    )
+    creadas = 0
+    ultimo = 0
+    while True:
+        lote = list(sin_historial.filter(pk__gt=ultimo)[:tamano_lote])
+        if not lote:
+            return creadas
+        filas = [fila for solicitud in lote for fila in transiciones_inferidas(solicitud)]
+        TransicionEstado.objects.bulk_create(filas, batch_size=tamano_lote)
+        creadas += len(filas)
+        ultimo = lote[-1]['codigo_solicitud']
+
+
+def _columna(modelo, campo):
+    return connection.ops.quote_name(modelo._meta.get_field(campo).column)
+
+
+def _sql_tiempos_en_estado():
+    """
+    SQL de `tiempos_en_estado`: estancias (LEAD), sus duraciones por sucursal y
+    por ingeniero, y de cada grupo solo las filas de los percentiles pedidos
+    """
+    q = connection.ops.quote_name
+    t = TransicionEstado
+    duracion, _ = connection.ops.subtract_temporals('DateTimeField', ('e.salida', ()), ('e.fecha', ()))
+    # Rango más cercano: la fila k con 100·(k - 1) < p·n <= 100·k
+    en_percentil = ' OR '.join(f'(100 * (fila - 1) < {p} * total AND {p} * total <= 100 * fila)' for p in PERCENTILES)
+    return f"""
+        WITH estancias AS (
+            SELECT t.{_columna(t, 'codigo_sucursal')} AS sucursal, t.{_columna(t, 'ingeniero_asignado')} AS ingeniero,
+                   t.{_columna(t, 'estado_nuevo')} AS estado, t.{_columna(t, 'fecha')} AS fecha,
+                   LEAD(t.{_columna(t, 'fecha')}) OVER (
+                       PARTITION BY t.{_columna(t, 'solicitud')}
+                       ORDER BY t.{_columna(t, 'fecha')}, t.{_columna(t, 'id')}
+                   ) AS salida
+            FROM {q(t._meta.db_table)} t
+            WHERE t.{_columna(t, 'fecha')} >= %s AND t.{_columna(t, 'estado_nuevo')} IS NOT NULL
+        ),
+        duraciones AS (
+            SELECT 's' AS tipo, e.sucursal AS grupo, e.estado, {duracion} AS duracion
+            FROM estancias e WHERE e.salida IS NOT NULL AND e.sucursal IS NOT NULL
+            UNION ALL
+            SELECT 'i', e.ingeniero, e.estado, {duracion}
+            FROM estancias e WHERE e.salida IS NOT NULL AND e.ingeniero IS NOT NULL
+        ),
+        ordenadas AS (
+            SELECT tipo, grupo, estado, duracion,
+                   ROW_NUMBER() OVER (PARTITION BY tipo, grupo, estado ORDER BY duracion) AS fila,
+                   COUNT(*) OVER (PARTITION BY tipo, grupo, estado) AS total
+            FROM duraciones
+        )
+        SELECT o.tipo, o.grupo, s.{_columna(Sucursal, 'nombre_sucursal')}, u.{_columna(Usuario, 'username')},
+               o.estado, o.total, o.fila, o.duracion
+        FROM ordenadas o
+        LEFT JOIN {q(Sucursal._meta.db_table)} s
+            ON o.tipo = 's' AND s.{_columna(Sucursal, 'codigo_sucursal')} = o.grupo
+        LEFT JOIN {q(Usuario._meta.db_table)} u
+            ON o.tipo = 'i' AND u.{_columna(Usuario, 'id_usuario')} = o.grupo
+        WHERE {en_percentil}
+        ORDER BY o.tipo, o.grupo, o.estado, o.fila
+    """
+
+
+def _segundos(duracion):
+    # SQLite y MySQL devuelven microsegundos; PostgreSQL, un intervalo
+    if not isinstance(duracion, timedelta):
+        duracion = timedelta(microseconds=int(duracion))
+    return duracion.total_seconds()
+
+
+def tiempos_en_estado(desde):
+    """
+    Percentiles (p50/p90/p99, en horas) del tiempo que las solicitudes pasaron
+    en cada estado, por sucursal y por ingeniero asignado
+
+    Cuenta las estancias que empezaron desde `desde` y ya terminaron (las
+    solicitudes que siguen en el estado no tienen LEAD). El filtro por fecha va
+    en el WHERE, antes de la ventana: deja fuera estancias anteriores pero no
+    las transiciones siguientes de las que sí entran. A Python vuelven a lo más
+    tres filas por grupo y estado, sin importar cuánta historia haya.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(_sql_tiempos_en_estado(), [connection.ops.adapt_datetimefield_value(desde)])
+        filas = cursor.fetchall()
+
+    resultado = {'por_sucursal': [], 'por_ingeniero': []}
+    actual = None
+    for tipo, grupo, nombre_sucursal, username, estado, total, fila, duracion in filas:
+        if actual is None or (actual['_tipo'], actual['_grupo'], actual['codigo_estado']) != (tipo, grupo, estado):
+            if tipo == 's':
+                actual = {'codigo_sucursal': grupo, 'nombre_sucursal': nombre_sucursal}
+                resultado['por_sucursal'].append(actual)
+            else:
+                actual = {'ingeniero_asignado': grupo, 'username': username}
+                resultado['por_ingeniero'].append(actual)
+            actual.update({'_tipo': tipo, '_grupo': grupo, 'codigo_estado': estado, 'transiciones': total})
+        horas = round(_segundos(duracion) / 3600, 2)
+        for percentil in PERCENTILES:
+            if 100 * (fila - 1) < percentil * total <= 100 * fila:
+                actual[f'p{percentil}_horas'] = horas
+
+    for filas_grupo in resultado.values():
+        for fila in filas_grupo:
+            del fila['_tipo'], fila['_grupo']
+    return resultado
@@ -3,7 +3,7 @@ from rest_framework import routers
 from .views import (
     TipoUsuarioViewSet, NivelAccesoViewSet, SucursalViewSet,
     UsuarioViewSet, EstadoViewSet, MaquinaViewSet,
-    SolicitudViewSet, InformeViewSet, TaskViewSet, AdminDashboardViewSet
+    SolicitudViewSet, InformeViewSet, TaskViewSet, AdminDashboardViewSet, EstadisticaDiariaViewSet
 )
 from .auth import auth_login, auth_logout, auth_me, auth_register
 
@@ -17,6 +17,8 @@ router.register(r'estados', EstadoViewSet, basename='estado')
 router.register(r'maquinas', MaquinaViewSet, basename='maquina')
 router.register(r'solicitudes', SolicitudViewSet, basename='solicitud')
 router.register(r'informes', InformeViewSet, basename='informe')
+router.register(r'admin-dashboard', AdminDashboardViewSet, basename='admin-dashboard')
+router.register(r'estadisticas-diarias', EstadisticaDiariaViewSet, basename='estadistica-diaria')
 # Endpoint legacy
 router.register(r'tasks', TaskViewSet, basename='task')
 
@@ -7,66 +7,285 @@ from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from django.core.cache import cache
 from django.core.files.base import ContentFile
+from django.utils import timezone
 from io import BytesIO
-from datetime import datetime
+from datetime import datetime, timedelta
+import hashlib
+import json
+import logging
+import threading
+import time
 
+logger = logging.getLogger(__name__)
 
-def generar_pdf_informe(informe):
-    """Genera y guarda un PDF en el FileField del informe"""
-    buffer = BytesIO()
+# Incrementar cuando cambie el diseño del PDF para invalidar los archivos en caché
+PDF_PLANTILLA_VERSION = 1
+
+# Contadores del caché de PDFs (en el backend de caché de Django)
+PDF_CACHE_HITS = 'pdf_cache:hits'
+PDF_CACHE_MISSES = 'pdf_cache:misses'
+PDF_CACHE_RENDER_MS = 'pdf_cache:render_ms'
+
+
+def calcular_hash_informe(informe):
+    """
+    Hash SHA-256 de todos los datos que aparecen en el PDF del informe
     
-    # Crear documento PDF
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=A4,
-        rightMargin=72,
-        leftMargin=72,
-        topMargin=72,
-        bottomMargin=18,
-    )
+    Si el hash no cambia, el PDF ya generado sigue siendo válido.
+    """
+    solicitud = informe.codigo_solicitud
+    maquina = informe.codigo_maquinaria
+    datos = [
+        PDF_PLANTILLA_VERSION,
+        solicitud.codigo_solicitud,
+        solicitud.descripcion,
+        solicitud.codigo_estado.nombre_estado,
+        informe.fecha_informe.isoformat() if informe.fecha_informe else None,
+        informe.descripcion,
+        informe.id_usuario.get_full_name(),
+        maquina.codigo_maquinaria,
+        maquina.marca,
+        maquina.modelo,
+        maquina.codigo_sucursal.nombre_sucursal,
+        maquina.fecha_compra.isoformat(),
+        maquina.fecha_instalacion.isoformat(),
+        maquina.fecha_ultima_mantencion.isoformat() if maquina.fecha_ultima_mantencion else None,
+    ]
+    contenido = json.dumps(datos, ensure_ascii=False, default=str)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def pdf_en_cache(informe, hash_contenido):
+    """True si el archivo guardado corresponde al contenido actual del informe"""
+    if not informe.archivo_pdf or informe.pdf_hash != hash_contenido:
+        return False
+    try:
+        return informe.archivo_pdf.storage.exists(informe.archivo_pdf.name)
+    except Exception:
+        return False
+
+
+def generar_pdf_informe(informe, forzar=False):
+    """
+    Genera y guarda el PDF del informe
     
-    # Contenedor para elementos del PDF
-    elementos = []
+    Si el informe ya tiene un PDF con el mismo hash de contenido, se reutiliza
+    sin volver a renderizar (a menos que `forzar` sea True).
+    """
+    hash_contenido = calcular_hash_informe(informe)
+    if not forzar and pdf_en_cache(informe, hash_contenido):
+        _incrementar_contador(PDF_CACHE_HITS)
+        if informe.estado_pdf != informe.PDF_LISTO:
+            informe.estado_pdf = informe.PDF_LISTO
+            type(informe).objects.filter(pk=informe.pk).update(estado_pdf=informe.PDF_LISTO)
+        return informe.archivo_pdf
+
+    inicio = time.perf_counter()
+    pdf_content = renderizar_pdf_informe(informe)
+    _incrementar_contador(PDF_CACHE_MISSES)
+    _incrementar_contador(PDF_CACHE_RENDER_MS, int((time.perf_counter() - inicio) * 1000))
+
+    return guardar_pdf_informe(informe, pdf_content, hash_contenido)
+
+
+def guardar_pdf_informe(informe, pdf_content, hash_contenido):
+    """Guarda el PDF con un nombre derivado del hash y elimina el archivo anterior"""
+    anterior = informe.archivo_pdf.name if informe.archivo_pdf else None
+    storage = informe.archivo_pdf.storage
+
+    filename = f'informe_solicitud_{informe.codigo_solicitud_id}_{hash_contenido[:16]}.pdf'
+    nombre = informe.archivo_pdf.field.generate_filename(informe, filename)
+    if storage.exists(nombre):
+        # Regeneración forzada: reemplazar en vez de crear un sufijo aleatorio
+        storage.delete(nombre)
+
+    informe.estado_pdf = informe.PDF_LISTO
+    informe.pdf_hash = hash_contenido
+    informe.archivo_pdf.save(filename, ContentFile(pdf_content), save=False)
+    informe.save(update_fields=['archivo_pdf', 'pdf_hash', 'estado_pdf'])
+
+    if anterior and anterior != informe.archivo_pdf.name:
+        try:
+            storage.delete(anterior)
+        except Exception as e:
+            logger.warning(f"No se pudo eliminar el PDF anterior {anterior}: {e}")
+    return informe.archivo_pdf
+
+
+def estadisticas_cache_pdf():
+    """Contadores de aciertos/fallos del caché de PDFs y tiempo de render ahorrado"""
+    hits = cache.get(PDF_CACHE_HITS, 0)
+    misses = cache.get(PDF_CACHE_MISSES, 0)
+    render_ms = cache.get(PDF_CACHE_RENDER_MS, 0)
+    promedio_ms = render_ms / misses if misses else 0
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'ratio_hits': round(hits / total, 4) if total else 0,
+        'render_ms_total': render_ms,
+        'render_ms_promedio': round(promedio_ms, 2),
+        'render_ms_ahorrado_estimado': round(hits * promedio_ms, 2),
+    }
+
+
+def limpiar_pdfs_huerfanos(directorio='informes', antiguedad_minima=timedelta(minutes=10), dry_run=False):
+    """
+    Elimina los PDFs del directorio que ningún informe referencia
     
-    # Estilos
-    estilos = getSampleStyleSheet()
-    estilo_titulo = ParagraphStyle(
-        'CustomTitle',
-        parent=estilos['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#1a1a1a'),
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
+    Se respeta una antigüedad mínima para no borrar archivos recién escritos
+    cuyo informe aún no se ha guardado. Retorna la lista de archivos eliminados.
+    """
+    from .models import Informe
+
+    storage = Informe._meta.get_field('archivo_pdf').storage
+    try:
+        _, archivos = storage.listdir(directorio)
+    except FileNotFoundError:
+        return []
+
+    referenciados = set(
+        Informe.objects.exclude(archivo_pdf='').exclude(archivo_pdf__isnull=True)
+        .values_list('archivo_pdf', flat=True)
     )
+    limite = timezone.now() - antiguedad_minima
+    eliminados = []
+    for archivo in archivos:
+        nombre = f'{directorio}/{archivo}'
+        if nombre in referenciados:
+            continue
+        try:
+            if storage.get_modified_time(nombre) > limite:
+                continue
+        except (NotImplementedError, OSError):
+            pass
+        if not dry_run:
+            storage.delete(nombre)
+        eliminados.append(nombre)
+    return eliminados
+
+
+def _incrementar_contador(clave, cantidad=1):
+    cache.add(clave, 0, timeout=None)
+    try:
+        cache.incr(clave, cantidad)
+    except ValueError:
+        # La clave expiró entre add() e incr()
+        cache.set(clave, cantidad, timeout=None)
+
+
+class EstilosPDF:
+    """Estilos de párrafo, estilos de tabla y plantilla de página de los informes"""
+
+    def __init__(self):
+        self.base = getSampleStyleSheet()
+        self.titulo = ParagraphStyle(
+            'CustomTitle',
+            parent=self.base['Heading1'],
+            fontSize=24,
+            textColor=colors.HexColor('#1a1a1a'),
+            spaceAfter=30,
+            alignment=TA_CENTER,
+            fontName='Helvetica-Bold'
+        )
+        self.subtitulo = ParagraphStyle(
+            'CustomSubtitle',
+            parent=self.base['Heading2'],
+            fontSize=16,
+            textColor=colors.HexColor('#333333'),
+            spaceAfter=12,
+            spaceBefore=12,
+            fontName='Helvetica-Bold'
+        )
+        self.normal = ParagraphStyle(
+            'CustomNormal',
+            parent=self.base['Normal'],
+            fontSize=11,
+            textColor=colors.HexColor('#444444'),
+            spaceAfter=8,
+            fontName='Helvetica'
+        )
+        self.encabezado = self.base['Heading3']
+        self.pie = ParagraphStyle(
+            'Footer',
+            parent=self.base['Normal'],
+            fontSize=8,
+            textColor=colors.grey,
+            alignment=TA_CENTER
+        )
+        # Tabla de dos columnas etiqueta/valor usada en todas las secciones
+        self.tabla_datos = TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e8e8e8')),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+            ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ])
+        self.columnas_tabla_datos = [2*inch, 4*inch]
+        # Parámetros de SimpleDocTemplate
+        self.plantilla_pagina = {
+            'pagesize': A4,
+            'rightMargin': 72,
+            'leftMargin': 72,
+            'topMargin': 72,
+            'bottomMargin': 18,
+        }
+
+
+class _RegistroEstilosPDF:
+    """
+    Construye EstilosPDF una sola vez por proceso y lo comparte entre hilos
     
-    estilo_subtitulo = ParagraphStyle(
-        'CustomSubtitle',
-        parent=estilos['Heading2'],
-        fontSize=16,
-        textColor=colors.HexColor('#333333'),
-        spaceAfter=12,
-        spaceBefore=12,
-        fontName='Helvetica-Bold'
-    )
+    Los estilos de ReportLab solo se leen durante el render, así que una
+    misma instancia sirve para todos los informes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._estilos = None
+
+    def obtener(self):
+        estilos = self._estilos
+        if estilos is None:
+            with self._lock:
+                if self._estilos is None:
+                    self._estilos = EstilosPDF()
+                estilos = self._estilos
+        return estilos
+
+    def reiniciar(self):
+        with self._lock:
+            self._estilos = None
+
+
+registro_estilos_pdf = _RegistroEstilosPDF()
+
+
+def renderizar_pdf_informe(informe):
+    """Construye el PDF del informe y retorna su contenido en bytes"""
+    buffer = BytesIO()
+    estilos = registro_estilos_pdf.obtener()
     
-    estilo_normal = ParagraphStyle(
-        'CustomNormal',
-        parent=estilos['Normal'],
-        fontSize=11,
-        textColor=colors.HexColor('#444444'),
-        spaceAfter=8,
-        fontName='Helvetica'
-    )
+    # Crear documento PDF
+    doc = SimpleDocTemplate(buffer, **estilos.plantilla_pagina)
+    
+    # Contenedor para elementos del PDF
+    elementos = []
     
     # Título principal
-    elementos.append(Paragraph("INFORME DE MANTENIMIENTO", estilo_titulo))
-    elementos.append(Paragraph("Sistema MantenTask", estilos['Heading3']))
+    elementos.append(Paragraph("INFORME DE MANTENIMIENTO", estilos.titulo))
+    elementos.append(Paragraph("Sistema MantenTask", estilos.encabezado))
     elementos.append(Spacer(1, 0.3*inch))
     
     # Información del informe
-    elementos.append(Paragraph("INFORMACIÓN GENERAL", estilo_subtitulo))
+    elementos.append(Paragraph("INFORMACIÓN GENERAL", estilos.subtitulo))
     
     datos_generales = [
         ['Código de Solicitud:', f'#{informe.codigo_solicitud.codigo_solicitud}'],
@@ -75,25 +294,14 @@ def generar_pdf_informe(informe):
         ['Estado:', informe.codigo_solicitud.codigo_estado.nombre_estado],
     ]
     
-    tabla_general = Table(datos_generales, colWidths=[2*inch, 4*inch])
-    tabla_general.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e8e8e8')),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-        ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 11),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-    ]))
+    tabla_general = Table(datos_generales, colWidths=estilos.columnas_tabla_datos)
+    tabla_general.setStyle(estilos.tabla_datos)
     
     elementos.append(tabla_general)
     elementos.append(Spacer(1, 0.3*inch))
     
     # Información de la máquina
-    elementos.append(Paragraph("INFORMACIÓN DE LA MÁQUINA", estilo_subtitulo))
+    elementos.append(Paragraph("INFORMACIÓN DE LA MÁQUINA", estilos.subtitulo))
     
     maquina = informe.codigo_maquinaria
     datos_maquina = [
@@ -111,34 +319,23 @@ def generar_pdf_informe(informe):
             maquina.fecha_ultima_mantencion.strftime('%d/%m/%Y')
         ])
     
-    tabla_maquina = Table(datos_maquina, colWidths=[2*inch, 4*inch])
-    tabla_maquina.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e8e8e8')),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-        ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 11),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-    ]))
+    tabla_maquina = Table(datos_maquina, colWidths=estilos.columnas_tabla_datos)
+    tabla_maquina.setStyle(estilos.tabla_datos)
     
     elementos.append(tabla_maquina)
     elementos.append(Spacer(1, 0.3*inch))
     
     # Descripción del problema/trabajo realizado
-    elementos.append(Paragraph("DESCRIPCIÓN DEL TRABAJO", estilo_subtitulo))
+    elementos.append(Paragraph("DESCRIPCIÓN DEL TRABAJO", estilos.subtitulo))
     
     # Descripción de la solicitud original
-    elementos.append(Paragraph("<b>Problema reportado:</b>", estilo_normal))
-    elementos.append(Paragraph(informe.codigo_solicitud.descripcion, estilo_normal))
+    elementos.append(Paragraph("<b>Problema reportado:</b>", estilos.normal))
+    elementos.append(Paragraph(informe.codigo_solicitud.descripcion, estilos.normal))
     elementos.append(Spacer(1, 0.2*inch))
     
     # Descripción del informe
-    elementos.append(Paragraph("<b>Trabajo realizado:</b>", estilo_normal))
-    elementos.append(Paragraph(informe.descripcion, estilo_normal))
+    elementos.append(Paragraph("<b>Trabajo realizado:</b>", estilos.normal))
+    elementos.append(Paragraph(informe.descripcion, estilos.normal))
     elementos.append(Spacer(1, 0.4*inch))
     
     # Pie de página
@@ -146,7 +343,7 @@ def generar_pdf_informe(informe):
     fecha_generacion = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
     elementos.append(Paragraph(
         f"<i>Documento generado automáticamente por MantenTask el {fecha_generacion}</i>",
-        ParagraphStyle('Footer', parent=estilos['Normal'], fontSize=8, textColor=colors.grey, alignment=TA_CENTER)
+        estilos.pie
     ))
     
     # Construir PDF
@@ -155,36 +352,25 @@ def generar_pdf_informe(informe):
     # Obtener contenido del buffer
     pdf_content = buffer.getvalue()
     buffer.close()
-    
-    # Guardar en el campo FileField
-    filename = f'informe_solicitud_{informe.codigo_solicitud.codigo_solicitud}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
-    content_file = ContentFile(pdf_content)
-    informe.archivo_pdf.save(filename, content_file, save=True)
-    return informe.archivo_pdf
+    return pdf_content
 
 
 def enviar_correo_con_adjunto(subject, message, recipient_list, attachment_path):
     """
-    Envía un correo electrónico con un archivo adjunto
-    
+    Encola un correo electrónico con un archivo adjunto
+
+    El envío lo hace el worker `process_email_queue`; el archivo se lee
+    al momento de enviar, así que debe seguir existiendo hasta entonces.
+
     Args:
         subject: Asunto del correo
         message: Cuerpo del mensaje
         recipient_list: Lista de destinatarios
         attachment_path: Ruta del archivo a adjuntar
+
+    Returns:
+        CorreoSaliente encolado, o None si no hay destinatarios
     """
-    from django.core.mail import EmailMessage
-    from django.conf import settings
-    
-    email = EmailMessage(
-        subject=subject,
-        body=message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        to=recipient_list,
-    )
-    
-    if attachment_path:
-        email.attach_file(attachment_path)
-    
-    email.send(fail_silently=False)
-    return True
+    from .outbox import encolar_correo
+
+    return encolar_correo(subject, message, recipient_list, ruta_adjunto=attachment_path or '')
@@ -1,14 +1,16 @@
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.shortcuts import get_object_or_404
-from django.core.mail import send_mail
-from django.core.mail.backends.base import BaseEmailBackend
 from django.conf import settings
-from django.http import FileResponse
+from django.db.models import Exists, OuterRef
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 import os
+from datetime import timedelta
 from django_filters.rest_framework import DjangoFilterBackend
 import logging
 
@@ -22,29 +24,50 @@ from .serializers import (
     SolicitudSerializer, SolicitudCreateUpdateSerializer,
     InformeSerializer, InformeCreateUpdateSerializer, TaskSerializer
 )
+from . import catalogos, lectura, masivo
+from .caching import cacheado
+from .estadisticas import (
+    resumen_general, solicitudes_por_dia, solicitudes_por_ingeniero, solicitudes_por_sucursal
+)
+from .filters import SolicitudFilter
+from .mixins import CamposDispersosMixin, CatalogoCacheMixin, ListadoMixin, RespuestaCacheadaMixin
+from .pagination import InformePagination, SolicitudPagination
+from .rollup import serie_diaria
+from .transiciones import tiempos_en_estado
 from .permissions import IsAdmin, IsAdminOrReadOnly, IsAuthenticatedOrReadOnly, IsEngineer
-from .utils import generar_pdf_informe
+from .utils import generar_pdf_informe, estadisticas_cache_pdf
+from .jobs import encolar_pdf_informe
+from .outbox import encolar_correo
+from .notifications import registrar_nueva_solicitud
+from .exports import zip_informes
+from .protected_media import servir_archivo_protegido
 
 logger = logging.getLogger(__name__)
 
 
-class TipoUsuarioViewSet(viewsets.ModelViewSet):
+class TipoUsuarioViewSet(RespuestaCacheadaMixin, CatalogoCacheMixin, CamposDispersosMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar tipos de usuario"""
     queryset = TipoUsuario.objects.all()
+    catalogo = 'tipo_usuario'
+    respuestas_cacheadas = {'list': ('catalogo:tipo_usuario',), 'retrieve': ('catalogo:tipo_usuario',)}
     serializer_class = TipoUsuarioSerializer
     permission_classes = [AllowAny]
 
 
-class NivelAccesoViewSet(viewsets.ModelViewSet):
+class NivelAccesoViewSet(RespuestaCacheadaMixin, CatalogoCacheMixin, CamposDispersosMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar niveles de acceso"""
     queryset = NivelAcceso.objects.all()
+    catalogo = 'nivel_acceso'
+    respuestas_cacheadas = {'list': ('catalogo:nivel_acceso',), 'retrieve': ('catalogo:nivel_acceso',)}
     serializer_class = NivelAccesoSerializer
     permission_classes = [AllowAny]
 
 
-class SucursalViewSet(viewsets.ModelViewSet):
+class SucursalViewSet(RespuestaCacheadaMixin, CatalogoCacheMixin, CamposDispersosMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar sucursales"""
     queryset = Sucursal.objects.all()
+    catalogo = 'sucursal'
+    respuestas_cacheadas = {'list': ('catalogo:sucursal',), 'retrieve': ('catalogo:sucursal',)}
     serializer_class = SucursalSerializer
     permission_classes = [AllowAny]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
@@ -52,7 +75,7 @@ class SucursalViewSet(viewsets.ModelViewSet):
     ordering_fields = ['nombre_sucursal']
 
 
-class UsuarioViewSet(viewsets.ModelViewSet):
+class UsuarioViewSet(CamposDispersosMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar usuarios"""
     queryset = Usuario.objects.all()
     serializer_class = UsuarioSerializer
@@ -99,17 +122,23 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class EstadoViewSet(viewsets.ModelViewSet):
+class EstadoViewSet(RespuestaCacheadaMixin, CatalogoCacheMixin, CamposDispersosMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar estados"""
     queryset = Estado.objects.all()
+    catalogo = 'estado'
+    respuestas_cacheadas = {'list': ('catalogo:estado',), 'retrieve': ('catalogo:estado',)}
     serializer_class = EstadoSerializer
     permission_classes = [AllowAny]
 
 
-class MaquinaViewSet(viewsets.ModelViewSet):
+class MaquinaViewSet(RespuestaCacheadaMixin, CamposDispersosMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar máquinas"""
     queryset = Maquina.objects.all()
     serializer_class = MaquinaSerializer
+    # La sucursal sale del catálogo: sus cambios también invalidan
+    respuestas_cacheadas = {
+        accion: ('maquinas', 'catalogo:sucursal') for accion in ('list', 'retrieve', 'por_sucursal')
+    }
     permission_classes = [AllowAny]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['codigo_sucursal', 'marca']
@@ -145,22 +174,25 @@ class MaquinaViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class SolicitudViewSet(viewsets.ModelViewSet):
+class SolicitudViewSet(CamposDispersosMixin, ListadoMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar solicitudes (tickets)"""
     queryset = Solicitud.objects.all()
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['codigo_estado', 'codigo_maquinaria', 'id_usuario', 'codigo_maquinaria__codigo_sucursal']
+    filterset_class = SolicitudFilter
+    pagination_class = SolicitudPagination
     search_fields = ['descripcion']
     ordering_fields = ['fecha_creacion', 'fecha_actualizacion']
     
     def get_queryset(self):
         """Optimizar queries con select_related para evitar N+1"""
+        # El estado sale del caché de catálogos (CatalogoField), sin join
         queryset = Solicitud.objects.select_related(
             'id_usuario',
             'ingeniero_asignado',
             'codigo_maquinaria',
-            'codigo_maquinaria__codigo_sucursal',
-            'codigo_estado'
+        ).annotate(
+            # tiene_informe en una subconsulta EXISTS y no un SELECT por fila
+            tiene_informe=Exists(Informe.objects.filter(codigo_solicitud=OuterRef('pk')))
         )
         
         # Filtros personalizados por query params
@@ -200,6 +232,17 @@ class SolicitudViewSet(viewsets.ModelViewSet):
         if self.action in ['create', 'update', 'partial_update']:
             return SolicitudCreateUpdateSerializer
         return SolicitudSerializer
+
+    def get_lectura(self):
+        """Con ?fields= / ?expand= los listados se arman con .values() (api/lectura.py)"""
+        try:
+            campos = lectura.campos_solicitados(self.request.query_params)
+        except ValueError as e:
+            raise ParseError({'error': str(e)})
+        if campos is None:
+            return None
+        # El pk y los campos de orden siempre van: los usa la paginación por cursor
+        return lectura.LecturaSolicitud(campos, columnas_extra=['codigo_solicitud', *self.ordering_fields])
     
     def create(self, request, *args, **kwargs):
         """Crear solicitud y enviar notificación"""
@@ -212,11 +255,8 @@ class SolicitudViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         solicitud = serializer.save()
         
-        # Enviar notificación por correo (DESHABILITADO temporalmente por timeout SMTP)
-        # try:
-        #     self._enviar_notificacion_nueva_solicitud(solicitud)
-        # except Exception as e:
-        #     print(f"Error al enviar notificación: {e}")
+        # Notificación por correo (se encola; la envía process_email_queue)
+        self._enviar_notificacion_nueva_solicitud(solicitud)
         
         # Retornar respuesta con serializer completo
         response_serializer = SolicitudSerializer(solicitud)
@@ -225,12 +265,11 @@ class SolicitudViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], url_path='por-encargados')
     def por_encargados(self, request):
         """Listar solicitudes creadas por usuarios Encargados (tipo 2). Opcional: ?codigo_sucursal=ID"""
-        qs = self.queryset.filter(id_usuario__codigo_tipo_usuario=2)
+        qs = self.get_queryset().filter(id_usuario__codigo_tipo_usuario=2)
         codigo_sucursal = request.query_params.get('codigo_sucursal')
         if codigo_sucursal:
-            qs = qs.filter(codigo_maquinaria__codigo_sucursal=codigo_sucursal)
-        serializer = SolicitudSerializer(qs, many=True)
-        return Response(serializer.data)
+            qs = qs.filter(codigo_sucursal=codigo_sucursal)
+        return self.listar(qs)
 
     @action(detail=False, methods=['get'], url_path='por-sucursal')
     def por_sucursal(self, request):
@@ -238,15 +277,13 @@ class SolicitudViewSet(viewsets.ModelViewSet):
         codigo_sucursal = request.query_params.get('codigo_sucursal')
         if not codigo_sucursal:
             return Response({'error': 'Parametro codigo_sucursal requerido'}, status=status.HTTP_400_BAD_REQUEST)
-        qs = self.queryset.filter(codigo_maquinaria__codigo_sucursal=codigo_sucursal)
-        serializer = SolicitudSerializer(qs, many=True)
-        return Response(serializer.data)
+        return self.listar(self.get_queryset().filter(codigo_sucursal=codigo_sucursal))
     
     def update(self, request, *args, **kwargs):
         """Actualizar solicitud y notificar cambios de estado"""
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
-        estado_anterior = instance.codigo_estado
+        estado_anterior_id = instance.codigo_estado_id
 
         data = request.data.copy()
         # No permitir cambiar el usuario dueño desde el frontend
@@ -254,14 +291,14 @@ class SolicitudViewSet(viewsets.ModelViewSet):
 
         serializer = self.get_serializer(instance, data=data, partial=partial)
         serializer.is_valid(raise_exception=True)
+        instance._modificado_por = request.user
         solicitud = serializer.save()
         
-        # Si cambió el estado, enviar notificación (DESHABILITADO temporalmente por timeout SMTP)
-        # if estado_anterior != solicitud.codigo_estado:
-        #     try:
-        #         self._enviar_notificacion_cambio_estado(solicitud, estado_anterior)
-        #     except Exception as e:
-        #         print(f"Error al enviar notificación: {e}")
+        # Si cambió el estado, encolar notificación
+        if estado_anterior_id != solicitud.codigo_estado_id:
+            self._enviar_notificacion_cambio_estado(
+                solicitud, catalogos.obtener_o_consultar('estado', estado_anterior_id)
+            )
         
         response_serializer = SolicitudSerializer(solicitud)
         return Response(response_serializer.data)
@@ -269,16 +306,12 @@ class SolicitudViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def pendientes(self, request):
         """Listar solicitudes pendientes"""
-        solicitudes = self.queryset.filter(codigo_estado__in=[1, 2])
-        serializer = SolicitudSerializer(solicitudes, many=True)
-        return Response(serializer.data)
+        return self.listar(self.get_queryset().filter(codigo_estado__in=[1, 2]))
     
     @action(detail=False, methods=['get'])
     def completadas(self, request):
         """Listar solicitudes completadas"""
-        solicitudes = self.queryset.filter(codigo_estado=3)
-        serializer = SolicitudSerializer(solicitudes, many=True)
-        return Response(serializer.data)
+        return self.listar(self.get_queryset().filter(codigo_estado=3))
     
     @action(detail=True, methods=['post'])
     def cambiar_estado(self, request, pk=None):
@@ -320,7 +353,7 @@ class SolicitudViewSet(viewsets.ModelViewSet):
             )
         
         user = request.user
-        estado_anterior_id = solicitud.codigo_estado.codigo_estado
+        estado_anterior_id = solicitud.codigo_estado_id
         
         # Validar permisos según tipo de usuario
         es_admin = user.codigo_nivel_acceso == 4
@@ -350,31 +383,28 @@ class SolicitudViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Obtener el objeto Estado
-        try:
-            nuevo_estado = Estado.objects.get(codigo_estado=nuevo_estado_id)
-            estado_anterior = solicitud.codigo_estado
-            solicitud.codigo_estado = nuevo_estado
-            solicitud.save()
-            
-            logger.info(f"Usuario {user.username} cambió estado de solicitud #{solicitud.codigo_solicitud} de {estado_anterior.nombre_estado} a {nuevo_estado.nombre_estado}")
-            
-            # Enviar notificación (DESHABILITADO temporalmente por timeout SMTP)
-            # try:
-            #     self._enviar_notificacion_cambio_estado(solicitud, estado_anterior)
-            # except Exception as e:
-            #     logger.error(f"Error al enviar notificación: {e}")
-            
-            serializer = SolicitudSerializer(solicitud)
-            response_data = serializer.data
-            response_data['mensaje'] = f'Estado actualizado correctamente a {nuevo_estado.nombre_estado}'
-            
-            return Response(response_data, status=status.HTTP_200_OK)
-        except Estado.DoesNotExist:
+        # Los estados salen del caché de catálogos (consulta solo si no los tiene)
+        nuevo_estado = catalogos.obtener_o_consultar('estado', nuevo_estado_id)
+        if nuevo_estado is None:
             return Response(
                 {'error': 'Estado no válido'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
+        estado_anterior = catalogos.obtener_o_consultar('estado', estado_anterior_id)
+        solicitud.codigo_estado = nuevo_estado
+        solicitud._modificado_por = user
+        solicitud.save()
+        
+        logger.info(f"Usuario {user.username} cambió estado de solicitud #{solicitud.codigo_solicitud} de {estado_anterior.nombre_estado} a {nuevo_estado.nombre_estado}")
+        
+        # Encolar notificación (la envía process_email_queue)
+        self._enviar_notificacion_cambio_estado(solicitud, estado_anterior)
+        
+        serializer = SolicitudSerializer(solicitud)
+        response_data = serializer.data
+        response_data['mensaje'] = f'Estado actualizado correctamente a {nuevo_estado.nombre_estado}'
+        
+        return Response(response_data, status=status.HTTP_200_OK)
     
     @action(detail=True, methods=['post'])
     def asignar_ingeniero(self, request, pk=None):
@@ -434,39 +464,104 @@ class SolicitudViewSet(viewsets.ModelViewSet):
         
         return Response(response_data, status=status.HTTP_200_OK)
     
+    @action(detail=False, methods=['post'], url_path='cambiar-estado-masivo')
+    def cambiar_estado_masivo(self, request):
+        """
+        Cambiar el estado de varias solicitudes en una transacción
+
+        Mismas reglas que cambiar_estado: encargados/admin cualquier solicitud;
+        ingenieros solo las asignadas a ellos y sin retroceder.
+
+        Request body:
+        {
+            "ids": [10, 11, 12],
+            "codigo_estado": 2
+        }
+
+        Responde con un resultado por id ({codigo_solicitud, ok, error}).
+        """
+        user = request.user
+        es_admin_o_encargado = user.codigo_nivel_acceso == 4 or user.codigo_tipo_usuario == 2
+        if not es_admin_o_encargado and user.codigo_tipo_usuario != 1:
+            return Response(
+                {'error': 'No tienes permiso para cambiar el estado de solicitudes'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        try:
+            ids = masivo.ids_validos(request.data.get('ids'), settings.BULK_UPDATE_MAX_IDS)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            nuevo_estado_id = int(request.data.get('codigo_estado'))
+        except (ValueError, TypeError):
+            return Response(
+                {'error': 'codigo_estado requerido (número entero)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        nuevo_estado = catalogos.obtener_o_consultar('estado', nuevo_estado_id) if nuevo_estado_id in [1, 2, 3] else None
+        if nuevo_estado is None:
+            return Response(
+                {'error': 'Estado debe ser 1 (Pendiente), 2 (En Proceso) o 3 (Completada)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        resultados, actualizadas = masivo.cambiar_estado(
+            ids, nuevo_estado, user, solo_asignadas=not es_admin_o_encargado
+        )
+        logger.info(f"Usuario {user.username} cambió a {nuevo_estado.nombre_estado} {actualizadas} de {len(ids)} solicitudes")
+        return Response({'actualizadas': actualizadas, 'resultados': resultados}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='asignar-ingeniero-masivo')
+    def asignar_ingeniero_masivo(self, request):
+        """
+        Asignar un ingeniero a varias solicitudes en una transacción
+
+        Solo encargados y administradores.
+
+        Request body:
+        {
+            "ids": [10, 11, 12],
+            "id_ingeniero": 5
+        }
+        """
+        user = request.user
+        if not (user.codigo_nivel_acceso == 4 or user.codigo_tipo_usuario == 2):
+            return Response(
+                {'error': 'Solo encargados y administradores pueden asignar ingenieros'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        try:
+            ids = masivo.ids_validos(request.data.get('ids'), settings.BULK_UPDATE_MAX_IDS)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        id_ingeniero = request.data.get('id_ingeniero')
+        if not id_ingeniero:
+            return Response({'error': 'id_ingeniero requerido'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            ingeniero = Usuario.objects.get(id_usuario=id_ingeniero, codigo_tipo_usuario=1, is_active=True)
+        except (Usuario.DoesNotExist, ValueError):
+            return Response({'error': 'Ingeniero no encontrado o no válido'}, status=status.HTTP_404_NOT_FOUND)
+
+        resultados, actualizadas = masivo.asignar_ingeniero(ids, ingeniero)
+        logger.info(f"Usuario {user.username} asignó ingeniero {ingeniero.username} a {actualizadas} de {len(ids)} solicitudes")
+        return Response({'actualizadas': actualizadas, 'resultados': resultados}, status=status.HTTP_200_OK)
+
     def _enviar_notificacion_nueva_solicitud(self, solicitud):
-        """Enviar correo de notificación por nueva solicitud"""
+        """
+        Registrar la notificación de nueva solicitud para cada ingeniero
+
+        El correo no sale aquí: process_email_queue agrupa los eventos de cada
+        ingeniero en un resumen por ventana (NOTIFICATION_DIGEST_WINDOW).
+        """
         try:
-            subject = f'Nueva Solicitud #{solicitud.codigo_solicitud}'
-            message = f"""
-            Se ha creado una nueva solicitud de mantenimiento.
-            
-            Solicitud: #{solicitud.codigo_solicitud}
-            Máquina: {solicitud.codigo_maquinaria.marca} {solicitud.codigo_maquinaria.modelo}
-            Usuario: {solicitud.id_usuario.get_full_name()}
-            Descripción: {solicitud.descripcion}
-            Estado: {solicitud.codigo_estado.nombre_estado}
-            Fecha: {solicitud.fecha_creacion.strftime('%d/%m/%Y %H:%M')}
-            """
-            
-            # Enviar a administradores o ingenieros
-            destinatarios = Usuario.objects.filter(
-                codigo_tipo_usuario=1,  # Ingenieros
-                is_active=True
-            ).values_list('correo_electronico', flat=True)
-            
-            if destinatarios:
-                send_mail(
-                    subject,
-                    message,
-                    settings.DEFAULT_FROM_EMAIL,
-                    list(destinatarios),
-                    fail_silently=True,
-                )
-                logger.info(f"Notificación enviada a {len(destinatarios)} ingenieros para solicitud #{solicitud.codigo_solicitud}")
+            cantidad = registrar_nueva_solicitud(solicitud)
+            if cantidad:
+                logger.info(f"Notificación registrada para {cantidad} ingenieros para solicitud #{solicitud.codigo_solicitud}")
         except Exception as e:
-            logger.error(f"Error enviando notificación de nueva solicitud: {str(e)}")
-            # No interrumpir el flujo si falla el email
+            logger.error(f"Error registrando notificación de nueva solicitud: {str(e)}")
+            # No interrumpir el flujo si falla la notificación
     
     def _enviar_notificacion_cambio_estado(self, solicitud, estado_anterior):
         """Enviar correo de notificación por cambio de estado"""
@@ -483,28 +578,32 @@ class SolicitudViewSet(viewsets.ModelViewSet):
             """
             
             # Enviar al usuario que creó la solicitud
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [solicitud.id_usuario.correo_electronico],
-                fail_silently=True,
-            )
-            logger.info(f"Notificación de cambio de estado enviada a {solicitud.id_usuario.correo_electronico} para solicitud #{solicitud.codigo_solicitud}")
+            encolar_correo(subject, message, [solicitud.id_usuario.correo_electronico])
+            logger.info(f"Notificación de cambio de estado encolada para {solicitud.id_usuario.correo_electronico} para solicitud #{solicitud.codigo_solicitud}")
         except Exception as e:
             logger.error(f"Error enviando notificación de cambio de estado: {str(e)}")
             # No interrumpir el flujo si falla el email
 
 
-class InformeViewSet(viewsets.ModelViewSet):
+class InformeViewSet(CamposDispersosMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar informes"""
-    queryset = Informe.objects.select_related('codigo_solicitud', 'codigo_maquinaria', 'id_usuario')
+    queryset = Informe.objects.select_related(
+        'codigo_solicitud', 'codigo_solicitud__codigo_estado', 'codigo_solicitud__codigo_maquinaria',
+        'codigo_solicitud__id_usuario',
+        'codigo_solicitud__ingeniero_asignado',
+        'codigo_maquinaria', 'codigo_maquinaria__codigo_sucursal', 'id_usuario'
+    )
     permission_classes = [AllowAny]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['codigo_solicitud', 'codigo_maquinaria', 'id_usuario']
     ordering_fields = ['fecha_informe']
+    pagination_class = InformePagination
     
     def get_permissions(self):
+        if self.action == 'estadisticas_cache':
+            return [IsAdmin()]
+        if self.action == 'exportar_zip':
+            return [IsAuthenticated()]
         if self.request.method in ['GET', 'HEAD', 'OPTIONS']:
             return [AllowAny()]
         return [IsEngineer()]
@@ -515,6 +614,7 @@ class InformeViewSet(viewsets.ModelViewSet):
         codigo_informe = self.request.query_params.get('codigo_informe')
         codigo_solicitud = self.request.query_params.get('codigo_solicitud')
         codigo_maquinaria = self.request.query_params.get('codigo_maquinaria')
+        codigo_sucursal = self.request.query_params.get('codigo_sucursal')
         fecha_informe = self.request.query_params.get('fecha_informe')
         fecha_desde = self.request.query_params.get('fecha_desde')
         fecha_hasta = self.request.query_params.get('fecha_hasta')
@@ -525,6 +625,8 @@ class InformeViewSet(viewsets.ModelViewSet):
             qs = qs.filter(codigo_solicitud__codigo_solicitud=codigo_solicitud)
         if codigo_maquinaria:
             qs = qs.filter(codigo_maquinaria__codigo_maquinaria=codigo_maquinaria)
+        if codigo_sucursal:
+            qs = qs.filter(codigo_maquinaria__codigo_sucursal=codigo_sucursal)
         if fecha_informe:
             qs = qs.filter(fecha_informe__date=fecha_informe)
         if fecha_desde:
@@ -539,47 +641,41 @@ class InformeViewSet(viewsets.ModelViewSet):
         return InformeSerializer
     
     def create(self, request, *args, **kwargs):
-        """Crear informe y generar PDF automáticamente"""
+        """Crear informe y encolar la generación del PDF (ver pdf_status)"""
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         informe = serializer.save()
         
-        # Generar PDF automáticamente
-        try:
-            generar_pdf_informe(informe)
-        except Exception as e:
-            print(f"Error al generar PDF: {e}")
+        # El PDF lo genera el worker `process_pdf_jobs`; no bloquear el request
+        encolar_pdf_informe(informe)
         
         response_serializer = InformeSerializer(informe, context={'request': request})
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
     
     @action(detail=True, methods=['get'])
     def descargar_pdf(self, request, pk=None):
-        """Descargar PDF del informe"""
+        """
+        Descargar PDF del informe
+        
+        Soporta Range (206) para reanudar descargas y revalidación con
+        ETag / Last-Modified (If-None-Match, If-Modified-Since → 304).
+        """
         informe = self.get_object()
         
-        # Regenerar si no hay archivo o fue purgado del disco
+        # Regenerar solo si falta el archivo o cambió el contenido del informe
         try:
-            file_missing = not informe.archivo_pdf or not os.path.exists(informe.archivo_pdf.path)
-        except Exception:
-            file_missing = True
-
-        if file_missing:
-            try:
-                generar_pdf_informe(informe)
-            except Exception as e:
-                return Response(
-                    {'error': f'Error al generar PDF: {str(e)}'}, 
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
-            # Reload instance to ensure FileField is fresh
-            informe.refresh_from_db()
+            generar_pdf_informe(informe)
+        except Exception as e:
+            return Response(
+                {'error': f'Error al generar PDF: {str(e)}'}, 
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
         
         try:
-            return FileResponse(
-                informe.archivo_pdf.open('rb'),
-                content_type='application/pdf',
-                as_attachment=True,
+            # Según PROTECTED_MEDIA_MODE la transferencia la hace nginx/Apache o el worker
+            return servir_archivo_protegido(
+                request,
+                informe.archivo_pdf,
                 filename=f'informe_{informe.codigo_solicitud.codigo_solicitud}.pdf'
             )
         except Exception as e:
@@ -590,11 +686,17 @@ class InformeViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'])
     def regenerar_pdf(self, request, pk=None):
-        """Enviar informe por correo electrónico con PDF adjunto"""
+        """
+        Regenerar el PDF del informe
+        
+        Si el contenido no cambió se reutiliza el archivo existente;
+        enviar {"forzar": true} para renderizarlo de nuevo igualmente.
+        """
         informe = self.get_object()
+        forzar = str(request.data.get('forzar', '')).lower() in ['1', 'true']
         
         try:
-            generar_pdf_informe(informe)
+            generar_pdf_informe(informe, forzar=forzar)
             serializer = InformeSerializer(informe, context={'request': request})
             return Response(serializer.data)
         except Exception as e:
@@ -605,7 +707,12 @@ class InformeViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'])
     def enviar_por_correo(self, request, pk=None):
-        """Enviar informe por correo electrónico con PDF adjunto"""
+        """
+        Enviar informe por correo electrónico con PDF adjunto
+
+        El correo se encola y lo envía el worker process_email_queue, que
+        adjunta el PDF vigente del informe (generándolo si hace falta).
+        """
         informe = self.get_object()
         destinatario = request.data.get('email')
         
@@ -616,12 +723,6 @@ class InformeViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            from django.core.mail import EmailMessage
-            
-            # Asegurar que existe el PDF
-            if not informe.archivo_pdf:
-                generar_pdf_informe(informe)
-            
             subject = f'Informe de Mantenimiento - Solicitud #{informe.codigo_solicitud.codigo_solicitud}'
             message = f"""Estimado cliente,
 
@@ -637,36 +738,106 @@ Saludos cordiales,
 Sistema MantenTask
             """
             
-            email = EmailMessage(
-                subject=subject,
-                body=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[destinatario],
-            )
+            correo = encolar_correo(subject, message, [destinatario], informe=informe)
             
-            # Adjuntar el PDF
-            if informe.archivo_pdf:
-                email.attach_file(informe.archivo_pdf.path)
-            
-            email.send(fail_silently=False)
-            
-            logger.info(f"Informe #{informe.codigo_solicitud.codigo_solicitud} enviado a {destinatario}")
+            logger.info(f"Informe #{informe.codigo_solicitud.codigo_solicitud} encolado para {destinatario} (correo #{correo.pk})")
             
             return Response({
-                'mensaje': 'Correo enviado exitosamente',
+                'mensaje': 'Correo encolado para envío',
                 'destinatario': destinatario,
-                'adjunto': bool(informe.archivo_pdf)
-            })
+                'adjunto': True,
+                'id_correo': correo.pk,
+            }, status=status.HTTP_202_ACCEPTED)
         except Exception as e:
-            logger.error(f"Error al enviar correo con informe: {str(e)}")
+            logger.error(f"Error al encolar correo con informe: {str(e)}")
             return Response(
                 {'error': f'Error al enviar correo: {str(e)}'}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+    
+    @action(detail=False, methods=['get'], url_path='exportar-zip')
+    def exportar_zip(self, request):
+        """
+        Descargar en un ZIP los PDFs de todos los informes filtrados
+        
+        Acepta los mismos filtros que el listado (fecha_desde, fecha_hasta,
+        codigo_maquinaria, codigo_sucursal, ...). El ZIP se transmite a medida
+        que se agregan los archivos; los PDFs faltantes se generan en un pool
+        acotado (PDF_EXPORT_WORKERS). Requiere autenticación y rechaza con 400
+        las exportaciones de más de PDF_EXPORT_MAX_INFORMES informes.
+        """
+        informes = self.filter_queryset(self.get_queryset())
+        maximo = settings.PDF_EXPORT_MAX_INFORMES
+        if informes[maximo:maximo + 1].exists():
+            return Response(
+                {'error': f'La exportación supera los {maximo} informes; acota con fecha_desde/fecha_hasta u otros filtros'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        informes = informes.iterator(chunk_size=settings.PDF_EXPORT_CHUNK_SIZE)
+        response = StreamingHttpResponse(
+            zip_informes(informes, max_workers=settings.PDF_EXPORT_WORKERS),
+            content_type='application/zip'
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="informes_{timezone.now().strftime("%Y%m%d_%H%M%S")}.zip"'
+        )
+        return response
+    
+    @action(detail=False, methods=['get'], url_path='estadisticas-cache')
+    def estadisticas_cache(self, request):
+        """Aciertos/fallos del caché de PDFs y tiempo de render ahorrado (solo admin)"""
+        return Response(estadisticas_cache_pdf())
+
+
+class EstadisticaDiariaViewSet(viewsets.ViewSet):
+    """Series diarias de solicitudes leídas del resumen materializado (EstadisticaDiaria)"""
+    permission_classes = [IsAuthenticated]
+    max_dias = 731
+
+    def list(self, request):
+        """
+        Query params: desde, hasta (YYYY-MM-DD, por defecto los últimos 30 días) y codigo_sucursal
+
+        Los administradores ven cualquier sucursal (o el total); el resto, solo la suya.
+        """
+        try:
+            hasta = self._fecha(request, 'hasta', timezone.localdate())
+            desde = self._fecha(request, 'desde', hasta - timedelta(days=29))
+            sucursal = request.query_params.get('codigo_sucursal')
+            sucursal = int(sucursal) if sucursal else None
+        except ValueError:
+            return Response({'error': 'Parámetros inválidos (fechas YYYY-MM-DD, codigo_sucursal entero)'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if desde > hasta or (hasta - desde).days >= self.max_dias:
+            return Response({'error': f'El rango debe ser de 1 a {self.max_dias} días'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if request.user.codigo_nivel_acceso != 4:
+            propia = request.user.codigo_sucursal_id
+            if propia is None or sucursal not in (None, propia):
+                return Response({'error': 'Solo puedes ver las estadísticas de tu sucursal'},
+                                status=status.HTTP_403_FORBIDDEN)
+            sucursal = propia
+
+        return Response({
+            'desde': desde,
+            'hasta': hasta,
+            'codigo_sucursal': sucursal,
+            'dias': serie_diaria(desde, hasta, sucursal),
+        })
+
+    def _fecha(self, request, nombre, defecto):
+        valor = request.query_params.get(nombre)
+        if not valor:
+            return defecto
+        fecha = parse_date(valor)
+        if fecha is None:
+            raise ValueError(valor)
+        return fecha
 
 
 # ViewSet legacy para compatibilidad
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(CamposDispersosMixin, viewsets.ModelViewSet):
     queryset = Task.objects.all().order_by('-created_at')
     serializer_class = TaskSerializer
     permission_classes = [AllowAny]
@@ -678,16 +849,51 @@ class AdminDashboardViewSet(viewsets.ViewSet):
     
     @action(detail=False, methods=['get'])
     def estadisticas(self, request):
-        """Obtener estadísticas generales del sistema"""
-        return Response({
-            'total_usuarios': Usuario.objects.count(),
-            'total_solicitudes': Solicitud.objects.count(),
-            'total_maquinas': Maquina.objects.count(),
-            'total_sucursales': Sucursal.objects.count(),
-            'solicitudes_pendientes': Solicitud.objects.filter(codigo_estado=1).count(),
-            'solicitudes_en_proceso': Solicitud.objects.filter(codigo_estado=2).count(),
-            'solicitudes_completadas': Solicitud.objects.filter(codigo_estado=3).count(),
-        })
+        """
+        Estadísticas generales con desgloses por sucursal, ingeniero y día
+
+        Query params: dias (serie diaria, default 30, máximo 365). La respuesta
+        se cachea ADMIN_STATS_CACHE_TTL segundos y se invalida al escribir solicitudes.
+        """
+        try:
+            dias = int(request.query_params.get('dias', 30))
+        except ValueError:
+            return Response({'error': 'dias debe ser un número entero'}, status=status.HTTP_400_BAD_REQUEST)
+        dias = min(max(dias, 1), 365)
+
+        def calcular():
+            datos = resumen_general()
+            datos.update({
+                'por_sucursal': solicitudes_por_sucursal(),
+                'por_ingeniero': solicitudes_por_ingeniero(),
+                'por_dia': solicitudes_por_dia(dias),
+                'generado_en': timezone.now(),
+            })
+            return datos
+
+        return Response(cacheado('solicitudes', f'estadisticas:{dias}', calcular, settings.ADMIN_STATS_CACHE_TTL))
+
+    @action(detail=False, methods=['get'], url_path='tiempos-estado')
+    def tiempos_estado(self, request):
+        """
+        Percentiles p50/p90/p99 (horas) del tiempo en cada estado, por sucursal e ingeniero
+
+        Query params: dias (estancias iniciadas en los últimos N días, default 30,
+        máximo 365). Sale del historial de transiciones; se cachea como estadisticas.
+        """
+        try:
+            dias = int(request.query_params.get('dias', 30))
+        except ValueError:
+            return Response({'error': 'dias debe ser un número entero'}, status=status.HTTP_400_BAD_REQUEST)
+        dias = min(max(dias, 1), 365)
+
+        def calcular():
+            desde = timezone.now() - timedelta(days=dias)
+            datos = tiempos_en_estado(desde)
+            datos.update({'desde': desde, 'generado_en': timezone.now()})
+            return datos
+
+        return Response(cacheado('solicitudes', f'tiempos-estado:{dias}', calcular, settings.ADMIN_STATS_CACHE_TTL))
     
     @action(detail=False, methods=['get'])
     def usuarios_dashboard(self, request):
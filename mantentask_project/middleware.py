@@ -1,6 +1,25 @@
+import gzip
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
 from django.utils.deprecation import MiddlewareMixin
 from django.middleware.csrf import CsrfViewMiddleware
 
+# brotli y zstandard son opcionales: sin ellos solo se ofrece gzip
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+# Los PDF, ZIP e imágenes ya vienen comprimidos
+TIPOS_COMPRIMIBLES = ('application/json', 'text/', 'application/xml', 'application/javascript')
+
 
 class DisableCSRFMiddleware(MiddlewareMixin):
     """
@@ -13,3 +32,150 @@ class DisableCSRFMiddleware(MiddlewareMixin):
             # Marcar como CSRF exento
             setattr(request, '_dont_enforce_csrf_checks', True)
         return None
+
+
+class CompresionAPIMiddleware(MiddlewareMixin):
+    """
+    Comprime las respuestas de /api/ con zstd, brotli o gzip según Accept-Encoding
+
+    Solo tipos de texto (JSON, text/*, XML, JS): los PDF y ZIP ya van
+    comprimidos. Las respuestas normales se comprimen si miden al menos
+    API_COMPRESSION_MIN_BYTES; las transmitidas (StreamingHttpResponse, p. ej.
+    ?stream=1) siempre, bloque a bloque, sin acumularlas. Nunca toca 206,
+    respuestas que ya traen Content-Encoding ni transferencias delegadas al
+    proxy (X-Accel-Redirect / X-Sendfile). Con el algoritmo elegido se marca
+    `Vary: Accept-Encoding` y el ETag pasa a débil, como GZipMiddleware.
+
+    BREACH: tampoco se comprimen las rutas de API_COMPRESSION_EXCLUDED_PATHS
+    (login/registro, que devuelven los tokens JWT) ni las respuestas que fijan
+    cookies; comprimir un secreto junto a texto que el atacante controla
+    permite deducirlo midiendo el tamaño de la respuesta.
+    """
+    def process_response(self, request, response):
+        if not settings.API_COMPRESSION_ENABLED or not request.path.startswith('/api/'):
+            return response
+        if request.path.startswith(tuple(settings.API_COMPRESSION_EXCLUDED_PATHS)) or response.cookies:
+            return response
+        if response.status_code == 206 or response.has_header('Content-Encoding'):
+            return response
+        if response.has_header('X-Accel-Redirect') or response.has_header('X-Sendfile'):
+            return response
+        tipo = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if not tipo.startswith(TIPOS_COMPRIMIBLES):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        codec = elegir_codec(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if codec is None:
+            return response
+
+        if response.streaming:
+            if getattr(response, 'is_async', False):
+                return response
+            response.streaming_content = codec.flujo(response.streaming_content)
+            del response['Content-Length']
+        else:
+            if len(response.content) < settings.API_COMPRESSION_MIN_BYTES:
+                return response
+            comprimido = codec.comprimir(response.content)
+            if len(comprimido) >= len(response.content):
+                return response
+            response.content = comprimido
+            response['Content-Length'] = str(len(comprimido))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = codec.nombre
+        return response
+
+
+class Gzip:
+    nombre = 'gzip'
+
+    def __init__(self, nivel):
+        self.nivel = nivel
+
+    def comprimir(self, datos):
+        return gzip.compress(datos, compresslevel=self.nivel, mtime=0)
+
+    def flujo(self, partes):
+        compresor = zlib.compressobj(self.nivel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for parte in partes:
+            # Z_SYNC_FLUSH: cada bloque sale al cliente apenas se genera
+            yield compresor.compress(parte) + compresor.flush(zlib.Z_SYNC_FLUSH)
+        yield compresor.flush()
+
+
+class Brotli:
+    nombre = 'br'
+
+    def __init__(self, nivel):
+        self.nivel = nivel
+
+    def comprimir(self, datos):
+        return brotli.compress(datos, quality=self.nivel)
+
+    def flujo(self, partes):
+        compresor = brotli.Compressor(quality=self.nivel)
+        for parte in partes:
+            yield compresor.process(parte) + compresor.flush()
+        yield compresor.finish()
+
+
+class Zstd:
+    nombre = 'zstd'
+
+    def __init__(self, nivel):
+        self.nivel = nivel
+
+    def comprimir(self, datos):
+        return zstandard.ZstdCompressor(level=self.nivel).compress(datos)
+
+    def flujo(self, partes):
+        compresor = zstandard.ZstdCompressor(level=self.nivel).compressobj()
+        for parte in partes:
+            yield compresor.compress(parte) + compresor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        yield compresor.flush()
+
+
+def codecs_disponibles():
+    """{nombre: codec} de los algoritmos de API_COMPRESSION_ALGORITHMS cuya biblioteca está instalada"""
+    niveles = {
+        'zstd': (Zstd, zstandard, settings.API_COMPRESSION_ZSTD_LEVEL),
+        'br': (Brotli, brotli, settings.API_COMPRESSION_BROTLI_QUALITY),
+        'gzip': (Gzip, gzip, settings.API_COMPRESSION_GZIP_LEVEL),
+    }
+    disponibles = {}
+    for nombre in settings.API_COMPRESSION_ALGORITHMS:
+        clase, modulo, nivel = niveles.get(nombre, (None, None, None))
+        if modulo is not None:
+            disponibles[nombre] = clase(nivel)
+    return disponibles
+
+
+def _aceptados(accept_encoding):
+    """{codificación: q} de un Accept-Encoding"""
+    aceptados = {}
+    for parte in accept_encoding.split(','):
+        nombre, _, parametros = parte.strip().partition(';')
+        q = 1.0
+        for parametro in parametros.split(';'):
+            clave, _, valor = parametro.strip().partition('=')
+            if clave.lower() == 'q':
+                try:
+                    q = float(valor)
+                except ValueError:
+                    q = 0.0
+        if nombre:
+            aceptados[nombre.strip().lower()] = q
+    return aceptados
+
+
+def elegir_codec(accept_encoding):
+    """El primer algoritmo (en el orden de API_COMPRESSION_ALGORITHMS) que el cliente acepta con q > 0"""
+    aceptados = _aceptados(accept_encoding)
+    for nombre, codec in codecs_disponibles().items():
+        if aceptados.get(nombre, aceptados.get('*', 0)) > 0:
+            return codec
+    return None
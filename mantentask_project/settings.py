@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 base_dir = Path(__file__).resolve().parent.parent
@@ -29,6 +30,7 @@ AUTH_USER_MODEL = 'api.Usuario'
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'mantentask_project.middleware.CompresionAPIMiddleware',  # zstd/br/gzip para /api/
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'mantentask_project.middleware.DisableCSRFMiddleware',  # Deshabilitar CSRF para /api/
@@ -141,6 +143,32 @@ if CORS_EXTRA:
     CORS_ALLOWED_ORIGINS.extend([origin for origin in CORS_EXTRA.split(',') if origin])
 CORS_ALLOW_CREDENTIALS = True
 
+# Caché compartido (CACHES): 'locmem' (por proceso, el default y el de las pruebas),
+# 'file' (directorio compartido por los workers del mismo servidor) o 'redis'
+# (Redis o compatibles como Valkey/KeyDB; requiere el paquete redis)
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'mantentask'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(base_dir / 'django_cache')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+}
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ImproperlyConfigured(f'CACHE_BACKEND debe ser uno de: {", ".join(CACHE_BACKENDS)}')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': os.getenv('CACHE_LOCATION', CACHE_BACKENDS[CACHE_BACKEND][1]),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', '300')),
+        'KEY_PREFIX': os.getenv('CACHE_KEY_PREFIX', 'mantentask'),
+    }
+}
+
+# Segundos que se guardan las respuestas de RespuestaCacheadaMixin (si la vista no indica otro)
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', '300'))
+
+# Navegador de la API (BrowsableAPIRenderer): por defecto solo con DEBUG
+BROWSABLE_API = os.getenv('BROWSABLE_API', str(DEBUG)) == 'True'
+
 # REST framework defaults
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
@@ -153,9 +181,14 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    # JSON con orjson (api/renderers.py); sin orjson instalado se comportan como los de DRF
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',
+        'api.renderers.ORJSONRenderer',
+    ] + (['rest_framework.renderers.BrowsableAPIRenderer'] if BROWSABLE_API else []),
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
@@ -163,6 +196,33 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Filas por lote en los listados con ?stream=1 (api/mixins.py)
+LIST_STREAM_CHUNK_SIZE = int(os.getenv('LIST_STREAM_CHUNK_SIZE', '500'))
+
+# Segundos que se cachean las estadísticas del panel de administración
+ADMIN_STATS_CACHE_TTL = int(os.getenv('ADMIN_STATS_CACHE_TTL', '30'))
+
+# Catálogos (estados, tipos, niveles, sucursales): segundos entre revisiones de la
+# versión compartida y max-age de sus endpoints
+CATALOG_CACHE_REFRESH = int(os.getenv('CATALOG_CACHE_REFRESH', '5'))
+CATALOG_CACHE_MAX_AGE = int(os.getenv('CATALOG_CACHE_MAX_AGE', '3600'))
+
+# Compresión de respuestas de /api/ (CompresionAPIMiddleware): algoritmos en orden de
+# preferencia (br y zstd requieren los paquetes brotli / zstandard), tamaño mínimo y niveles
+API_COMPRESSION_ENABLED = os.getenv('API_COMPRESSION_ENABLED', 'True') == 'True'
+API_COMPRESSION_ALGORITHMS = [a.strip() for a in os.getenv('API_COMPRESSION_ALGORITHMS', 'zstd,br,gzip').split(',')]
+API_COMPRESSION_MIN_BYTES = int(os.getenv('API_COMPRESSION_MIN_BYTES', '1024'))
+API_COMPRESSION_GZIP_LEVEL = int(os.getenv('API_COMPRESSION_GZIP_LEVEL', '6'))
+API_COMPRESSION_BROTLI_QUALITY = int(os.getenv('API_COMPRESSION_BROTLI_QUALITY', '4'))
+API_COMPRESSION_ZSTD_LEVEL = int(os.getenv('API_COMPRESSION_ZSTD_LEVEL', '3'))
+# Rutas que nunca se comprimen (BREACH): las que devuelven tokens
+API_COMPRESSION_EXCLUDED_PATHS = [
+    ruta.strip() for ruta in os.getenv('API_COMPRESSION_EXCLUDED_PATHS', '/api/auth/').split(',') if ruta.strip()
+]
+
+# Máximo de solicitudes por llamada a cambiar-estado-masivo / asignar-ingeniero-masivo
+BULK_UPDATE_MAX_IDS = int(os.getenv('BULK_UPDATE_MAX_IDS', '1000'))
+
 # JWT Configuration
 from datetime import timedelta
 
@@ -184,6 +244,34 @@ EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'noreply@mantentask.com')
 
+# Bandeja de salida de correos (worker: `python manage.py process_email_queue`)
+EMAIL_QUEUE_BATCH_SIZE = int(os.getenv('EMAIL_QUEUE_BATCH_SIZE', '20'))
+EMAIL_QUEUE_POLL_INTERVAL = float(os.getenv('EMAIL_QUEUE_POLL_INTERVAL', '5'))
+EMAIL_QUEUE_MAX_RETRIES = int(os.getenv('EMAIL_QUEUE_MAX_RETRIES', '5'))
+EMAIL_QUEUE_RETRY_DELAY = int(os.getenv('EMAIL_QUEUE_RETRY_DELAY', '60'))  # segundos, se duplica en cada reintento
+EMAIL_QUEUE_TIMEOUT = int(os.getenv('EMAIL_QUEUE_TIMEOUT', '300'))  # segundos antes de recuperar un envío colgado
+EMAIL_RATE_LIMIT_PER_MINUTE = int(os.getenv('EMAIL_RATE_LIMIT_PER_MINUTE', '30'))  # 0 = sin límite
+# Segundos que se acumulan las notificaciones de un ingeniero antes de enviarle el resumen (0 = sin espera)
+NOTIFICATION_DIGEST_WINDOW = int(os.getenv('NOTIFICATION_DIGEST_WINDOW', '300'))
+
+# Cola de generación de PDFs (worker: `python manage.py process_pdf_jobs`)
+PDF_WORKER_CONCURRENCY = int(os.getenv('PDF_WORKER_CONCURRENCY', '2'))
+PDF_WORKER_POLL_INTERVAL = float(os.getenv('PDF_WORKER_POLL_INTERVAL', '2'))
+PDF_JOB_MAX_RETRIES = int(os.getenv('PDF_JOB_MAX_RETRIES', '3'))
+PDF_JOB_RETRY_DELAY = int(os.getenv('PDF_JOB_RETRY_DELAY', '30'))  # segundos, se duplica en cada reintento
+PDF_JOB_TIMEOUT = int(os.getenv('PDF_JOB_TIMEOUT', '300'))  # segundos antes de recuperar una tarea colgada
+
+# Entrega de PDFs protegidos (ver api/protected_media.py):
+# 'django' = FileResponse en el worker, 'nginx' = X-Accel-Redirect, 'sendfile' = X-Sendfile
+PROTECTED_MEDIA_MODE = os.getenv('PROTECTED_MEDIA_MODE', 'django')
+PROTECTED_MEDIA_INTERNAL_URL = os.getenv('PROTECTED_MEDIA_INTERNAL_URL', '/protected-media/')
+PROTECTED_MEDIA_BLOCK_SIZE = int(os.getenv('PROTECTED_MEDIA_BLOCK_SIZE', str(512 * 1024)))
+
+# Exportación masiva de informes en ZIP (/api/informes/exportar-zip/)
+PDF_EXPORT_WORKERS = int(os.getenv('PDF_EXPORT_WORKERS', '2'))
+PDF_EXPORT_CHUNK_SIZE = int(os.getenv('PDF_EXPORT_CHUNK_SIZE', '200'))
+PDF_EXPORT_MAX_INFORMES = int(os.getenv('PDF_EXPORT_MAX_INFORMES', '10000'))  # más informes por ZIP -> 400
+
 # Logging configuration
 LOGGING = {
     'version': 1,